@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Bulk user provisioning script for TugasKu
+"""
+import os
+import sys
+import csv
+import json
+import logging
+import argparse
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tugasku_backend.database.connection import test_connection
+from tugasku_backend.utils.provisioning import provision_users
+from tugasku_backend.utils.logging import setup_logging
+
+def load_users(path):
+    """Read users from a CSV (username,email,password) or JSON file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            return list(csv.DictReader(f))
+        data = json.load(f)
+        return data.get('users', []) if isinstance(data, dict) else data
+
+def main():
+    """Provision the users listed in a file"""
+    parser = argparse.ArgumentParser(description='Create many TugasKu users at once')
+    parser.add_argument('path', help='CSV or JSON file with username, email and password')
+    args = parser.parse_args()
+    
+    # Setup logging
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    try:
+        if not test_connection():
+            logger.error("Cannot connect to database. Please check your configuration.")
+            return False
+        
+        users = load_users(args.path)
+        logger.info(f"Provisioning {len(users)} users from {args.path}...")
+        
+        result = provision_users(users)
+        
+        for item in result['results']:
+            if item['status'] != 'created':
+                logger.warning(f"Entry {item['index']}: {'; '.join(item['errors'])}")
+        
+        logger.info(f"Done: {result['created']} created, {result['failed']} failed")
+        return result['failed'] == 0
+        
+    except Exception as e:
+        logger.error(f"Bulk provisioning failed: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+bcrypt cost calibration script
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tugasku_backend.config import get_config
+from tugasku_backend.utils.passwords import calibrate_cost
+from tugasku_backend.utils.logging import setup_logging
+
+def main():
+    """Measure bcrypt on this machine and print the cost to deploy"""
+    config = get_config()
+    
+    parser = argparse.ArgumentParser(description='Pick a bcrypt cost for a target hashing latency')
+    parser.add_argument('--target-ms', type=float, default=config.BCRYPT_TARGET_MS,
+                        help='target hashing time in milliseconds')
+    args = parser.parse_args()
+    
+    # Setup logging
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    logger.info(f"Calibrating bcrypt for a target of {args.target_ms:.0f} ms...")
+    cost = calibrate_cost(args.target_ms)
+    logger.info(f"Selected cost {cost}; set BCRYPT_ROUNDS={cost} for this deployment")
+    logger.info("Existing hashes are upgraded to the new cost on the next successful login")
+    print(cost)
+    return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
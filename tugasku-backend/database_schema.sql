@@ -8,6 +8,7 @@ CREATE TABLE users (
     email VARCHAR(120) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     is_active BOOLEAN DEFAULT TRUE,
+    change_seq BIGINT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -29,32 +30,106 @@ CREATE TABLE tasks (
     status VARCHAR(50) DEFAULT 'pending',
     priority VARCHAR(20) DEFAULT 'medium',
     due_date TIMESTAMP,
-    user_id INTEGER NOT NULL REFERENCES users(id),
+    change_seq BIGINT NOT NULL DEFAULT 0,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     category_id INTEGER REFERENCES categories(id),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Task logs table
+-- Task logs table, partitioned by month; monthly partitions are created
+-- ahead of time by maintenance.py, the default partition catches the rest
 CREATE TABLE task_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
     old_status VARCHAR(50),
     new_status VARCHAR(50) NOT NULL,
     changed_by INTEGER NOT NULL REFERENCES users(id),
     notes TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE task_logs_default PARTITION OF task_logs DEFAULT;
+
+-- Summaries of task log entries removed by the retention policy
+CREATE TABLE task_log_rollups (
+    task_id INTEGER PRIMARY KEY REFERENCES tasks(id) ON DELETE CASCADE,
+    entries INTEGER NOT NULL DEFAULT 0,
+    completions INTEGER NOT NULL DEFAULT 0,
+    first_at TIMESTAMP,
+    last_at TIMESTAMP,
+    last_status VARCHAR(50)
+);
+
+-- Deleted tasks, for the changes feed
+CREATE TABLE task_tombstones (
+    task_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    change_seq BIGINT NOT NULL,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Completed tasks moved out of tasks by the archiver; the leading columns
+-- mirror tasks and the task history is folded into the counts
+CREATE TABLE tasks_archive (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    status VARCHAR(50),
+    priority VARCHAR(20),
+    due_date TIMESTAMP,
+    change_seq BIGINT NOT NULL DEFAULT 0,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    log_entries INTEGER NOT NULL DEFAULT 0,
+    completions INTEGER NOT NULL DEFAULT 0
+);
+
+-- Archived task counts per user, for the dashboard
+CREATE TABLE task_archive_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    archived_tasks INTEGER NOT NULL DEFAULT 0,
+    last_archived_at TIMESTAMP
+);
+
+-- Database-wide versions (the category list) that API caches and ETags
+-- are keyed on, bumped by every process that writes
+CREATE TABLE change_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
 );
 
 -- Indexes for better performance
-CREATE INDEX idx_tasks_user_id ON tasks(user_id);
-CREATE INDEX idx_tasks_category_id ON tasks(category_id);
-CREATE INDEX idx_tasks_status ON tasks(status);
-CREATE INDEX idx_tasks_priority ON tasks(priority);
-CREATE INDEX idx_tasks_due_date ON tasks(due_date);
-CREATE INDEX idx_task_logs_task_id ON task_logs(task_id);
+-- Task lists filter on the owner, then optionally status/priority/category,
+-- and sort by a column with id as the tie-breaker
+CREATE INDEX ix_tasks_user_id ON tasks(user_id, id);
+CREATE INDEX ix_tasks_user_created ON tasks(user_id, created_at, id);
+CREATE INDEX ix_tasks_user_updated ON tasks(user_id, updated_at, id);
+CREATE INDEX ix_tasks_user_due_date ON tasks(user_id, due_date, id);
+CREATE INDEX ix_tasks_user_title ON tasks(user_id, title, id);
+CREATE INDEX ix_tasks_user_status ON tasks(user_id, status, id);
+CREATE INDEX ix_tasks_user_priority ON tasks(user_id, priority, id);
+CREATE INDEX ix_tasks_user_status_created ON tasks(user_id, status, created_at, id);
+CREATE INDEX ix_tasks_user_priority_created ON tasks(user_id, priority, created_at, id);
+CREATE INDEX ix_tasks_user_category_created ON tasks(user_id, category_id, created_at, id);
+CREATE INDEX ix_tasks_category_id ON tasks(category_id);
+CREATE INDEX ix_tasks_status_updated ON tasks(status, updated_at, id);
 CREATE INDEX idx_task_logs_changed_by ON task_logs(changed_by);
+CREATE INDEX ix_tasks_user_change_seq ON tasks(user_id, change_seq, id);
+CREATE INDEX ix_task_tombstones_user_change_seq ON task_tombstones(user_id, change_seq, task_id);
+CREATE INDEX ix_task_logs_task_created ON task_logs(task_id, created_at, id);
+CREATE INDEX ix_tasks_archive_user_id ON tasks_archive(user_id, id);
+CREATE INDEX ix_tasks_archive_user_created ON tasks_archive(user_id, created_at, id);
+CREATE INDEX ix_tasks_archive_user_updated ON tasks_archive(user_id, updated_at, id);
+CREATE INDEX ix_tasks_archive_user_due_date ON tasks_archive(user_id, due_date, id);
+CREATE INDEX ix_tasks_archive_user_title ON tasks_archive(user_id, title, id);
+CREATE INDEX ix_tasks_archive_user_status ON tasks_archive(user_id, status, id);
+CREATE INDEX ix_tasks_archive_user_priority ON tasks_archive(user_id, priority, id);
 
 -- Sample data
 INSERT INTO categories (name, description) VALUES
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Task import script for TugasKu
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tugasku_backend.database.connection import DBSession, test_connection
+from tugasku_backend.models.user import User
+from tugasku_backend.utils.task_import import import_tasks, read_rows, IMPORT_FORMATS
+from tugasku_backend.utils.logging import setup_logging
+
+def main():
+    """Import the tasks listed in a file for one user
+
+    Safe while the API servers run: the import bumps the database-side
+    versions that their caches and ETags are keyed on.
+    """
+    parser = argparse.ArgumentParser(description='Import tasks into TugasKu from CSV or NDJSON')
+    parser.add_argument('path', help='CSV (with header) or NDJSON file of tasks')
+    parser.add_argument('username', help='User who will own the imported tasks')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension)')
+    parser.add_argument('--chunk-size', type=int, help='Rows validated and written per chunk')
+    args = parser.parse_args()
+    
+    # Setup logging
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    try:
+        if not test_connection():
+            logger.error("Cannot connect to database. Please check your configuration.")
+            return False
+        
+        user = DBSession.query(User).filter(User.username == args.username).first()
+        if not user:
+            logger.error(f"User {args.username} not found")
+            return False
+        
+        fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+        logger.info(f"Importing tasks for {user.username} from {args.path}...")
+        
+        with open(args.path, newline='', encoding='utf-8') as f:
+            result = import_tasks(read_rows(f, fmt), user, chunk_size=args.chunk_size)
+        
+        for item in result['errors']:
+            logger.warning(f"Row {item['row']}: {'; '.join(item['errors'])}")
+        
+        logger.info(
+            f"Done: {result['imported']} imported, {result['failed']} failed "
+            f"in {result['seconds']}s ({result['rows_per_second']} rows/sec)"
+        )
+        return result['failed'] == 0
+    
+    except Exception as e:
+        logger.error(f"Task import failed: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Database maintenance script for TugasKu
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tugasku_backend.database.connection import engine, test_connection
+from tugasku_backend.utils.log_partitions import ensure_partitions, apply_retention, partition_task_logs
+from tugasku_backend.utils.archive import archive_completed_tasks
+from tugasku_backend.utils.logging import setup_logging
+
+def main():
+    """Create upcoming task log partitions, apply the retention policy and archive old tasks
+
+    History is only pruned when --retention-months or TASK_LOG_RETENTION_MONTHS
+    asks for it, and tasks only archived with --archive-after-days. Archiving
+    bumps the database-side versions that caches and ETags are keyed on, so
+    running servers see the tasks leave.
+    """
+    parser = argparse.ArgumentParser(description='TugasKu database maintenance (run daily, e.g. from cron)')
+    parser.add_argument('--partition-task-logs', action='store_true',
+                        help='Once, on PostgreSQL: convert an empty task_logs to monthly partitions and exit')
+    parser.add_argument('--retention-months', type=int,
+                        help='Roll up and remove history older than this many whole months '
+                             '(default: TASK_LOG_RETENTION_MONTHS, itself 0: keep everything)')
+    parser.add_argument('--ahead', type=int,
+                        help='Monthly partitions to create ahead of time (default: TASK_LOG_PARTITIONS_AHEAD)')
+    parser.add_argument('--archive-after-days', type=int, default=0,
+                        help='Archive tasks completed this many days ago (default: 0, archive nothing). '
+                             'Running servers archive by themselves '
+                             'once TASK_ARCHIVE_AFTER_DAYS and TASK_ARCHIVE_INTERVAL_SECONDS are set.')
+    parser.add_argument('--archive-batch-size', type=int,
+                        help='Tasks archived per transaction (default: TASK_ARCHIVE_BATCH_SIZE)')
+    args = parser.parse_args()
+    
+    # Setup logging
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    try:
+        if not test_connection():
+            logger.error("Cannot connect to database. Please check your configuration.")
+            return False
+        
+        if args.partition_task_logs:
+            # One transaction: either task_logs is fully converted or untouched
+            with engine.begin() as conn:
+                converted = partition_task_logs(conn)
+            logger.info("task_logs partitioned by month" if converted else "task_logs is already partitioned")
+            return True
+        
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, ahead=args.ahead)
+        for name in created:
+            logger.info(f"Created partition {name}")
+        
+        with engine.begin() as conn:
+            removed = apply_retention(conn, months=args.retention_months)
+        
+        archived = archive_completed_tasks(engine, days=args.archive_after_days,
+                                           batch_size=args.archive_batch_size)
+        
+        logger.info(
+            f"Done: {len(created)} partitions created, {removed} log entries rolled up, "
+            f"{archived} tasks archived"
+        )
+        return True
+    
+    except Exception as e:
+        logger.error(f"Maintenance failed: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
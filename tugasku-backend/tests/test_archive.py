@@ -0,0 +1,216 @@
+import unittest
+from datetime import datetime, timedelta
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, event, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.database.connection import enable_sqlite_foreign_keys
+from tugasku_backend.models import (User, Task, Category, TaskLog, TaskLogRollup, TaskArchive, TaskArchiveStats,
+                                    TaskTombstone)
+from tugasku_backend.views.tasks import get_tasks, get_task, unarchive_tasks
+from tugasku_backend.views.dashboard import get_dashboard
+from tugasku_backend.utils.archive import archive_completed_tasks
+from tugasku_backend.utils.change_tracking import get_user_version
+from tugasku_backend.utils.changes_feed import task_changes
+import tempfile
+import os
+
+NOW = datetime(2024, 6, 1)
+
+class ArchiveTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        enable_sqlite_foreign_keys(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        category = Category(name='Work')
+        DBSession.add_all([user, other, category])
+        DBSession.flush()
+        
+        old = NOW - timedelta(days=200)
+        recent = NOW - timedelta(days=5)
+        rows = []
+        for i in range(10):
+            # Five old completed tasks, then recent completed, old pending, recent pending...
+            status = 'completed' if i % 2 == 0 or i < 5 else 'pending'
+            stamp = old if i < 5 or i % 3 == 0 else recent
+            rows.append({'title': f'Task {i}', 'user_id': user.id, 'status': status,
+                         'category_id': category.id if i % 2 else None,
+                         'created_at': stamp + timedelta(minutes=i), 'updated_at': stamp})
+        rows.append({'title': 'Not mine', 'user_id': other.id, 'status': 'completed',
+                     'created_at': old, 'updated_at': old})
+        self.task_ids = DBSession.execute(insert(Task).returning(Task.id), rows).scalars().all()
+        
+        DBSession.execute(insert(TaskLog), [
+            {'task_id': self.task_ids[0], 'old_status': 'pending', 'new_status': 'completed',
+             'changed_by': user.id, 'created_at': old},
+            {'task_id': self.task_ids[0], 'new_status': 'pending', 'changed_by': user.id, 'created_at': old}
+        ])
+        DBSession.add(TaskLogRollup(task_id=self.task_ids[0], entries=3, completions=1))
+        DBSession.commit()
+        self.user_id = user.id
+        self.category_id = category.id
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _archive(self, **kwargs):
+        kwargs.setdefault('days', 90)
+        return archive_completed_tasks(self.engine, now=NOW, **kwargs)
+    
+    def _request(self, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        return request
+    
+    def test_archives_old_completed_tasks(self):
+        """Test only completed tasks past the age move, in batches, with their history counted"""
+        version = get_user_version(self.user_id)
+        # Old completed: tasks 0-4, 6 and the other user's
+        self.assertEqual(self._archive(batch_size=2), 7)
+        
+        remaining = {task.title for task in DBSession.query(Task)}
+        self.assertEqual(remaining, {'Task 5', 'Task 7', 'Task 8', 'Task 9'})
+        archived = DBSession.query(TaskArchive).get(self.task_ids[0])
+        self.assertEqual((archived.title, archived.log_entries, archived.completions), ('Task 0', 5, 2))
+        self.assertEqual(DBSession.query(TaskLog).count(), 0)
+        self.assertEqual(DBSession.query(TaskArchiveStats).get(self.user_id).archived_tasks, 6)
+        self.assertGreater(get_user_version(self.user_id), version)
+        
+        # Nothing left to do on a second run
+        self.assertEqual(self._archive(), 0)
+        self.assertEqual(DBSession.query(TaskArchiveStats).get(self.user_id).archived_tasks, 6)
+    
+    def test_archived_tasks_leave_tombstones(self):
+        """Test synced clients see archived tasks go, and come back when restored"""
+        self._archive()
+        version = get_user_version(self.user_id)
+        archived = sorted(self.task_ids[i] for i in (0, 1, 2, 3, 4, 6))
+        
+        changes = task_changes(self.user_id, None, 100)
+        self.assertEqual(sorted(tomb.task_id for tomb in changes['deleted']), archived)
+        self.assertEqual({tomb.change_seq for tomb in changes['deleted']}, {version})
+        
+        request = self._request()
+        request.json_body = {'ids': [self.task_ids[0]]}
+        request.body = b'{}'
+        unarchive_tasks(request)
+        self.assertIsNone(DBSession.query(TaskTombstone).get(self.task_ids[0]))
+        changes = task_changes(self.user_id, None, 100)
+        self.assertIn(self.task_ids[0], [task.id for task in changes['tasks']])
+    
+    def test_cutoff_from_database_clock(self):
+        """Test the age is measured against the clock that stamps updated_at"""
+        DBSession.add(Task(title='Just done', user_id=self.user_id, status='completed'))
+        DBSession.commit()
+        
+        # Every other completed task dates from 2024
+        self.assertEqual(archive_completed_tasks(self.engine, days=1), 8)
+        self.assertEqual([task.title for task in DBSession.query(Task).filter(Task.status == 'completed')],
+                         ['Just done'])
+    
+    def test_candidates_found_by_index(self):
+        """Test each batch seeks ix_tasks_status_updated instead of scanning tasks"""
+        statements = []
+        
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('SELECT tasks.id') and 'LIMIT' in statement:
+                statements.append((statement, parameters))
+        
+        event.listen(self.engine, 'before_cursor_execute', _record)
+        try:
+            self._archive()
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', _record)
+        
+        with self.engine.connect() as conn:
+            plan = ' '.join(row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statements[0][0],
+                                                                       statements[0][1]))
+        self.assertIn('ix_tasks_status_updated', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_zero_days_archives_nothing(self):
+        """Test archiving is off unless configured, and can be switched off"""
+        self.assertEqual(archive_completed_tasks(self.engine, now=NOW), 0)
+        self.assertEqual(self._archive(days=0), 0)
+        self.assertEqual(DBSession.query(TaskArchive).count(), 0)
+    
+    def test_include_archived(self):
+        """Test the task list reads the archive only when asked, with filters and cursors"""
+        self._archive()
+        
+        self.assertEqual(get_tasks(self._request())['pagination']['total'], 4)
+        result = get_tasks(self._request(include_archived='true', sort_by='created_at'))
+        self.assertEqual(result['pagination']['total'], 10)
+        self.assertEqual([task['title'] for task in result['tasks']][:2], ['Task 8', 'Task 7'])
+        self.assertNotIn('Not mine', [task['title'] for task in result['tasks']])
+        
+        result = get_tasks(self._request(include_archived='1', category_id=str(self.category_id),
+                                         expand='category', fields='title'))
+        self.assertEqual(sorted(task['title'] for task in result['tasks']),
+                         ['Task 1', 'Task 3', 'Task 5', 'Task 7', 'Task 9'])
+        self.assertEqual(result['tasks'][0]['category']['name'], 'Work')
+        
+        titles = []
+        cursor = ''
+        while cursor is not None:
+            page = get_tasks(self._request(include_archived='true', cursor=cursor, page_size='3', sort_order='asc'))
+            titles.extend(task['title'] for task in page['tasks'])
+            cursor = page['pagination']['next_cursor']
+        self.assertEqual(titles, [f'Task {i}' for i in range(5)] + ['Task 6', 'Task 9', 'Task 5', 'Task 7', 'Task 8'])
+    
+    def test_dashboard_counts_archive(self):
+        """Test dashboard totals include archived tasks"""
+        self._archive()
+        dashboard = get_dashboard(self._request())
+        statistics = dashboard['statistics']
+        
+        self.assertEqual(statistics['archived_tasks'], 6)
+        self.assertEqual(statistics['total_tasks'], 10)
+        self.assertEqual(statistics['completed_tasks'], 7)
+        self.assertEqual(statistics['pending_tasks'], 3)
+        # The breakdown covers live tasks only
+        self.assertEqual([(entry['category']['name'], entry['task_count']) for entry in dashboard['category_stats']],
+                         [('Work', 3)])
+    
+    def test_unarchive(self):
+        """Test archived tasks can be restored, by their owner only"""
+        self._archive()
+        version = get_user_version(self.user_id)
+        
+        request = self._request()
+        request.json_body = {'ids': [self.task_ids[0], self.task_ids[1], self.task_ids[-1]]}
+        request.body = b'{}'
+        result = unarchive_tasks(request)
+        
+        self.assertEqual(result, {'restored': 2, 'ids': [self.task_ids[0], self.task_ids[1]]})
+        self.assertGreater(get_user_version(self.user_id), version)
+        self.assertEqual(get_tasks(self._request())['pagination']['total'], 6)
+        self.assertEqual(DBSession.query(TaskArchiveStats).get(self.user_id).archived_tasks, 4)
+        self.assertEqual(DBSession.query(TaskArchive).get(self.task_ids[-1]).title, 'Not mine')
+        
+        # The restored task is readable again and keeps its history counts
+        request = self._request()
+        request.matchdict = {'id': str(self.task_ids[0])}
+        self.assertEqual(get_task(request)['task']['title'], 'Task 0')
+        rollup = DBSession.query(TaskLogRollup).get(self.task_ids[0])
+        self.assertEqual((rollup.entries, rollup.completions), (5, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPUnauthorized, HTTPForbidden
+from sqlalchemy import create_engine, event
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User
+from tugasku_backend.middleware.auth import get_current_user, require_admin, _token_cache
+from tugasku_backend.config import get_config
+from tugasku_backend import metrics_view
+import tempfile
+import os
+
+class AuthCacheTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        _token_cache.clear()
+        
+        # Create test user
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.commit()
+        self.token = self.user.generate_token()
+        
+        # Count statements sent to the database
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _request(self):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        return request
+    
+    def test_cached_token_skips_database(self):
+        """Test that a verified token is served from the cache"""
+        first = get_current_user(self._request())
+        queries = len(self.statements)
+        second = get_current_user(self._request())
+        
+        self.assertEqual(first.id, self.user.id)
+        self.assertEqual(second.username, 'testuser')
+        self.assertEqual(len(self.statements), queries)
+    
+    def test_full_user_loaded_lazily(self):
+        """Test that the ORM user is only loaded for non-snapshot attributes"""
+        get_current_user(self._request())
+        current = get_current_user(self._request())
+        queries = len(self.statements)
+        
+        self.assertEqual(current.id, self.user.id)
+        self.assertEqual(len(self.statements), queries)
+        self.assertEqual(current.email, 'test@example.com')
+        self.assertEqual(len(self.statements), queries + 1)
+    
+    def test_deactivation_revokes_cached_token(self):
+        """Test that deactivating a user invalidates its cached tokens"""
+        get_current_user(self._request())
+        
+        self.user.is_active = False
+        DBSession.commit()
+        
+        with self.assertRaises(HTTPUnauthorized):
+            get_current_user(self._request())
+    
+    def test_admin_requires_configured_username(self):
+        """Test that a user registered as "admin" gets no admin rights by default"""
+        admin = User(username='admin', email='admin@example.com', password_hash='x')
+        DBSession.add(admin)
+        DBSession.commit()
+        self.token = admin.generate_token()
+        view = require_admin(lambda request: 'ok')
+        
+        self.assertEqual(get_config().ADMIN_USERNAMES, [])
+        with self.assertRaises(HTTPForbidden):
+            view(self._request())
+        with self.assertRaises(HTTPForbidden):
+            metrics_view(self._request())
+
+if __name__ == '__main__':
+    unittest.main()
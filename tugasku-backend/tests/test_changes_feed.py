@@ -0,0 +1,107 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task
+from tugasku_backend.views.tasks import (
+    get_task_changes, create_task, update_task, delete_task, batch_tasks, transition_filtered_tasks
+)
+import tempfile
+import os
+
+class ChangesFeedTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        DBSession.add_all([user, other])
+        DBSession.flush()
+        DBSession.add(Task(title='Not mine', user_id=other.id))
+        DBSession.commit()
+        self.token = user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _request(self, json_body=None, matchdict=None, **params):
+        request = DummyRequest(json_body=json_body)
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        request.matchdict = matchdict or {}
+        return request
+    
+    def _create(self, title):
+        return create_task(self._request({'title': title}))['task']['id']
+    
+    def _sync(self, since=None, page_size=100):
+        """Follow the feed to its end; return (task titles, deleted ids, token)"""
+        titles, deleted = [], []
+        while True:
+            params = {'page_size': str(page_size)}
+            if since:
+                params['since'] = since
+            page = get_task_changes(self._request(**params))
+            titles += [task['title'] for task in page['tasks']]
+            deleted += [tombstone['id'] for tombstone in page['deleted']]
+            since = page['next_since']
+            if not page['has_more']:
+                return titles, deleted, since
+    
+    def test_full_sync_then_deltas(self):
+        """Test that a since token only returns later changes"""
+        first = self._create('First')
+        second = self._create('Second')
+        titles, deleted, since = self._sync(page_size=1)
+        self.assertEqual((titles, deleted), (['First', 'Second'], []))
+        
+        self.assertEqual(self._sync(since)[:2], ([], []))
+        
+        update_task(self._request({'title': 'First again'}, {'id': first}))
+        delete_task(self._request(matchdict={'id': second}))
+        self._create('Third')
+        
+        titles, deleted, since = self._sync(since)
+        self.assertEqual((titles, deleted), (['First again', 'Third'], [second]))
+        
+        # Nothing moves the token when nothing changed
+        self.assertEqual(self._sync(since)[2], since)
+    
+    def test_bulk_writes_are_in_the_feed(self):
+        """Test that batch and transition writes advance the sequence"""
+        self._create('Keep')
+        drop = self._create('Drop')
+        since = self._sync()[2]
+        
+        batch_tasks(self._request({'operations': [
+            {'op': 'create', 'data': {'title': 'Batched'}},
+            {'op': 'delete', 'id': drop}
+        ]}))
+        titles, deleted, since = self._sync(since)
+        self.assertEqual((titles, deleted), (['Batched'], [drop]))
+        
+        transition_filtered_tasks(self._request({'status': 'completed'}, search='keep'))
+        titles, deleted, since = self._sync(since)
+        self.assertEqual((titles, deleted), (['Keep'], []))
+    
+    def test_invalid_token(self):
+        """Test that a malformed since token is rejected"""
+        from pyramid.httpexceptions import HTTPBadRequest
+        with self.assertRaises(HTTPBadRequest):
+            get_task_changes(self._request(since='not-a-token'))
+
+if __name__ == '__main__':
+    unittest.main()
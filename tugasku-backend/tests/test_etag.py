@@ -0,0 +1,117 @@
+import unittest
+from pyramid.config import Configurator
+from sqlalchemy import create_engine, insert, update
+from webtest import TestApp
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category
+from tugasku_backend.utils.change_tracking import bump_category_version
+from tugasku_backend.middleware import setup_cors, setup_error_handlers, setup_etags
+import tempfile
+import os
+
+class ETagTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        config = Configurator()
+        setup_cors(config)
+        setup_error_handlers(config)
+        setup_etags(config)
+        config.include('tugasku_backend.views')
+        self.app = TestApp(config.make_wsgi_app())
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(user)
+        DBSession.flush()
+        self.user_id = user.id
+        task = Task(title='First', user_id=user.id)
+        DBSession.add(task)
+        DBSession.commit()
+        self.task_id = task.id
+        self.headers = {'Authorization': f'Bearer {user.generate_token()}'}
+    
+    def tearDown(self):
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _get(self, path, etag=None, status=200):
+        headers = dict(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.app.get(path, headers=headers, status=status)
+    
+    def test_not_modified_until_tasks_change(self):
+        """Test that the ETag holds until the user's tasks change"""
+        response = self._get('/api/tasks')
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        
+        not_modified = self._get('/api/tasks', etag, status=304)
+        self.assertEqual(not_modified.headers['ETag'], etag)
+        self.assertIn('Access-Control-Allow-Origin', not_modified.headers)
+        
+        # Different parameters are a different representation
+        self._get('/api/tasks?page=2', etag, status=200)
+        
+        self.app.post_json('/api/tasks', {'title': 'Second'}, headers=self.headers)
+        self.assertNotEqual(self._get('/api/tasks', etag).headers['ETag'], etag)
+    
+    def test_category_writes_invalidate(self):
+        """Test that category writes change category and dashboard ETags"""
+        categories = self._get('/api/categories').headers['ETag']
+        dashboard = self._get('/api/dashboard').headers['ETag']
+        self._get('/api/dashboard', dashboard, status=304)
+        
+        self.app.post_json('/api/categories', {'name': 'Work'}, headers=self.headers)
+        self._get('/api/categories', categories, status=200)
+        self._get('/api/dashboard', dashboard, status=200)
+    
+    def test_writes_from_other_processes_invalidate(self):
+        """Test that ETags follow writes made through another engine, as another process would"""
+        tasks = self._get('/api/tasks').headers['ETag']
+        categories = self._get('/api/categories').headers['ETag']
+        
+        # Plain statements on another engine, as import_tasks.py writes
+        other = create_engine(f'sqlite:///{self.db_path}')
+        with other.begin() as conn:
+            seq = conn.execute(
+                update(User).where(User.id == self.user_id).values(change_seq=User.change_seq + 1)
+                .returning(User.change_seq)
+            ).scalar_one()
+            conn.execute(insert(Task).values(title='Imported', user_id=self.user_id, change_seq=seq))
+            conn.execute(insert(Category).values(name='Imported'))
+            bump_category_version(conn)
+        other.dispose()
+        
+        response = self._get('/api/tasks', tasks, status=200)
+        self.assertIn('Imported', [task['title'] for task in response.json['tasks']])
+        self._get('/api/categories', categories, status=200)
+    
+    def test_task_etag_is_its_version(self):
+        """Test that a task's ETag is the strong version If-Match expects"""
+        path = f'/api/tasks/{self.task_id}'
+        etag = self._get(path).headers['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        
+        updated = self.app.put_json(path, {'title': 'Renamed'}, headers=dict(self.headers, **{'If-Match': etag}))
+        self.assertNotEqual(updated.headers['ETag'], etag)
+        self.assertEqual(self._get(path).headers['ETag'], updated.headers['ETag'])
+        
+        # A stale version or a weak tag never matches
+        for stale in (etag, f'W/{updated.headers["ETag"]}'):
+            self.app.put_json(path, {'title': 'Again'}, headers=dict(self.headers, **{'If-Match': stale}), status=412)
+    
+    def test_unauthenticated_requests_reach_the_view(self):
+        """Test that conditional handling does not mask auth errors"""
+        self.app.get('/api/tasks', headers={'If-None-Match': '*'}, status=401)
+
+if __name__ == '__main__':
+    unittest.main()
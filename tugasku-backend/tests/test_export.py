@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import create_engine, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category, TaskLog
+from tugasku_backend.views.tasks import export_user_tasks
+from tugasku_backend.utils import export
+import tempfile
+import os
+
+class ExportTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        category = Category(name='Work')
+        DBSession.add_all([user, other, category])
+        DBSession.flush()
+        
+        tasks = DBSession.execute(insert(Task).returning(Task.id), [
+            {'title': f'Task {i}', 'user_id': user.id, 'status': 'completed' if i % 2 else 'pending',
+             'category_id': category.id if i % 3 == 0 else None}
+            for i in range(30)
+        ]).scalars().all()
+        DBSession.execute(insert(TaskLog), [
+            {'task_id': task_id, 'new_status': 'pending', 'changed_by': user.id, 'notes': f'log {n}'}
+            for task_id in tasks[:10] for n in range(2)
+        ])
+        DBSession.add(Task(title='Not mine', user_id=other.id))
+        DBSession.commit()
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _export(self, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        response = export_user_tasks(request)
+        return response, b''.join(response.app_iter).decode('utf-8')
+    
+    def test_ndjson_export(self):
+        """Test every task is exported, one JSON object per line"""
+        response, body = self._export()
+        records = [json.loads(line) for line in body.splitlines()]
+        
+        self.assertEqual(response.content_type, 'application/x-ndjson')
+        self.assertEqual(len(records), 30)
+        self.assertEqual([r['id'] for r in records], sorted(r['id'] for r in records))
+        self.assertNotIn('Not mine', [r['title'] for r in records])
+        self.assertEqual(records[0]['category'], 'Work')
+        self.assertNotIn('logs', records[0])
+    
+    def test_ndjson_export_with_logs(self):
+        """Test logs are attached to their own task"""
+        _, body = self._export(include_logs='true')
+        records = [json.loads(line) for line in body.splitlines()]
+        
+        self.assertEqual([len(r['logs']) for r in records], [2] * 10 + [0] * 20)
+        self.assertEqual(records[0]['logs'][0]['changed_by'], 'testuser')
+    
+    def test_filters_apply(self):
+        """Test the task list filters narrow the export"""
+        _, body = self._export(status='completed', include_logs='1')
+        records = [json.loads(line) for line in body.splitlines()]
+        
+        self.assertEqual(len(records), 15)
+        self.assertTrue(all(r['status'] == 'completed' for r in records))
+        self.assertEqual(sum(len(r['logs']) for r in records), 10)
+    
+    def test_csv_export(self):
+        """Test CSV has a header and one row per task, or per log with logs"""
+        response, body = self._export(format='csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(response.content_type, 'text/csv')
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['title'], 'Task 0')
+        
+        _, body = self._export(format='csv', include_logs='true')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 10 * 2 + 20)
+        self.assertEqual(rows[0]['notes'], 'log 0')
+    
+    def test_streams_in_chunks(self):
+        """Test rows are streamed without loading ORM objects"""
+        original = export._CHUNK_SIZE
+        export._CHUNK_SIZE = 100
+        try:
+            request = DummyRequest()
+            request.headers = {'Authorization': f'Bearer {self.token}'}
+            request.params = {}
+            chunks = list(export_user_tasks(request).app_iter)
+        finally:
+            export._CHUNK_SIZE = original
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(DBSession.identity_map), 0)
+    
+    def test_invalid_format(self):
+        """Test unknown formats are rejected"""
+        with self.assertRaises(HTTPBadRequest):
+            self._export(format='xml')
+
+if __name__ == '__main__':
+    unittest.main()
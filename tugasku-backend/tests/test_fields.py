@@ -0,0 +1,116 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import create_engine, event
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category
+from tugasku_backend.views.tasks import get_tasks, get_task, get_task_changes
+import tempfile
+import os
+
+class SparseFieldsTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        category = Category(name='Work')
+        DBSession.add_all([user, category])
+        DBSession.flush()
+        for i in range(3):
+            DBSession.add(Task(title=f'Task {i}', description='Long text', user_id=user.id, category_id=category.id))
+        DBSession.commit()
+        self.task_id = DBSession.query(Task.id).first().id
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _call(self, view, matchdict=None, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        request.matchdict = matchdict or {}
+        # Warm the token cache so only the view's own queries are recorded
+        view(request)
+        DBSession.expunge_all()
+        del self.statements[:]
+        return view(request)
+    
+    def test_full_task_by_default(self):
+        """Test tasks keep every field when no projection is asked for"""
+        task = self._call(get_tasks)['tasks'][0]
+        self.assertEqual(set(task), set(Task.DICT_FIELDS))
+        self.assertEqual(task['category']['task_count'], 3)
+    
+    def test_fields_narrow_payload_and_select(self):
+        """Test only the requested columns are selected and returned"""
+        result = self._call(get_tasks, fields='title,status,due_date', count='none')
+        
+        self.assertEqual(set(result['tasks'][0]), {'id', 'title', 'status', 'due_date'})
+        self.assertEqual(len(self.statements), 1)
+        sql = self.statements[0]
+        self.assertNotIn('description', sql)
+        self.assertNotIn('users', sql)
+        self.assertNotIn('categories', sql)
+    
+    def test_expand_category(self):
+        """Test expanded relationships are joined into the same query"""
+        result = self._call(get_tasks, fields='title', expand='category', count='none')
+        
+        task = result['tasks'][0]
+        self.assertEqual(set(task), {'id', 'title', 'category'})
+        self.assertEqual(task['category']['name'], 'Work')
+        self.assertEqual(len(self.statements), 1)
+        self.assertNotIn('users', self.statements[0])
+    
+    def test_expand_without_fields(self):
+        """Test expand alone keeps every column but only the listed relationships"""
+        task = self._call(get_tasks, expand='user', count='none')['tasks'][0]
+        self.assertIn('description', task)
+        self.assertEqual(task['user']['username'], 'testuser')
+        self.assertNotIn('category', task)
+    
+    def test_cursor_pages_with_fields(self):
+        """Test cursors still work when the sort column is not requested"""
+        page = self._call(get_tasks, fields='title', cursor='', page_size='2', sort_by='due_date')
+        self.assertIsNotNone(page['pagination']['next_cursor'])
+        self.assertEqual(set(page['tasks'][0]), {'id', 'title'})
+    
+    def test_detail_and_changes_fields(self):
+        """Test the detail and changes endpoints honour fields too"""
+        task = self._call(get_task, matchdict={'id': str(self.task_id)}, fields='status')['task']
+        self.assertEqual(set(task), {'id', 'status', 'logs', 'logs_next_cursor'})
+        
+        changes = self._call(get_task_changes, fields='title')
+        self.assertEqual(set(changes['tasks'][0]), {'id', 'title'})
+    
+    def test_unknown_fields_rejected(self):
+        """Test unknown fields and expansions are rejected"""
+        with self.assertRaises(HTTPBadRequest):
+            self._call(get_tasks, fields='title,password')
+        with self.assertRaises(HTTPBadRequest):
+            self._call(get_tasks, expand='logs')
+
+if __name__ == '__main__':
+    unittest.main()
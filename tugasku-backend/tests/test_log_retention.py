@@ -0,0 +1,225 @@
+import unittest
+from datetime import datetime
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, TaskLog, TaskLogRollup
+from tugasku_backend.views.tasks import get_task_logs
+from tugasku_backend.utils.log_partitions import (apply_retention, add_months, month_start, partition_name, _roll_up,
+                                                  is_partitioned, month_partitions, partition_task_logs, create_partition)
+import tempfile
+import os
+
+class LogRetentionTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(user)
+        DBSession.flush()
+        task = Task(title='Long lived', user_id=user.id)
+        DBSession.add(task)
+        DBSession.commit()
+        self.user_id = user.id
+        self.task_id = task.id
+        self.token = user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _log(self, when, status):
+        DBSession.execute(insert(TaskLog).values(
+            task_id=self.task_id, new_status=status, changed_by=self.user_id, created_at=when
+        ))
+    
+    def test_month_arithmetic(self):
+        """Test month helpers across year boundaries"""
+        self.assertEqual(month_start(datetime(2024, 3, 17, 10, 5)), datetime(2024, 3, 1))
+        self.assertEqual(add_months(datetime(2024, 11, 9), 3), datetime(2025, 2, 1))
+        self.assertEqual(add_months(datetime(2024, 1, 31), -1), datetime(2023, 12, 1))
+        self.assertEqual(partition_name(datetime(2024, 2, 1)), 'task_logs_y2024m02')
+    
+    def test_retention_rolls_up_old_entries(self):
+        """Test entries before the window are summarized and removed"""
+        self._log(datetime(2024, 1, 5), 'pending')
+        self._log(datetime(2024, 1, 20), 'completed')
+        self._log(datetime(2024, 2, 3), 'in_progress')
+        self._log(datetime(2024, 5, 1), 'completed')
+        DBSession.commit()
+        
+        with self.engine.begin() as conn:
+            removed = apply_retention(conn, months=2, now=datetime(2024, 5, 15))
+        
+        self.assertEqual(removed, 3)
+        self.assertEqual(DBSession.query(TaskLog).count(), 1)
+        rollup = DBSession.query(TaskLogRollup).get(self.task_id)
+        self.assertEqual(rollup.entries, 3)
+        self.assertEqual(rollup.completions, 1)
+        self.assertEqual(rollup.first_at, datetime(2024, 1, 5))
+        self.assertEqual(rollup.last_at, datetime(2024, 2, 3))
+        self.assertEqual(rollup.last_status, 'in_progress')
+    
+    def test_repeated_retention_accumulates(self):
+        """Test later runs add to the existing summary"""
+        self._log(datetime(2024, 1, 5), 'completed')
+        self._log(datetime(2024, 3, 5), 'pending')
+        DBSession.commit()
+        
+        with self.engine.begin() as conn:
+            apply_retention(conn, months=1, now=datetime(2024, 3, 10))
+            apply_retention(conn, months=1, now=datetime(2024, 5, 10))
+            self.assertEqual(apply_retention(conn, months=1, now=datetime(2024, 5, 10)), 0)
+        
+        rollup = DBSession.query(TaskLogRollup).get(self.task_id)
+        self.assertEqual((rollup.entries, rollup.completions), (2, 1))
+        self.assertEqual(rollup.last_status, 'pending')
+        self.assertEqual(DBSession.query(TaskLog).count(), 0)
+    
+    def test_zero_months_keeps_everything(self):
+        """Test a retention of 0 months removes nothing"""
+        self._log(datetime(2000, 1, 1), 'pending')
+        DBSession.commit()
+        with self.engine.begin() as conn:
+            self.assertEqual(apply_retention(conn, months=0), 0)
+        self.assertEqual(DBSession.query(TaskLog).count(), 1)
+    
+    def test_retention_is_off_by_default(self):
+        """Test nothing is pruned unless a retention is configured or passed"""
+        self._log(datetime(2000, 1, 1), 'pending')
+        DBSession.commit()
+        with self.engine.begin() as conn:
+            self.assertEqual(apply_retention(conn), 0)
+        self.assertEqual(DBSession.query(TaskLog).count(), 1)
+    
+    def test_logs_endpoint_reports_summary(self):
+        """Test the history endpoint includes the rolled-up summary"""
+        self._log(datetime(2020, 1, 1), 'completed')
+        DBSession.commit()
+        with self.engine.begin() as conn:
+            apply_retention(conn, months=1)
+        
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = {}
+        request.matchdict = {'id': str(self.task_id)}
+        result = get_task_logs(request)
+        
+        self.assertEqual(result['logs'], [])
+        self.assertEqual(result['rolled_up']['entries'], 1)
+    
+    def test_postgresql_rollup_compiles(self):
+        """Test the rollup upsert renders for PostgreSQL"""
+        statements = []
+        
+        class Recorder:
+            dialect = postgresql.dialect()
+            
+            def execute(self, statement):
+                statements.append(str(statement.compile(dialect=self.dialect)))
+                
+                class Result:
+                    def scalar(self):
+                        return 1
+                return Result()
+        
+        _roll_up(Recorder(), TaskLog.__table__, datetime(2024, 1, 1))
+        self.assertIn('ON CONFLICT (task_id) DO UPDATE', statements[-1])
+        self.assertIn('greatest', statements[-1])
+
+@unittest.skipUnless(os.getenv('TEST_POSTGRES_URL'), 'TEST_POSTGRES_URL is not set')
+class LogPartitionPostgresTestCase(unittest.TestCase):
+    """Runs the partitioning DDL against a scratch PostgreSQL database"""
+    
+    def setUp(self):
+        self.engine = create_engine(os.getenv('TEST_POSTGRES_URL'))
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            self.user_id = conn.execute(insert(User.__table__).values(
+                username='testuser', email='test@example.com', password_hash='x'
+            ).returning(User.__table__.c.id)).scalar()
+            self.task_id = conn.execute(insert(Task.__table__).values(
+                title='Long lived', user_id=self.user_id, status='pending', priority='medium'
+            ).returning(Task.__table__.c.id)).scalar()
+    
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+    
+    def _log(self, conn, when):
+        return conn.execute(insert(TaskLog.__table__).values(
+            task_id=self.task_id, new_status='pending', changed_by=self.user_id, created_at=when
+        ).returning(TaskLog.__table__.c.id)).scalar()
+    
+    def test_refuses_table_with_rows(self):
+        """Test a task_logs holding history is left untouched"""
+        with self.engine.begin() as conn:
+            self._log(conn, datetime.now())
+        
+        with self.assertRaises(RuntimeError):
+            with self.engine.begin() as conn:
+                partition_task_logs(conn)
+        
+        with self.engine.connect() as conn:
+            self.assertFalse(is_partitioned(conn))
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs").scalar(), 1)
+    
+    def test_converts_empty_table(self):
+        """Test an empty task_logs becomes partitioned and keeps working"""
+        with self.engine.begin() as conn:
+            self._log(conn, datetime.now())
+            conn.exec_driver_sql("DELETE FROM task_logs")
+        
+        with self.engine.begin() as conn:
+            self.assertTrue(partition_task_logs(conn))
+        with self.engine.begin() as conn:
+            self.assertFalse(partition_task_logs(conn))
+            self.assertTrue(is_partitioned(conn))
+            self.assertIn(month_start(datetime.now()), month_partitions(conn))
+            
+            # The id sequence carries on, and old rows land in the default partition
+            self.assertGreater(self._log(conn, datetime.now()), 1)
+            self._log(conn, datetime(2001, 1, 1))
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs_default").scalar(), 1)
+        
+        # Deleting the task removes its history through the cascade
+        with self.engine.begin() as conn:
+            conn.execute(Task.__table__.delete())
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs").scalar(), 0)
+    
+    def test_retention_drops_expired_partitions(self):
+        """Test expired months are rolled up and their partitions dropped"""
+        with self.engine.begin() as conn:
+            partition_task_logs(conn)
+            self._log(conn, datetime(2001, 1, 5))
+            self._log(conn, datetime.now())
+            # The default partition's January rows move into the new table
+            self.assertTrue(create_partition(conn, datetime(2001, 1, 1)))
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs_y2001m01").scalar(), 1)
+        
+        with self.engine.begin() as conn:
+            self.assertEqual(apply_retention(conn, months=1), 1)
+        
+        with self.engine.connect() as conn:
+            self.assertNotIn(datetime(2001, 1, 1), month_partitions(conn))
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs").scalar(), 1)
+            self.assertEqual(conn.execute(
+                TaskLogRollup.__table__.select().with_only_columns(TaskLogRollup.__table__.c.entries)
+            ).scalar(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from datetime import datetime, timedelta
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task
+from tugasku_backend.views.tasks import get_tasks, TASK_SORT_FIELDS
+import tempfile
+import os
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        
+        # Create test user
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.flush()
+        
+        # Tasks with duplicate sort values and missing due dates
+        base = datetime(2024, 1, 1)
+        statuses = ['pending', 'in_progress', 'completed']
+        for i in range(23):
+            DBSession.add(Task(
+                title=f'Task {i % 7}',
+                status=statuses[i % 3],
+                priority=['low', 'medium', 'high'][i % 3],
+                due_date=None if i % 4 == 0 else base + timedelta(days=i % 5),
+                created_at=base + timedelta(hours=i // 2),
+                updated_at=base + timedelta(hours=i // 3),
+                user_id=self.user.id
+            ))
+        DBSession.commit()
+        self.token = self.user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _get(self, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        return get_tasks(request)
+    
+    def _walk(self, sort_by, sort_order):
+        """Follow next_cursor to the end, then prev_cursor back to the start"""
+        pages = []
+        response = self._get(cursor='', sort_by=sort_by, sort_order=sort_order, page_size='5')
+        pages.append([task['id'] for task in response['tasks']])
+        while response['pagination']['next_cursor']:
+            response = self._get(cursor=response['pagination']['next_cursor'],
+                                 sort_by=sort_by, sort_order=sort_order, page_size='5')
+            pages.append([task['id'] for task in response['tasks']])
+        
+        back = [[task['id'] for task in response['tasks']]]
+        while response['pagination']['prev_cursor']:
+            response = self._get(cursor=response['pagination']['prev_cursor'],
+                                 sort_by=sort_by, sort_order=sort_order, page_size='5')
+            back.insert(0, [task['id'] for task in response['tasks']])
+        return pages, back
+    
+    def test_cursor_pages_match_offset_order(self):
+        """Test cursor pagination for every sort column and direction"""
+        for sort_by in TASK_SORT_FIELDS:
+            for sort_order in ('asc', 'desc'):
+                expected = [
+                    task['id'] for task in
+                    self._get(sort_by=sort_by, sort_order=sort_order, page_size='100')['tasks']
+                ]
+                pages, back = self._walk(sort_by, sort_order)
+                
+                self.assertEqual(sum(pages, []), expected, f'{sort_by} {sort_order}')
+                self.assertEqual(back, pages, f'{sort_by} {sort_order} (backwards)')
+    
+    def test_offset_pagination_still_supported(self):
+        """Test that page-based requests keep their response shape"""
+        response = self._get(page='2', page_size='10')
+        
+        self.assertEqual(len(response['tasks']), 10)
+        self.assertEqual(response['pagination']['total'], 23)
+        self.assertEqual(response['pagination']['pages'], 3)
+    
+    def test_cached_count_invalidated_by_task_writes(self):
+        """Test that cached totals are reused until the user's tasks change"""
+        first = self._get(count='cached', status='pending')['pagination']
+        second = self._get(count='cached', status='pending')['pagination']
+        
+        self.assertEqual(first['count_strategy'], 'exact')
+        self.assertEqual(second['count_strategy'], 'cached')
+        self.assertEqual(second['total'], first['total'])
+        
+        DBSession.add(Task(title='New task', status='pending', user_id=self.user.id))
+        DBSession.commit()
+        
+        third = self._get(count='cached', status='pending')['pagination']
+        self.assertEqual(third['count_strategy'], 'exact')
+        self.assertEqual(third['total'], first['total'] + 1)
+    
+    def test_count_can_be_skipped(self):
+        """Test count=false returning only has_next"""
+        pagination = self._get(count='false', page_size='20')['pagination']
+        
+        self.assertEqual(pagination['count_strategy'], 'none')
+        self.assertIsNone(pagination['total'])
+        self.assertTrue(pagination['has_next'])
+    
+    def test_cursor_from_other_sort_rejected(self):
+        """Test that a cursor cannot be replayed against a different sort"""
+        response = self._get(cursor='', sort_by='title', page_size='5')
+        
+        with self.assertRaises(Exception) as ctx:
+            self._get(cursor=response['pagination']['next_cursor'], sort_by='due_date', page_size='5')
+        self.assertEqual(ctx.exception.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
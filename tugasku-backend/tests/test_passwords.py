@@ -0,0 +1,168 @@
+import unittest
+import bcrypt
+import threading
+import time
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine
+from tugasku_backend import server_threads
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User
+from tugasku_backend.middleware.auth import get_current_user, _token_cache
+from tugasku_backend.views.auth import login
+from tugasku_backend.utils import passwords
+from tugasku_backend.utils.passwords import PasswordHasher, PasswordPoolBusy
+from tugasku_backend.config import get_config
+import tempfile
+import os
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class PasswordPoolTestCase(unittest.TestCase):
+    
+    def test_server_threads(self):
+        """Test the request thread count comes from the ini file"""
+        self.assertEqual(server_threads({'__file__': os.path.join(HERE, 'production.ini')}), 6)
+        self.assertEqual(server_threads({'__file__': os.path.join(HERE, 'development.ini')}), 4)
+        self.assertEqual(server_threads({}), 4)
+    
+    def test_admission_leaves_a_request_thread_free(self):
+        """Test admission is capped below the server's request threads"""
+        hasher = PasswordHasher(max_workers=2, max_queue=8, timeout=5)
+        hasher.limit_admission(6)
+        self.assertEqual(hasher.admission_limit, 5)
+        hasher.limit_admission(1)
+        self.assertEqual(hasher.admission_limit, 1)
+        hasher.limit_admission(64)
+        self.assertEqual(hasher.admission_limit, 10)
+    
+    def test_rejects_beyond_admission(self):
+        """Test work beyond the admission limit fails at once"""
+        hasher = PasswordHasher(max_workers=1, max_queue=4, timeout=5)
+        hasher.limit_admission(2)
+        release = threading.Event()
+        worker = threading.Thread(target=hasher._submit, args=('hash', release.wait))
+        worker.start()
+        try:
+            # One operation is hashing and holds the only slot
+            while hasher.in_flight == 0:
+                time.sleep(0.01)
+            with self.assertRaises(PasswordPoolBusy):
+                hasher._submit('hash', lambda: None)
+        finally:
+            release.set()
+            worker.join()
+        self.assertTrue(hasher._submit('hash', lambda: True))
+    
+    def test_hash_many_shares_the_pool(self):
+        """Test bulk hashing runs on the pool's workers, one per worker at a time"""
+        hasher = PasswordHasher(max_workers=2, max_queue=8, timeout=30)
+        peak = []
+        original = hasher._run
+        
+        def _run(name, func, *args):
+            peak.append(hasher._admitted)
+            return original(name, func, *args)
+        hasher._run = _run
+        
+        hashes = hasher.hash_many(['first', 'second', 'third'])
+        self.assertTrue(bcrypt.checkpw(b'third', hashes[2].encode('utf-8')))
+        self.assertFalse(bcrypt.checkpw(b'first', hashes[1].encode('utf-8')))
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(hasher.queue_depth, 0)
+
+class PasswordCostTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self.config = get_config()
+        self.target = passwords.get_target_cost()
+    
+    def tearDown(self):
+        passwords.set_target_cost(self.target)
+    
+    def test_hash_cost(self):
+        """Test the cost is read from $2b$NN$ hashes, 0 for anything else"""
+        self.assertEqual(passwords.hash_cost(bcrypt.hashpw(b'secret', bcrypt.gensalt(rounds=4)).decode()), 4)
+        self.assertEqual(passwords.hash_cost('$2b$12$' + 'a' * 53), 12)
+        for value in ('', None, 'plain', '$2b$xx$abc'):
+            self.assertEqual(passwords.hash_cost(value), 0)
+    
+    def test_target_cost_is_clamped(self):
+        """Test the target stays within BCRYPT_MIN_ROUNDS and BCRYPT_MAX_ROUNDS"""
+        passwords.set_target_cost(1)
+        self.assertEqual(passwords.get_target_cost(), self.config.BCRYPT_MIN_ROUNDS)
+        passwords.set_target_cost(99)
+        self.assertEqual(passwords.get_target_cost(), self.config.BCRYPT_MAX_ROUNDS)
+        self.assertTrue(passwords.needs_rehash('$2b$04$' + 'a' * 53))
+        self.assertFalse(passwords.needs_rehash(f'$2b${self.config.BCRYPT_MAX_ROUNDS}$' + 'a' * 53))
+    
+    def test_calibration(self):
+        """Test calibration picks the highest cost within the target, measuring no further"""
+        measured = []
+        
+        def _measure(cost, samples=2):
+            # 25 ms at the minimum cost, doubling with each step
+            measured.append(cost)
+            return 25.0 * 2 ** (cost - self.config.BCRYPT_MIN_ROUNDS)
+        
+        original = passwords.measure_cost
+        passwords.measure_cost = _measure
+        try:
+            self.assertEqual(passwords.calibrate_cost(100), self.config.BCRYPT_MIN_ROUNDS + 2)
+            self.assertEqual(measured[-1], self.config.BCRYPT_MIN_ROUNDS + 3)
+            # Never below the minimum, even if it is already too slow
+            self.assertEqual(passwords.calibrate_cost(1), self.config.BCRYPT_MIN_ROUNDS)
+            self.assertEqual(passwords.calibrate_cost(10 ** 9), self.config.BCRYPT_MAX_ROUNDS)
+        finally:
+            passwords.measure_cost = original
+
+class PasswordRehashTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        _token_cache.clear()
+        self.target = passwords.get_target_cost()
+        passwords.set_target_cost(get_config().BCRYPT_MIN_ROUNDS)
+        
+        # A hash left over from a lower cost
+        old_hash = bcrypt.hashpw(b'secret123', bcrypt.gensalt(rounds=4)).decode('utf-8')
+        user = User(username='testuser', email='test@example.com', password_hash=old_hash)
+        DBSession.add(user)
+        DBSession.commit()
+        self.user_id = user.id
+        self.token = user.generate_token()
+    
+    def tearDown(self):
+        passwords.set_target_cost(self.target)
+        _token_cache.clear()
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def test_login_rehashes_old_cost(self):
+        """Test a login with an old-cost hash commits a hash at the target cost"""
+        request = DummyRequest(json_body={'username': 'testuser', 'password': 'secret123'})
+        self.assertEqual(login(request)['user']['id'], self.user_id)
+        
+        DBSession.remove()
+        stored = DBSession.query(User.password_hash).filter(User.id == self.user_id).scalar()
+        self.assertEqual(passwords.hash_cost(stored), passwords.get_target_cost())
+        self.assertTrue(bcrypt.checkpw(b'secret123', stored.encode('utf-8')))
+        
+        # Tokens issued before the rehash keep working
+        _token_cache.clear()
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        self.assertEqual(get_current_user(request).id, self.user_id)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPForbidden
+from sqlalchemy import create_engine, event, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User
+from tugasku_backend.middleware import auth
+from tugasku_backend.middleware.auth import _token_cache
+from tugasku_backend.views.auth import bulk_register
+from tugasku_backend.utils import provisioning
+import tempfile
+import os
+
+class FakeHasher:
+    """Stands in for the bcrypt pool; runs a hook when asked to hash"""
+    
+    def __init__(self, before=None):
+        self.before = before
+    
+    def hash_many(self, passwords):
+        if self.before:
+            self.before()
+        return [f'hashed:{password}' for password in passwords]
+
+class ProvisioningTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        _token_cache.clear()
+        self.admins = auth.config.ADMIN_USERNAMES
+        auth.config.ADMIN_USERNAMES = ['admin']
+        self.hasher = provisioning.password_hasher
+        provisioning.password_hasher = FakeHasher()
+        
+        admin = User(username='admin', email='admin@example.com', password_hash='x')
+        member = User(username='member', email='member@example.com', password_hash='x')
+        DBSession.add_all([admin, member])
+        DBSession.commit()
+        self.admin_token = admin.generate_token()
+        self.member_token = member.generate_token()
+    
+    def tearDown(self):
+        provisioning.password_hasher = self.hasher
+        auth.config.ADMIN_USERNAMES = self.admins
+        _token_cache.clear()
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _entry(self, name, email=None):
+        return {'username': name, 'email': email or f'{name}@example.com', 'password': 'secret123'}
+    
+    def _bulk_register(self, users, token=None):
+        request = DummyRequest(json_body={'users': users})
+        request.headers = {'Authorization': f'Bearer {token or self.admin_token}'}
+        return bulk_register(request)
+    
+    def test_per_entry_results_in_one_insert(self):
+        """Test every entry gets a result and accepted users are written by one INSERT"""
+        statements = []
+        
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0].upper())
+        
+        event.listen(self.engine, 'before_cursor_execute', _record)
+        try:
+            result = self._bulk_register([self._entry('alice'), {'username': 'x'}, self._entry('bob'), 'nope'])
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', _record)
+        
+        self.assertEqual((result['created'], result['failed']), (2, 2))
+        self.assertEqual([entry['status'] for entry in result['results']], ['created', 'error', 'created', 'error'])
+        self.assertEqual(result['results'][3]['errors'], ['Entry must be an object'])
+        self.assertEqual(statements.count('INSERT'), 1)
+        
+        created = DBSession.query(User).filter(User.username == 'alice').one()
+        self.assertEqual(created.id, result['results'][0]['user']['id'])
+        self.assertEqual(created.password_hash, 'hashed:secret123')
+    
+    def test_duplicates_within_the_batch(self):
+        """Test a repeated username or email is rejected in favour of its first entry"""
+        result = self._bulk_register([
+            self._entry('alice'),
+            self._entry('alice', 'other@example.com'),
+            self._entry('carol', 'alice@example.com')
+        ])
+        
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['results'][1]['errors'], ['Username duplicates entry 0'])
+        self.assertEqual(result['results'][2]['errors'], ['Email duplicates entry 0'])
+    
+    def test_conflicts_with_existing_users(self):
+        """Test entries clashing with existing accounts are reported, the rest created"""
+        result = self._bulk_register([
+            self._entry('member', 'new@example.com'),
+            self._entry('dave', 'admin@example.com'),
+            self._entry('erin')
+        ])
+        
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['results'][0]['errors'], ['Username already exists'])
+        self.assertEqual(result['results'][1]['errors'], ['Email already exists'])
+        self.assertEqual(result['results'][2]['status'], 'created')
+    
+    def test_concurrent_signup_is_a_conflict(self):
+        """Test a signup racing the batch is reported for its entry, not as a failed batch"""
+        
+        def _signup():
+            # Another request commits between the lookup and the INSERT
+            other = create_engine(f'sqlite:///{self.db_path}')
+            with other.begin() as conn:
+                conn.execute(insert(User).values(username='frank', email='frank@example.com', password_hash='x'))
+            other.dispose()
+        
+        provisioning.password_hasher = FakeHasher(before=_signup)
+        result = self._bulk_register([self._entry('frank'), self._entry('grace')])
+        
+        self.assertEqual((result['created'], result['failed']), (1, 1))
+        self.assertEqual(result['results'][0]['errors'], ['Username already exists', 'Email already exists'])
+        self.assertEqual(result['results'][1]['status'], 'created')
+        self.assertEqual(DBSession.query(User).filter(User.username == 'grace').count(), 1)
+    
+    def test_admin_only(self):
+        """Test users not listed in ADMIN_USERNAMES cannot provision"""
+        with self.assertRaises(HTTPForbidden):
+            self._bulk_register([self._entry('henry')], token=self.member_token)
+        self.assertEqual(DBSession.query(User).filter(User.username == 'henry').count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
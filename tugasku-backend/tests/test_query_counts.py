@@ -0,0 +1,99 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, event
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category, TaskLog
+from tugasku_backend.views.tasks import get_tasks, get_task
+from tugasku_backend.views.dashboard import get_dashboard
+from tugasku_backend.views.categories import get_categories
+import tempfile
+import os
+
+class QueryCountTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.commit()
+        self.token = self.user.generate_token()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _populate(self, categories, tasks_per_category):
+        for _ in range(categories):
+            category = Category(name=f'Category {DBSession.query(Category).count()}')
+            DBSession.add(category)
+            DBSession.flush()
+            for t in range(tasks_per_category):
+                task = Task(title=f'Task {t}', user_id=self.user.id, category_id=category.id)
+                DBSession.add(task)
+                DBSession.flush()
+                DBSession.add(TaskLog(task_id=task.id, changed_by=self.user.id,
+                                      old_status=None, new_status='pending'))
+        DBSession.commit()
+    
+    def _count(self, view, **matchdict):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = {}
+        request.matchdict = matchdict
+        
+        # Warm the token cache so only the view's own queries are counted
+        view(request)
+        DBSession.expire_all()
+        
+        del self.statements[:]
+        view(request)
+        DBSession.expire_all()
+        return len(self.statements)
+    
+    def _assert_constant(self, view, **matchdict):
+        self._populate(categories=1, tasks_per_category=1)
+        small = self._count(view, **matchdict)
+        self._populate(categories=4, tasks_per_category=5)
+        large = self._count(view, **matchdict)
+        self.assertEqual(small, large, self.statements)
+        return large
+    
+    def test_task_list_query_count(self):
+        """Test that the task list is one page query plus one count"""
+        self.assertEqual(self._assert_constant(get_tasks), 2)
+    
+    def test_task_detail_query_count(self):
+        """Test that task detail loads the task and its logs with two queries"""
+        self._populate(categories=1, tasks_per_category=1)
+        task_id = DBSession.query(Task.id).scalar()
+        self.assertEqual(self._assert_constant(get_task, id=task_id), 2)
+    
+    def test_dashboard_query_count(self):
+        """Test that the dashboard does not query per category or task"""
+        self.assertEqual(self._assert_constant(get_dashboard), 2)
+    
+    def test_category_list_query_count(self):
+        """Test that category task counts come from the list query"""
+        self.assertEqual(self._assert_constant(get_categories), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import itertools
+import re
+import unittest
+from datetime import datetime, timedelta
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, event, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category, TaskLog, TaskArchive
+from tugasku_backend.views.tasks import get_tasks, get_task, TASK_SORT_FIELDS
+from tugasku_backend.views.dashboard import get_dashboard
+from tugasku_backend.views.categories import get_categories
+import tempfile
+import os
+
+# Tables large enough that scanning or sorting them is a regression
+BIG_TABLES = ('tasks', 'task_logs', 'tasks_archive')
+
+USERS = 20
+TASKS_PER_USER = 1000
+ARCHIVED_PER_USER = 500
+
+# Most rows PostgreSQL may sort outside a search: a few pages' worth
+SORTED_ROWS_LIMIT = 100
+
+class QueryPlanTestCase(unittest.TestCase):
+    """EXPLAIN every query the list, dashboard and category views can issue"""
+    
+    @classmethod
+    def setUpClass(cls):
+        # One seeded database shared by every test; the views only read it
+        cls.engine = cls._create_engine()
+        Base.metadata.create_all(cls.engine)
+        
+        with cls.engine.begin() as conn:
+            conn.execute(insert(User), [
+                {'username': f'user{u}', 'email': f'user{u}@example.com', 'password_hash': 'x'}
+                for u in range(USERS)
+            ])
+            conn.execute(insert(Category), [{'name': name} for name in ('Work', 'Personal', 'Study', 'Health')])
+            base = datetime(2024, 1, 1)
+            conn.execute(insert(Task), [
+                {
+                    'title': f'Task {t}',
+                    'user_id': u + 1,
+                    'status': ('pending', 'in_progress', 'completed')[t % 3],
+                    'priority': ('low', 'medium', 'high')[t % 3 - t % 2],
+                    'category_id': t % 5 or None,
+                    'due_date': base + timedelta(days=t % 90) if t % 4 else None,
+                    'created_at': base + timedelta(minutes=t),
+                    'updated_at': base + timedelta(minutes=t)
+                }
+                for u in range(USERS) for t in range(TASKS_PER_USER)
+            ])
+            # Older completed tasks in the archive, with ids after the live ones
+            conn.execute(insert(TaskArchive), [
+                {
+                    'id': USERS * TASKS_PER_USER + u * ARCHIVED_PER_USER + t + 1,
+                    'title': f'Archived {t}',
+                    'user_id': u + 1,
+                    'status': 'completed',
+                    'priority': ('low', 'medium', 'high')[t % 3],
+                    'category_id': t % 5 or None,
+                    'due_date': base - timedelta(days=t % 90) if t % 4 else None,
+                    'created_at': base - timedelta(minutes=t),
+                    'updated_at': base - timedelta(minutes=t)
+                }
+                for u in range(USERS) for t in range(ARCHIVED_PER_USER)
+            ])
+            conn.execute(insert(TaskLog), [
+                {'task_id': task_id, 'new_status': 'pending', 'changed_by': 1}
+                for task_id in range(1, USERS * TASKS_PER_USER + 1, 3)
+            ])
+            # Planner statistics, as a long-running database would have
+            conn.exec_driver_sql('ANALYZE')
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        os.close(cls.db_fd)
+        os.unlink(cls.db_path)
+    
+    @classmethod
+    def _create_engine(cls):
+        cls.db_fd, cls.db_path = tempfile.mkstemp()
+        return create_engine(f'sqlite:///{cls.db_path}')
+    
+    def setUp(self):
+        DBSession.configure(bind=self.engine)
+        self.config = testing.setUp()
+        self.token = DBSession.query(User).filter_by(username='user3').one().generate_token()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+    
+    def _call(self, view, matchdict=None, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        request.matchdict = matchdict or {}
+        return view(request)
+    
+    def _plans(self, view, matchdict=None, **params):
+        """Query plan lines of every SELECT the view issues"""
+        self.statements = []
+        self._call(view, matchdict, **params)
+        
+        recorded, self.statements = self.statements, []
+        plans = []
+        with self.engine.connect() as conn:
+            for statement, parameters in recorded:
+                plans.append((statement, self._explain(conn, statement, parameters)))
+        return plans
+    
+    def _explain(self, conn, statement, parameters):
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        return [row[-1] for row in rows]
+    
+    def _assert_indexed(self, plans):
+        """No scans of big tables, and no sorts of a user's tasks or a slice of them
+
+        Listings, filtered or not and on every keyset page, must be read off an
+        index in sort order. A sort is accepted only over rows fetched by id
+        from a search's candidates (full-text matches, or the in-process index
+        list capped at SEARCH_MAX_CANDIDATES), which the filters cannot widen.
+        """
+        for statement, lines in plans:
+            message = '\n'.join(lines) + '\n' + statement
+            for line in lines:
+                for table in BIG_TABLES:
+                    self.assertNotRegex(line, rf'^SCAN {table}\b', message)
+            if any(line.startswith('USE TEMP B-TREE FOR') and line.endswith('ORDER BY') for line in lines):
+                driving = next((line for line in lines if line.startswith('SEARCH tasks ')), '')
+                self.assertRegex(driving, r'[( ](rowid|id)=\?\)$', message)
+    
+    def _assert_list_indexed(self, **params):
+        """Check the plans of a task list page and, for cursor paging, of the next page"""
+        self._assert_indexed(self._plans(get_tasks, **params))
+        if 'cursor' in params:
+            cursor = self._call(get_tasks, **params)['pagination']['next_cursor']
+            if cursor:
+                self._assert_indexed(self._plans(get_tasks, **dict(params, cursor=cursor)))
+    
+    def test_task_list_plans(self):
+        """Test every filter and sort of the task list, with and without the archive, uses an index"""
+        filter_values = {'status': 'completed', 'priority': 'high', 'category_id': '2'}
+        for size in range(len(filter_values) + 1):
+            for names in itertools.combinations(filter_values, size):
+                filters = {name: filter_values[name] for name in names}
+                for sort_by, sort_order, paging, archived in itertools.product(
+                    TASK_SORT_FIELDS, ('asc', 'desc'), ('offset', 'cursor'), (False, True)
+                ):
+                    params = dict(filters, sort_by=sort_by, sort_order=sort_order)
+                    if paging == 'cursor':
+                        params['cursor'] = ''
+                    if archived:
+                        params['include_archived'] = 'true'
+                    with self.subTest(**params):
+                        self._assert_list_indexed(**params)
+    
+    def test_search_plans(self):
+        """Test searches in every mode only sort their matches, including by relevance"""
+        searches = {'fulltext': 'task 12', 'substring': 'ask 12', 'fuzzy': 'tsak 12'}
+        filter_sets = ({}, {'status': 'completed'}, {'priority': 'high', 'category_id': '2'})
+        for mode, filters in itertools.product(searches, filter_sets):
+            for sort_by, paging, archived in itertools.product(
+                TASK_SORT_FIELDS + ('relevance',), ('offset', 'cursor'), (False, True)
+            ):
+                params = dict(filters, search=searches[mode], search_mode=mode, sort_by=sort_by)
+                if paging == 'cursor':
+                    params['cursor'] = ''
+                if archived:
+                    params['include_archived'] = 'true'
+                with self.subTest(**params):
+                    self._assert_list_indexed(**params)
+    
+    def test_dashboard_plans(self):
+        """Test the dashboard queries use indexes"""
+        self._assert_indexed(self._plans(get_dashboard))
+    
+    def test_task_detail_plans(self):
+        """Test a task's history is read newest first from its index"""
+        task_id = DBSession.query(Task.id).filter(Task.user_id == 4).order_by(Task.id).first().id
+        self._assert_indexed(self._plans(get_task, matchdict={'id': str(task_id)}))
+    
+    def test_category_plans(self):
+        """Test category task counts use an index"""
+        self._assert_indexed(self._plans(get_categories))
+
+@unittest.skipUnless(os.getenv('TEST_POSTGRES_URL'), 'TEST_POSTGRES_URL is not set')
+class PostgresQueryPlanTestCase(QueryPlanTestCase):
+    """The same queries planned by PostgreSQL, in a scratch database"""
+    
+    @classmethod
+    def tearDownClass(cls):
+        Base.metadata.drop_all(cls.engine)
+        cls.engine.dispose()
+    
+    @classmethod
+    def _create_engine(cls):
+        engine = create_engine(os.getenv('TEST_POSTGRES_URL'))
+        Base.metadata.drop_all(engine)
+        return engine
+    
+    def _explain(self, conn, statement, parameters):
+        return [row[0].strip() for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+    
+    def _assert_indexed(self, plans):
+        """No sequential scans of big tables, and sorts only of a few rows or of search matches
+
+        PostgreSQL sorts what the filters narrow to a handful of rows rather
+        than walk an index for them; a sort the planner expects to be larger
+        must be of a search's matches (the tsvector match, candidate ids or
+        ILIKE). Everything else is read off an index in order, merging the
+        live and archived halves.
+        """
+        for statement, lines in plans:
+            message = '\n'.join(lines) + '\n' + statement
+            for line in lines:
+                for table in BIG_TABLES:
+                    self.assertNotRegex(line, rf'Seq Scan on {table}\b', message)
+                sort = re.match(r'(-> +)?(Incremental )?Sort  \(.* rows=(\d+)', line)
+                if sort and int(sort.group(3)) > SORTED_ROWS_LIMIT:
+                    self.assertTrue(any(re.search(r'@@|= ANY|~~\*', line) for line in lines), message)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import tempfile
+import os
+from tugasku_backend.utils.rate_limit import RateLimiter, MemoryBackend, SQLiteBackend
+
+class RateLimitTestCase(unittest.TestCase):
+    
+    def _exercise(self, backend):
+        limiter = RateLimiter(backend, window=60)
+        keys = [('login:account:testuser', 3), ('login:ip:127.0.0.1', 10)]
+        
+        # Three attempts fit into the window, the fourth is rejected
+        for _ in range(3):
+            self.assertEqual(limiter.hit(keys, now=1000.0), (True, 0))
+        allowed, retry_after = limiter.hit(keys, now=1001.0)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        
+        # The previous window keeps counting while it slides out
+        self.assertTrue(limiter.hit(keys, now=1021.0)[0])
+        self.assertFalse(limiter.hit(keys, now=1022.0)[0])
+        self.assertTrue(limiter.hit(keys, now=1100.0)[0])
+        
+        # Resetting the account key clears it
+        limiter.reset('login:account:testuser')
+        for _ in range(3):
+            self.assertTrue(limiter.hit(keys, now=1101.0)[0])
+    
+    def test_memory_backend(self):
+        """Test sliding window limits with the in-process backend"""
+        self._exercise(MemoryBackend())
+    
+    def test_memory_backend_evicts_oldest_keys(self):
+        """Test that the in-process backend stays bounded"""
+        backend = MemoryBackend(max_keys=2)
+        limiter = RateLimiter(backend, window=60)
+        for name in ('a', 'b', 'c'):
+            limiter.hit([(name, 1)], now=1000.0)
+        self.assertEqual(list(backend._state), ['b', 'c'])
+    
+    def test_sqlite_backend(self):
+        """Test sliding window limits with the shared SQLite backend"""
+        fd, path = tempfile.mkstemp()
+        try:
+            self._exercise(SQLiteBackend(path))
+        finally:
+            os.close(fd)
+            os.unlink(path)
+
+if __name__ == '__main__':
+    unittest.main()
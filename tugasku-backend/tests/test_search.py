@@ -0,0 +1,170 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, text, insert, update
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task
+from tugasku_backend.views.tasks import get_tasks, update_task, delete_task
+from tugasku_backend.utils import search, ngram
+import tempfile
+import os
+
+class TaskSearchTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        # Versions restart with every test database
+        search.ngram_indexes.clear()
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.flush()
+        
+        self.report = Task(title='Quarterly report', description='Numbers for finance', user_id=self.user.id)
+        self.groceries = Task(title='Groceries', description='Milk and the report printout', user_id=self.user.id)
+        self.other = Task(title='Call plumber', description=None, user_id=self.user.id)
+        DBSession.add_all([self.report, self.groceries, self.other])
+        DBSession.commit()
+        self.token = self.user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _search(self, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        return [task['id'] for task in get_tasks(request)['tasks']]
+    
+    def test_index_is_created_with_tables(self):
+        """Test that creating the tables installs the FTS5 index"""
+        self.assertTrue(search.search_available())
+    
+    def test_prefix_search(self):
+        """Test that every word must match the start of a word"""
+        self.assertEqual(sorted(self._search(search='rep')), sorted([self.report.id, self.groceries.id]))
+        self.assertEqual(self._search(search='quart REP'), [self.report.id])
+        self.assertEqual(self._search(search='port'), [])
+    
+    def test_relevance_sort(self):
+        """Test that title matches rank above description matches"""
+        self.assertEqual(
+            self._search(search='report', sort_by='relevance'),
+            [self.report.id, self.groceries.id]
+        )
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the index is maintained on update and delete"""
+        self.other.title = 'Call electrician'
+        DBSession.delete(self.report)
+        DBSession.commit()
+        
+        self.assertEqual(self._search(search='electri'), [self.other.id])
+        self.assertEqual(self._search(search='plumber'), [])
+        self.assertEqual(self._search(search='quarterly'), [])
+    
+    def test_fallback_without_index(self):
+        """Test substring search when the index is missing"""
+        DBSession.execute(text('DROP TABLE tasks_fts'))
+        DBSession.commit()
+        search._available.clear()
+        
+        self.assertEqual(sorted(self._search(search='port')), sorted([self.report.id, self.groceries.id]))
+    
+    def test_substring_mode(self):
+        """Test that search_mode=substring matches inside words"""
+        self.assertEqual(sorted(self._search(search='PORT', search_mode='substring')),
+                         sorted([self.report.id, self.groceries.id]))
+        self.assertEqual(self._search(search='ly rep', search_mode='substring'), [self.report.id])
+    
+    def test_fuzzy_mode(self):
+        """Test that search_mode=fuzzy tolerates typos and ranks by similarity"""
+        self.assertEqual(self._search(search='plumbr', search_mode='fuzzy'), [self.other.id])
+        self.assertEqual(
+            self._search(search='quartely report', search_mode='fuzzy', sort_by='relevance'),
+            [self.report.id, self.groceries.id]
+        )
+        self.assertEqual(self._search(search='zebra', search_mode='fuzzy'), [])
+    
+    def test_fuzzy_index_follows_writes(self):
+        """Test that the in-process index is rebuilt after the user's tasks change"""
+        self.assertEqual(self._search(search='electrician', search_mode='fuzzy'), [])
+        self.other.title = 'Call electrician'
+        DBSession.commit()
+        self.assertEqual(self._search(search='electrican', search_mode='fuzzy'), [self.other.id])
+    
+    def test_fuzzy_index_follows_writes_from_other_processes(self):
+        """Test that the index follows the database version, not this process's writes"""
+        self.assertEqual(self._search(search='electrician', search_mode='fuzzy'), [])
+        
+        # Plain statements on another engine, as import_tasks.py writes
+        other = create_engine(f'sqlite:///{self.db_path}')
+        with other.begin() as conn:
+            seq = conn.execute(
+                update(User).where(User.id == self.user.id).values(change_seq=User.change_seq + 1)
+                .returning(User.change_seq)
+            ).scalar_one()
+            conn.execute(update(Task).where(Task.id == self.other.id).values(
+                title='Call electrician', change_seq=seq
+            ))
+        other.dispose()
+        
+        self.assertEqual(self._search(search='electrican', search_mode='fuzzy'), [self.other.id])
+    
+    def test_candidates_are_capped(self):
+        """Test that in-process matches bind at most SEARCH_MAX_CANDIDATES ids"""
+        limit = search.config.SEARCH_MAX_CANDIDATES
+        search.config.SEARCH_MAX_CANDIDATES = 1
+        try:
+            # Fuzzy keeps the best match; substring falls back to ILIKE
+            self.assertEqual(self._search(search='report', search_mode='fuzzy'), [self.report.id])
+            self.assertEqual(sorted(self._search(search='report', search_mode='substring')),
+                             sorted([self.report.id, self.groceries.id]))
+        finally:
+            search.config.SEARCH_MAX_CANDIDATES = limit
+    
+    def _request(self, task, **kwargs):
+        request = DummyRequest(**kwargs)
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.matchdict = {'id': str(task.id)}
+        return request
+    
+    def test_fuzzy_index_patched_by_task_views(self):
+        """Test that writes through the task views patch the index instead of rebuilding it"""
+        self._search(search='plumbr', search_mode='fuzzy')
+        index = search.ngram_indexes.get(self.user.id)
+        
+        update_task(self._request(self.other, json_body={'title': 'Call electrician'}))
+        self.assertEqual(self._search(search='electrican', search_mode='fuzzy'), [self.other.id])
+        self.assertEqual(self._search(search='plumbr', search_mode='fuzzy'), [])
+        
+        delete_task(self._request(self.report))
+        self.assertEqual(self._search(search='quartely', search_mode='fuzzy'), [])
+        self.assertIs(search.ngram_indexes.get(self.user.id), index)
+    
+    def test_fuzzy_scores_computed_once(self):
+        """Test that filtering and ranking share one fuzzy lookup"""
+        self._search(search='plumbr', search_mode='fuzzy')
+        lookups = []
+        original = ngram.word_ngrams
+        ngram.word_ngrams = lambda text: lookups.append(text) or original(text)
+        try:
+            result = self._search(search='quartely report', search_mode='fuzzy', sort_by='relevance')
+        finally:
+            ngram.word_ngrams = original
+        self.assertEqual(result[0], self.report.id)
+        self.assertEqual(lookups, ['quartely report'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, insert, update
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task
+from tugasku_backend.views.tasks import suggest_tasks, create_task, delete_task
+from tugasku_backend.utils import metrics
+from tugasku_backend.utils.suggest import PrefixIndex, SuggestIndexes, suggest_indexes
+import tempfile
+import os
+
+class PrefixIndexTestCase(unittest.TestCase):
+    
+    def test_word_prefixes(self):
+        """Test that any title word can start a match"""
+        index = PrefixIndex([(1, 'Quarterly report'), (2, 'Report bug'), (3, 'Call plumber')])
+        self.assertEqual([s['id'] for s in index.suggest('rep', 10)], [1, 2])
+        self.assertEqual([s['id'] for s in index.suggest('QUA', 10)], [1])
+        self.assertEqual(index.suggest('x', 10), [])
+        self.assertEqual(len(index.suggest('', 2)), 2)
+    
+    def test_add_and_remove(self):
+        """Test incremental updates"""
+        index = PrefixIndex([(1, 'Quarterly report')])
+        size = index.nbytes
+        index.add(1, 'Annual report')
+        self.assertEqual(index.suggest('qua', 10), [])
+        self.assertEqual(index.suggest('ann', 10), [{'id': 1, 'title': 'Annual report'}])
+        index.remove(1)
+        self.assertEqual(index.suggest('rep', 10), [])
+        self.assertEqual(index.nbytes, 0)
+        self.assertGreater(size, 0)
+    
+    def test_memory_budget(self):
+        """Test that least recently used indexes are evicted over budget"""
+        indexes = SuggestIndexes(budget_bytes=1000)
+        for user_id in (1, 2, 3):
+            indexes._store(user_id, 0, PrefixIndex([(user_id, 'x' * 300)]))
+        self.assertEqual(list(indexes._indexes), [2, 3])
+        self.assertLessEqual(indexes.nbytes, 1000)
+
+class SuggestViewTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        suggest_indexes.clear()
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.flush()
+        DBSession.add(Task(title='Quarterly report', user_id=self.user.id))
+        DBSession.commit()
+        self.token = self.user.generate_token()
+    
+    def tearDown(self):
+        suggest_indexes.clear()
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _request(self, **kwargs):
+        request = DummyRequest(**kwargs)
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        return request
+    
+    def _suggest(self, prefix):
+        request = self._request()
+        request.params = {'prefix': prefix}
+        return [s['title'] for s in suggest_tasks(request)['suggestions']]
+    
+    def test_index_is_patched_by_task_views(self):
+        """Test that creates and deletes update the index without a rebuild"""
+        self.assertEqual(self._suggest('re'), ['Quarterly report'])
+        builds = metrics.snapshot()['counters'].get('suggest.builds')
+        
+        request = self._request(json_body={'title': 'Renew passport'})
+        task_id = create_task(request)['task']['id']
+        self.assertEqual(self._suggest('re'), ['Renew passport', 'Quarterly report'])
+        
+        request = self._request()
+        request.matchdict = {'id': task_id}
+        delete_task(request)
+        self.assertEqual(self._suggest('re'), ['Quarterly report'])
+        
+        self.assertEqual(metrics.snapshot()['counters'].get('suggest.builds'), builds)
+    
+    def test_index_is_rebuilt_after_other_writes(self):
+        """Test that writes outside the task views invalidate the index"""
+        self.assertEqual(self._suggest('inv'), [])
+        DBSession.add(Task(title='Invoice client', user_id=self.user.id))
+        DBSession.commit()
+        self.assertEqual(self._suggest('inv'), ['Invoice client'])
+    
+    def test_index_is_rebuilt_after_writes_from_other_processes(self):
+        """Test that the index follows the database version, not this process's writes"""
+        self.assertEqual(self._suggest('pay'), [])
+        
+        # Plain statements on another engine, as import_tasks.py writes
+        other = create_engine(f'sqlite:///{self.db_path}')
+        with other.begin() as conn:
+            seq = conn.execute(
+                update(User).where(User.id == self.user.id).values(change_seq=User.change_seq + 1)
+                .returning(User.change_seq)
+            ).scalar_one()
+            conn.execute(insert(Task).values(title='Pay rent', user_id=self.user.id, change_seq=seq))
+        other.dispose()
+        
+        self.assertEqual(self._suggest('pay'), ['Pay rent'])
+
+if __name__ == '__main__':
+    unittest.main()
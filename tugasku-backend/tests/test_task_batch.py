@@ -0,0 +1,116 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine, event
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.database.connection import enable_sqlite_foreign_keys
+from tugasku_backend.models import User, Task, Category, TaskLog
+from tugasku_backend.views.tasks import batch_tasks
+import tempfile
+import os
+
+class TaskBatchTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        enable_sqlite_foreign_keys(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        self.other = User(username='otheruser', email='other@example.com', password_hash='x')
+        self.category = Category(name='Work')
+        DBSession.add_all([self.user, self.other, self.category])
+        DBSession.flush()
+        
+        self.existing = Task(title='Existing', status='pending', user_id=self.user.id)
+        self.doomed = Task(title='Doomed', user_id=self.user.id)
+        self.foreign = Task(title='Not mine', user_id=self.other.id)
+        DBSession.add_all([self.existing, self.doomed, self.foreign])
+        DBSession.flush()
+        DBSession.add(TaskLog(task_id=self.doomed.id, new_status='pending', changed_by=self.user.id))
+        self.doomed_id, self.foreign_id = self.doomed.id, self.foreign.id
+        DBSession.commit()
+        self.token = self.user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _batch(self, operations):
+        request = DummyRequest(json_body={'operations': operations})
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        return batch_tasks(request)
+    
+    def test_mixed_operations(self):
+        """Test creates, updates and deletes with per-operation results"""
+        result = self._batch([
+            {'op': 'create', 'data': {'title': 'First', 'category_id': self.category.id}},
+            {'op': 'create', 'data': {'title': 'Second', 'due_date': '2024-05-01T00:00:00Z'}},
+            {'op': 'update', 'id': self.existing.id, 'data': {'status': 'completed', 'title': ' Renamed '}},
+            {'op': 'delete', 'id': self.doomed.id},
+            {'op': 'delete', 'id': self.foreign.id},
+            {'op': 'create', 'data': {'title': ''}},
+            {'op': 'create', 'data': {'title': 'Bad category', 'category_id': 999}},
+            {'op': 'archive', 'id': self.existing.id}
+        ])
+        
+        self.assertEqual((result['applied'], result['failed']), (4, 4))
+        statuses = [entry['status'] for entry in result['results']]
+        self.assertEqual(statuses, ['created', 'created', 'updated', 'deleted',
+                                    'error', 'error', 'error', 'error'])
+        self.assertEqual(result['results'][0]['task']['category']['name'], 'Work')
+        self.assertEqual(result['results'][1]['task']['title'], 'Second')
+        self.assertEqual(result['results'][2]['task']['title'], 'Renamed')
+        self.assertEqual(result['results'][4]['errors'], ['Task not found'])
+        
+        DBSession.expunge_all()
+        self.assertIsNone(DBSession.get(Task, self.doomed_id))
+        self.assertIsNotNone(DBSession.get(Task, self.foreign_id))
+        
+        notes = sorted(
+            (log.task_id, log.new_status, log.notes)
+            for log in DBSession.query(TaskLog).all()
+        )
+        self.assertEqual(notes, sorted([
+            (result['results'][0]['id'], 'pending', 'Task created'),
+            (result['results'][1]['id'], 'pending', 'Task created'),
+            (result['results'][2]['id'], 'completed', 'Status changed from pending to completed')
+        ]))
+    
+    def test_single_commit_and_bulk_statements(self):
+        """Test that writes are multi-row statements committed once"""
+        statements = []
+        
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0].upper())
+        
+        event.listen(self.engine, 'before_cursor_execute', _record)
+        try:
+            result = self._batch([{'op': 'create', 'data': {'title': f'Task {i}'}} for i in range(20)])
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', _record)
+        
+        self.assertEqual(statements.count('INSERT'), 2)
+        self.assertEqual([entry['task']['title'] for entry in result['results']],
+                         [f'Task {i}' for i in range(20)])
+        self.assertEqual(DBSession.query(Task).filter(Task.user_id == self.user.id).count(), 22)
+    
+    def test_duplicate_targets_rejected(self):
+        """Test that a task can only be targeted once per batch"""
+        result = self._batch([
+            {'op': 'update', 'id': self.existing.id, 'data': {'priority': 'high'}},
+            {'op': 'delete', 'id': self.existing.id}
+        ])
+        self.assertEqual([entry['status'] for entry in result['results']], ['updated', 'error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import create_engine, event, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.database.connection import enable_sqlite_foreign_keys, sqlite_foreign_key_cascades
+from tugasku_backend.database.migrations import _cascade_sqlite_foreign_keys
+from tugasku_backend.models import User, Task, TaskLog, TaskTombstone
+from tugasku_backend.views.tasks import delete_many_tasks, delete_task
+from tugasku_backend.utils.suggest import suggest_indexes
+import tempfile
+import os
+
+class TaskDeleteTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        enable_sqlite_foreign_keys(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        DBSession.add_all([user, other])
+        DBSession.flush()
+        self.task_ids = DBSession.execute(insert(Task).returning(Task.id), [
+            {'title': f'Task {i}', 'user_id': user.id, 'status': 'completed' if i % 2 else 'pending'}
+            for i in range(10)
+        ]).scalars().all()
+        DBSession.execute(insert(TaskLog), [
+            {'task_id': task_id, 'new_status': 'pending', 'changed_by': user.id}
+            for task_id in self.task_ids for _ in range(3)
+        ])
+        foreign = Task(title='Not mine', user_id=other.id)
+        DBSession.add(foreign)
+        DBSession.commit()
+        self.user_id = user.id
+        self.foreign_id = foreign.id
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _delete(self, data, **params):
+        request = DummyRequest(json_body=data)
+        request.body = b'{}'
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        return delete_many_tasks(request)
+    
+    def test_delete_by_ids(self):
+        """Test only the user's tasks go, with their logs, leaving tombstones"""
+        result = self._delete({'ids': self.task_ids[:3] + [self.foreign_id]})
+        # Set-based: nothing is selected row by row before the delete
+        self.assertFalse([s for s in self.statements if s.startswith('SELECT')])
+        
+        self.assertEqual(result['deleted'], 3)
+        self.assertEqual(result['ids'], self.task_ids[:3])
+        self.assertEqual(DBSession.query(Task).count(), 8)
+        self.assertEqual(DBSession.query(TaskLog).count(), 7 * 3)
+        tombstones = DBSession.query(TaskTombstone).all()
+        self.assertEqual(sorted(t.task_id for t in tombstones), self.task_ids[:3])
+        self.assertEqual(len({t.change_seq for t in tombstones}), 1)
+    
+    def test_suggestions_forget_deleted_tasks(self):
+        """Test every deleted task leaves the title suggestions"""
+        suggest_indexes.clear()
+        self.assertEqual(len(suggest_indexes.get(self.user_id).suggest('Task', 20)), 10)
+        self._delete({'ids': self.task_ids[:3]})
+        self.assertEqual(len(suggest_indexes.get(self.user_id).suggest('Task', 20)), 7)
+    
+    def test_delete_by_filter(self):
+        """Test the list filters select the tasks, and dry runs only count"""
+        result = self._delete({'dry_run': True}, status='completed')
+        self.assertEqual(result, {'matched': 5, 'dry_run': True})
+        self.assertEqual(DBSession.query(Task).count(), 11)
+        
+        result = self._delete({}, status='completed')
+        self.assertEqual(result['deleted'], 5)
+        self.assertEqual(DBSession.query(Task).filter(Task.status == 'completed').count(), 0)
+    
+    def test_requires_a_selection(self):
+        """Test an empty request does not delete everything"""
+        with self.assertRaises(HTTPBadRequest):
+            self._delete({})
+        with self.assertRaises(HTTPBadRequest):
+            self._delete({'ids': ['1']})
+        
+        result = self._delete({'all': True})
+        self.assertEqual(result['deleted'], 10)
+        self.assertEqual(DBSession.query(Task).count(), 1)
+    
+    def test_single_delete_does_not_load_logs(self):
+        """Test deleting a task leaves its history to ON DELETE CASCADE"""
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.matchdict = {'id': str(self.task_ids[0])}
+        delete_task(request)
+        
+        self.assertFalse([s for s in self.statements if 'FROM task_logs' in s])
+        self.assertEqual(DBSession.query(TaskLog).filter(TaskLog.task_id == self.task_ids[0]).count(), 0)
+        self.assertEqual(DBSession.query(TaskTombstone).count(), 1)
+    
+    def test_user_delete_cascades(self):
+        """Test deleting a user removes their tasks and logs without loading them"""
+        DBSession.delete(DBSession.query(User).get(self.user_id))
+        DBSession.commit()
+        
+        self.assertFalse([s for s in self.statements if 'FROM tasks' in s])
+        self.assertEqual(DBSession.query(Task).count(), 1)
+        self.assertEqual(DBSession.query(TaskLog).count(), 0)
+    
+    def test_sqlite_tables_migrated_before_enforcement(self):
+        """Test older SQLite tables are rebuilt with cascades before foreign keys are enforced"""
+        fd, path = tempfile.mkstemp()
+        legacy = create_engine(f'sqlite:///{path}')
+        try:
+            Base.metadata.create_all(legacy)
+            # Tables as created before deletes cascaded
+            with legacy.begin() as conn:
+                conn.exec_driver_sql("PRAGMA writable_schema=ON")
+                conn.exec_driver_sql(
+                    "UPDATE sqlite_master SET sql = replace(sql, ' ON DELETE CASCADE', '') WHERE type = 'table'"
+                )
+            legacy.dispose()
+            with legacy.begin() as conn:
+                user_id = conn.execute(insert(User.__table__).values(
+                    username='legacy', email='legacy@example.com', password_hash='x'
+                )).inserted_primary_key[0]
+                task_id = conn.execute(insert(Task.__table__).values(title='Old', user_id=user_id)).inserted_primary_key[0]
+                conn.execute(insert(TaskLog.__table__).values(task_id=task_id, new_status='pending', changed_by=user_id))
+            
+            self.assertFalse(enable_sqlite_foreign_keys(legacy))
+            _cascade_sqlite_foreign_keys(legacy)
+            
+            with legacy.begin() as conn:
+                self.assertTrue(sqlite_foreign_key_cascades(conn, 'task_logs', 'task_id', 'tasks'))
+                self.assertEqual(conn.exec_driver_sql("PRAGMA foreign_keys").scalar(), 1)
+                self.assertEqual(conn.exec_driver_sql("SELECT title FROM tasks").scalar(), 'Old')
+                conn.exec_driver_sql(f"DELETE FROM users WHERE id = {user_id}")
+                self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM task_logs").scalar(), 0)
+            
+            # Other SQLite engines in the process are left alone
+            with create_engine('sqlite://').connect() as conn:
+                self.assertEqual(conn.exec_driver_sql("PRAGMA foreign_keys").scalar(), 0)
+        finally:
+            legacy.dispose()
+            os.close(fd)
+            os.unlink(path)
+
+if __name__ == '__main__':
+    unittest.main()
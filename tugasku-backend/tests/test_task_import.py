@@ -0,0 +1,154 @@
+import io
+import json
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category, TaskLog
+from tugasku_backend.views.tasks import import_user_tasks, export_user_tasks
+from tugasku_backend.utils.task_import import import_tasks, _copy_field
+from tugasku_backend.utils.change_tracking import get_versions
+import tempfile
+import os
+
+class TaskImportTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        category = Category(name='Work')
+        DBSession.add_all([user, category])
+        DBSession.commit()
+        self.user_id = user.id
+        self.category_id = category.id
+        self.token = user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _request(self, body, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        request.body_file = io.BytesIO(body.encode('utf-8'))
+        return request
+    
+    def test_ndjson_import(self):
+        """Test valid rows are imported and invalid ones reported by row"""
+        lines = [json.dumps({'title': f'Task {i}', 'priority': 'high'}) for i in range(25)]
+        lines.insert(3, '{not json')
+        lines.insert(7, json.dumps({'title': ''}))
+        lines.append(json.dumps({'title': 'Categorized', 'category_id': self.category_id}))
+        lines.append(json.dumps({'title': 'Lost', 'category_id': 9999}))
+        
+        result = import_user_tasks(self._request('\n'.join(lines) + '\n'))
+        
+        self.assertEqual(result['imported'], 26)
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual([e['row'] for e in result['errors']], [4, 8, 29])
+        self.assertIn('rows_per_second', result)
+        self.assertEqual(DBSession.query(Task).filter(Task.priority == 'high').count(), 25)
+    
+    def test_import_moves_database_versions(self):
+        """Test an import, e.g. from import_tasks.py, changes the versions every server keys on"""
+        before = get_versions(self.user_id)
+        user = DBSession.query(User).get(self.user_id)
+        import_tasks([{'title': 'Plain'}, {'title': 'Filed', 'category_id': self.category_id}], user)
+        
+        after = get_versions(self.user_id)
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+    
+    def test_initial_logs(self):
+        """Test every imported task gets its creation log"""
+        body = '\n'.join(json.dumps({'title': f'Task {i}', 'status': 'in_progress'}) for i in range(10))
+        import_user_tasks(self._request(body))
+        
+        logs = DBSession.query(TaskLog).all()
+        self.assertEqual(len(logs), 10)
+        self.assertEqual({log.new_status for log in logs}, {'in_progress'})
+        self.assertEqual({log.changed_by for log in logs}, {self.user_id})
+        self.assertEqual({log.task_id for log in logs}, {task.id for task in DBSession.query(Task)})
+    
+    def test_csv_import_in_chunks(self):
+        """Test CSV rows spread over several chunks"""
+        from tugasku_backend.utils import task_import
+        original = task_import.config.IMPORT_CHUNK_SIZE
+        task_import.config.IMPORT_CHUNK_SIZE = 4
+        try:
+            rows = ''.join(f'Task {i},"Line one\nline two",,{i % 2 and self.category_id or ""}\n' for i in range(10))
+            result = import_user_tasks(self._request('title,description,due_date,category_id\n' + rows, format='csv'))
+        finally:
+            task_import.config.IMPORT_CHUNK_SIZE = original
+        
+        self.assertEqual(result['imported'], 10)
+        self.assertEqual(DBSession.query(Task).filter(Task.category_id == self.category_id).count(), 5)
+        self.assertEqual(DBSession.query(Task).first().description, 'Line one\nline two')
+    
+    def test_export_round_trip(self):
+        """Test an NDJSON export can be imported back"""
+        import_user_tasks(self._request('\n'.join(json.dumps({'title': f'Task {i}'}) for i in range(5))))
+        
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = {'include_logs': 'true'}
+        exported = b''.join(export_user_tasks(request).app_iter).decode('utf-8')
+        
+        result = import_user_tasks(self._request(exported))
+        self.assertEqual(result['imported'], 5)
+        self.assertEqual(DBSession.query(Task).count(), 10)
+    
+    def test_copy_field_escaping(self):
+        """Test values are escaped for COPY text format"""
+        self.assertEqual(_copy_field(None), '\\N')
+        self.assertEqual(_copy_field('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(_copy_field(7), '7')
+
+@unittest.skipUnless(os.getenv('TEST_POSTGRES_URL'), 'TEST_POSTGRES_URL is not set')
+class TaskImportPostgresTestCase(unittest.TestCase):
+    """Runs the COPY import against a scratch PostgreSQL database"""
+    
+    def setUp(self):
+        # Away from UTC, so a time zone mix-up shows in the stamps
+        self.engine = create_engine(os.getenv('TEST_POSTGRES_URL'),
+                                    connect_args={'options': '-c timezone=Asia/Jakarta'})
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        DBSession.add(self.user)
+        DBSession.commit()
+    
+    def tearDown(self):
+        DBSession.remove()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+    
+    def test_stamps_match_orm_defaults(self):
+        """Test imported rows are stamped with the naive local time the ORM defaults use"""
+        result = import_tasks([{'title': 'Imported'}], self.user)
+        self.assertEqual(result['imported'], 1)
+        
+        DBSession.add(Task(title='Created', user_id=self.user.id))
+        DBSession.commit()
+        stamps = dict(DBSession.query(Task.title, Task.created_at))
+        self.assertIsNone(stamps['Imported'].tzinfo)
+        self.assertLess(abs((stamps['Created'] - stamps['Imported']).total_seconds()), 60)
+        self.assertEqual(DBSession.query(TaskLog.created_at).scalar(), stamps['Imported'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from datetime import datetime, timedelta
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPNotFound
+from sqlalchemy import create_engine, event, insert
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, TaskLog
+from tugasku_backend.views.tasks import get_task, get_task_logs
+from tugasku_backend.config import get_config
+import tempfile
+import os
+
+class TaskLogsTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        DBSession.add_all([user, other])
+        DBSession.flush()
+        task = Task(title='Long lived', user_id=user.id)
+        DBSession.add(task)
+        DBSession.flush()
+        # Entries share timestamps in threes, as bulk writes produce
+        base = datetime(2024, 1, 1)
+        DBSession.execute(insert(TaskLog), [
+            {'task_id': task.id, 'new_status': 'pending', 'changed_by': (user.id, other.id)[n % 2],
+             'notes': f'entry {n}', 'created_at': base + timedelta(minutes=n // 3)}
+            for n in range(45)
+        ])
+        DBSession.commit()
+        self.task_id = task.id
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _request(self, task_id=None, **params):
+        request = DummyRequest()
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        request.matchdict = {'id': str(task_id or self.task_id)}
+        return request
+    
+    def test_logs_pages_by_cursor(self):
+        """Test every entry is returned once, newest first, across pages"""
+        notes, cursor = [], ''
+        while True:
+            page = get_task_logs(self._request(cursor=cursor, page_size='20'))
+            notes += [log['notes'] for log in page['logs']]
+            cursor = page['pagination']['next_cursor']
+            if not cursor:
+                break
+        
+        self.assertEqual(notes, [f'entry {n}' for n in reversed(range(45))])
+    
+    def test_authors_joined(self):
+        """Test authors come from the same query as the entries"""
+        get_task_logs(self._request())
+        DBSession.expunge_all()
+        del self.statements[:]
+        
+        page = get_task_logs(self._request(page_size='30'))
+        
+        self.assertEqual({log['changed_by'] for log in page['logs']}, {'testuser', 'otheruser'})
+        # Task ownership check, one page of entries, and the rolled-up summary
+        self.assertEqual(len(self.statements), 3)
+    
+    def test_detail_embeds_latest_entries(self):
+        """Test the detail endpoint embeds the latest entries and a cursor for the rest"""
+        task = get_task(self._request())['task']
+        limit = get_config().TASK_DETAIL_LOG_LIMIT
+        
+        self.assertEqual(len(task['logs']), limit)
+        self.assertEqual(task['logs'][0]['notes'], 'entry 44')
+        
+        rest = get_task_logs(self._request(cursor=task['logs_next_cursor'], page_size='100'))
+        self.assertEqual(len(rest['logs']), 45 - limit)
+    
+    def test_other_users_task(self):
+        """Test history of another user's task is not found"""
+        DBSession.add(Task(title='Not mine', user_id=DBSession.query(User).filter_by(username='otheruser').one().id))
+        DBSession.commit()
+        other_task = DBSession.query(Task).filter_by(title='Not mine').one()
+        
+        with self.assertRaises(HTTPNotFound):
+            get_task_logs(self._request(other_task.id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound, HTTPPreconditionFailed
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, Category, TaskLog
+from tugasku_backend.views.tasks import update_task
+from tugasku_backend.utils.task_update import parse_if_match, update_task_fields
+import tempfile
+import os
+
+class TaskUpdateTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.config = testing.setUp()
+        
+        user = User(username='testuser', email='test@example.com', password_hash='x')
+        other = User(username='otheruser', email='other@example.com', password_hash='x')
+        category = Category(name='Work')
+        DBSession.add_all([user, other, category])
+        DBSession.flush()
+        task = Task(title='Write report', user_id=user.id)
+        foreign = Task(title='Not mine', user_id=other.id)
+        DBSession.add_all([task, foreign])
+        DBSession.commit()
+        self.task_id = task.id
+        self.foreign_id = foreign.id
+        self.category_id = category.id
+        self.user_id = user.id
+        self.token = user.generate_token()
+        DBSession.expunge_all()
+        
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _update(self, data, task_id=None, if_match=None):
+        request = DummyRequest(json_body=data)
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        if if_match is not None:
+            request.headers['If-Match'] = if_match
+        request.matchdict = {'id': str(task_id or self.task_id)}
+        return request, update_task(request)
+    
+    def _logs(self):
+        return DBSession.query(TaskLog).filter(TaskLog.task_id == self.task_id).all()
+    
+    def test_update_is_one_update_statement(self):
+        """Test the task is written by a single UPDATE and returned whole"""
+        request, result = self._update({'title': 'Final report', 'category_id': self.category_id})
+        task = result['task']
+        
+        self.assertEqual(task['title'], 'Final report')
+        self.assertEqual(task['category']['name'], 'Work')
+        self.assertEqual(task['user']['username'], 'testuser')
+        self.assertEqual(request.response.headers['ETag'], f'"{task["version"]}"')
+        updates = [s for s in self.statements if s.startswith('UPDATE tasks')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self._logs(), [])
+    
+    def test_status_change_is_logged(self):
+        """Test a status change logs the old and new status, and no-ops don't"""
+        self._update({'status': 'completed'})
+        logs = self._logs()
+        self.assertEqual(len(logs), 1)
+        self.assertEqual((logs[0].old_status, logs[0].new_status), ('pending', 'completed'))
+        self.assertEqual(logs[0].notes, 'Status changed from pending to completed')
+        self.assertEqual(logs[0].changed_by, self.user_id)
+        
+        self._update({'status': 'completed', 'status_notes': 'again'})
+        self.assertEqual(len(self._logs()), 1)
+    
+    def test_if_match(self):
+        """Test a stale version is refused and leaves the task untouched"""
+        _, result = self._update({'title': 'First'})
+        version = result['task']['version']
+        
+        _, result = self._update({'title': 'Second'}, if_match=f'"{version}"')
+        self.assertEqual(result['task']['title'], 'Second')
+        self.assertGreater(result['task']['version'], version)
+        
+        with self.assertRaises(HTTPPreconditionFailed):
+            self._update({'title': 'Third', 'status': 'completed'}, if_match=f'"{version}"')
+        DBSession.expunge_all()
+        self.assertEqual(DBSession.query(Task).get(self.task_id).title, 'Second')
+        self.assertEqual(self._logs(), [])
+    
+    def test_not_found_and_bad_category(self):
+        """Test other users' tasks are not found and unknown categories rejected"""
+        with self.assertRaises(HTTPNotFound):
+            self._update({'title': 'Mine now'}, task_id=self.foreign_id)
+        with self.assertRaises(HTTPBadRequest):
+            self._update({'category_id': 9999})
+        with self.assertRaises(HTTPBadRequest):
+            self._update({'status': 'unknown'})
+    
+    def test_parse_if_match(self):
+        """Test strong, weak and wildcard If-Match values"""
+        self.assertEqual(parse_if_match('"7"'), 7)
+        self.assertIsNone(parse_if_match('*'))
+        self.assertIsNone(parse_if_match(None))
+        with self.assertRaises(HTTPPreconditionFailed):
+            parse_if_match('"abc"')
+        with self.assertRaises(HTTPPreconditionFailed):
+            parse_if_match('W/"7"')
+    
+    def test_postgresql_statement(self):
+        """Test PostgreSQL gets the bump, update and log as one statement"""
+        statements = []
+        
+        class Bind:
+            dialect = postgresql.dialect()
+        
+        def execute(statement, *args, **kwargs):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            raise RuntimeError('stop')
+        
+        original_bind, original_execute = DBSession.get_bind, DBSession.execute
+        DBSession.get_bind = lambda *args, **kwargs: Bind()
+        DBSession.execute = execute
+        try:
+            with self.assertRaises(RuntimeError):
+                self._update({'status': 'completed'}, if_match='"3"')
+        finally:
+            DBSession.get_bind, DBSession.execute = original_bind, original_execute
+        
+        self.assertEqual(len(statements), 1)
+        sql = statements[0]
+        self.assertIn('UPDATE users SET change_seq', sql)
+        self.assertIn('FOR UPDATE OF tasks', sql)
+        self.assertIn('RETURNING tasks.title', sql)
+        self.assertIn('INSERT INTO task_logs', sql)
+        self.assertIn('IS DISTINCT FROM', sql)
+
+@unittest.skipUnless(os.getenv('TEST_POSTGRES_URL'), 'TEST_POSTGRES_URL is not set')
+class TaskUpdatePostgresTestCase(unittest.TestCase):
+    """Runs the single-statement update against a scratch PostgreSQL database"""
+    
+    def setUp(self):
+        self.engine = create_engine(os.getenv('TEST_POSTGRES_URL'))
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        DBSession.configure(bind=self.engine)
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        self.category = Category(name='Work')
+        DBSession.add_all([self.user, self.category])
+        DBSession.flush()
+        self.task = Task(title='Write report', user_id=self.user.id)
+        DBSession.add(self.task)
+        DBSession.commit()
+    
+    def tearDown(self):
+        DBSession.remove()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+    
+    def test_update_sees_its_own_writes(self):
+        """Test the returned task, user and category reflect the statement"""
+        version = self.task.change_seq
+        task = update_task_fields(self.task.id, self.user, {'status': 'completed', 'category_id': self.category.id},
+                                  version=version)
+        
+        self.assertEqual(task.status, 'completed')
+        self.assertGreater(task.change_seq, version)
+        self.assertEqual(task.user.change_seq, task.change_seq)
+        self.assertEqual(task.category.task_count, 1)
+        DBSession.commit()
+        
+        logs = DBSession.query(TaskLog).all()
+        self.assertEqual([(log.old_status, log.new_status) for log in logs], [('pending', 'completed')])
+        
+        # Same status again: the version moves, but nothing is logged
+        update_task_fields(self.task.id, self.user, {'status': 'completed'})
+        DBSession.commit()
+        self.assertEqual(DBSession.query(TaskLog).count(), 1)
+    
+    def test_stale_version_changes_nothing(self):
+        """Test a stale If-Match version is refused before anything is written"""
+        version = self.task.change_seq
+        update_task_fields(self.task.id, self.user, {'title': 'First'})
+        DBSession.commit()
+        
+        with self.assertRaises(HTTPPreconditionFailed):
+            update_task_fields(self.task.id, self.user, {'status': 'completed'}, version=version)
+        DBSession.rollback()
+        with self.assertRaises(HTTPNotFound):
+            update_task_fields(9999, self.user, {'title': 'Missing'})
+        DBSession.rollback()
+        
+        self.assertEqual(DBSession.query(Task.status).scalar(), 'pending')
+        self.assertEqual(DBSession.query(TaskLog).count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from pyramid import testing
+from pyramid.testing import DummyRequest
+from sqlalchemy import create_engine
+from tugasku_backend.database import Base, DBSession
+from tugasku_backend.models import User, Task, TaskLog
+from tugasku_backend.views.tasks import transition_filtered_tasks
+import tempfile
+import os
+
+class TaskTransitionTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        # Create temporary database
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        
+        # Setup test database
+        engine = create_engine(f'sqlite:///{self.db_path}')
+        Base.metadata.create_all(engine)
+        DBSession.configure(bind=engine)
+        
+        self.config = testing.setUp()
+        
+        self.user = User(username='testuser', email='test@example.com', password_hash='x')
+        self.other = User(username='otheruser', email='other@example.com', password_hash='x')
+        DBSession.add_all([self.user, self.other])
+        DBSession.flush()
+        
+        for i in range(10):
+            DBSession.add(Task(
+                title=f'Task {i}',
+                status='completed' if i < 2 else 'pending',
+                priority='high' if i % 2 else 'low',
+                user_id=self.user.id
+            ))
+        DBSession.add(Task(title='Foreign', status='pending', priority='high', user_id=self.other.id))
+        DBSession.commit()
+        self.token = self.user.generate_token()
+    
+    def tearDown(self):
+        testing.tearDown()
+        DBSession.remove()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def _transition(self, body, **params):
+        request = DummyRequest(json_body=body)
+        request.headers = {'Authorization': f'Bearer {self.token}'}
+        request.params = params
+        return transition_filtered_tasks(request)
+    
+    def test_dry_run_counts_without_writing(self):
+        """Test that dry runs report how many tasks would change"""
+        result = self._transition({'status': 'completed', 'dry_run': True}, priority='high')
+        self.assertEqual(result, {'status': 'completed', 'matched': 4, 'dry_run': True})
+        self.assertEqual(DBSession.query(TaskLog).count(), 0)
+    
+    def test_transition_updates_and_logs_matching_tasks(self):
+        """Test that only the user's matching tasks change, each with a log"""
+        result = self._transition({'status': 'completed'}, priority='high')
+        self.assertEqual(result['updated'], 4)
+        
+        DBSession.expire_all()
+        high = DBSession.query(Task).filter(Task.priority == 'high').all()
+        self.assertEqual(
+            sorted(task.status for task in high if task.user_id == self.user.id),
+            ['completed'] * 5
+        )
+        self.assertEqual(
+            [task.status for task in high if task.user_id == self.other.id],
+            ['pending']
+        )
+        
+        logs = DBSession.query(TaskLog).all()
+        self.assertEqual(len(logs), 4)
+        self.assertTrue(all(log.changed_by == self.user.id for log in logs))
+        self.assertEqual({log.notes for log in logs}, {'Status changed from pending to completed'})
+    
+    def test_invalid_status_rejected(self):
+        """Test that the target status is validated"""
+        from pyramid.httpexceptions import HTTPBadRequest
+        with self.assertRaises(HTTPBadRequest):
+            self._transition({'status': 'archived'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
+import configparser
 from pyramid.config import Configurator
 from pyramid.view import view_config
 from pyramid.response import Response
 from sqlalchemy import engine_from_config
-from .database.connection import DBSession, Base
-from .middleware import setup_cors, setup_error_handlers
+from .database.connection import DBSession, Base, enable_sqlite_foreign_keys
+from .middleware import setup_cors, setup_error_handlers, setup_etags
+from .middleware.auth import require_admin
 from .utils.logging import setup_logging
 from .config import get_config
+from .utils import metrics
+from .utils.passwords import calibrate_cost, set_target_cost, password_hasher
+from .utils.archive import task_archiver
 
 def root_view(request):
     """Root view - API information"""
@@ -17,18 +22,29 @@ def root_view(request):
             'health': '/api/health',
             'auth': {
                 'register': '/api/auth/register',
+                'bulk_register': '/api/auth/bulk-register',
                 'login': '/api/auth/login',
                 'profile': '/api/auth/profile'
             },
             'tasks': {
                 'list': '/api/tasks',
-                'detail': '/api/tasks/{id}'
+                'batch': '/api/tasks/batch',
+                'transition': '/api/tasks/transition',
+                'delete': '/api/tasks/delete',
+                'unarchive': '/api/tasks/unarchive',
+                'changes': '/api/tasks/changes',
+                'export': '/api/tasks/export',
+                'import': '/api/tasks/import',
+                'suggest': '/api/tasks/suggest',
+                'detail': '/api/tasks/{id}',
+                'logs': '/api/tasks/{id}/logs'
             },
             'categories': {
                 'list': '/api/categories',
                 'detail': '/api/categories/{id}'
             },
-            'dashboard': '/api/dashboard'
+            'dashboard': '/api/dashboard',
+            'metrics': '/api/metrics'
         }
     }
 
@@ -36,6 +52,18 @@ def health_check(request):
     """Health check endpoint"""
     return {'status': 'ok', 'message': 'TugasKu API is running'}
 
+@require_admin
+def metrics_view(request):
+    """Process metrics (password pool depth, hash latency, ...), for administrators"""
+    return metrics.snapshot()
+
+def server_threads(global_config) -> int:
+    """Request threads of the waitress server in the app's ini file (waitress defaults to 4)"""
+    parser = configparser.ConfigParser(interpolation=None)
+    if global_config and global_config.get('__file__'):
+        parser.read(global_config['__file__'])
+    return parser.getint('server:main', 'threads', fallback=4)
+
 def main(global_config, **settings):
     """This function returns a Pyramid WSGI application."""
     
@@ -45,6 +73,13 @@ def main(global_config, **settings):
     # Get configuration
     config_obj = get_config()
     
+    # Pick the bcrypt cost for this hardware
+    if config_obj.BCRYPT_CALIBRATE_ON_STARTUP:
+        set_target_cost(calibrate_cost(config_obj.BCRYPT_TARGET_MS))
+    
+    # Requests waiting on bcrypt must never occupy every request thread
+    password_hasher.limit_admission(server_threads(global_config))
+    
     # Update settings with config
     settings.update({
         'sqlalchemy.url': config_obj.SQLALCHEMY_URL,
@@ -53,6 +88,7 @@ def main(global_config, **settings):
     
     # Setup database
     engine = engine_from_config(settings, 'sqlalchemy.')
+    enable_sqlite_foreign_keys(engine)
     DBSession.configure(bind=engine)
     Base.metadata.bind = engine
     
@@ -63,6 +99,7 @@ def main(global_config, **settings):
     # Setup middleware
     setup_cors(config)
     setup_error_handlers(config)
+    setup_etags(config)
     
     # Root route
     config.add_route('root', '/')
@@ -76,7 +113,14 @@ def main(global_config, **settings):
     config.add_route('health', '/api/health')
     config.add_view(health_check, route_name='health', renderer='json')
     
+    # Metrics route
+    config.add_route('metrics', '/api/metrics')
+    config.add_view(metrics_view, route_name='metrics', renderer='json')
+    
     # Include views
     config.include('.views')
     
+    # Move old completed tasks to the archive in the background
+    task_archiver.start()
+    
     return config.make_wsgi_app()
@@ -16,6 +16,40 @@ class Config:
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', '24'))
     
+    # Verified-token cache (entries are re-checked against the database after the TTL)
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+    AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', '60'))
+    
+    # Password hashing pool (kept separate from the waitress request threads)
+    PASSWORD_POOL_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', '2'))
+    PASSWORD_POOL_QUEUE_SIZE = int(os.getenv('PASSWORD_POOL_QUEUE_SIZE', '8'))
+    PASSWORD_POOL_TIMEOUT_SECONDS = float(os.getenv('PASSWORD_POOL_TIMEOUT_SECONDS', '10'))
+    PASSWORD_POOL_RETRY_AFTER = int(os.getenv('PASSWORD_POOL_RETRY_AFTER', '2'))
+    
+    # bcrypt cost; calibrate_bcrypt.py (or BCRYPT_CALIBRATE_ON_STARTUP) picks it from BCRYPT_TARGET_MS
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    BCRYPT_MIN_ROUNDS = int(os.getenv('BCRYPT_MIN_ROUNDS', '10'))
+    BCRYPT_MAX_ROUNDS = int(os.getenv('BCRYPT_MAX_ROUNDS', '15'))
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '100'))
+    BCRYPT_CALIBRATE_ON_STARTUP = os.getenv('BCRYPT_CALIBRATE_ON_STARTUP', 'False').lower() == 'true'
+    
+    # Administration: no administrators unless listed, since anyone can
+    # register a free username
+    ADMIN_USERNAMES = [name.strip() for name in os.getenv('ADMIN_USERNAMES', '').split(',') if name.strip()]
+    BULK_REGISTER_MAX_USERS = int(os.getenv('BULK_REGISTER_MAX_USERS', '1000'))
+    TASK_BATCH_MAX_OPERATIONS = int(os.getenv('TASK_BATCH_MAX_OPERATIONS', '500'))
+    
+    # Login throttling (backend: memory, or sqlite to share limits between workers)
+    LOGIN_RATE_LIMIT_BACKEND = os.getenv('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_SQLITE_PATH = os.getenv('LOGIN_RATE_LIMIT_SQLITE_PATH', 'rate_limits.sqlite')
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS = int(os.getenv('LOGIN_RATE_LIMIT_WINDOW_SECONDS', '60'))
+    LOGIN_RATE_LIMIT_PER_ACCOUNT = int(os.getenv('LOGIN_RATE_LIMIT_PER_ACCOUNT', '5'))
+    LOGIN_RATE_LIMIT_PER_IP = int(os.getenv('LOGIN_RATE_LIMIT_PER_IP', '20'))
+    LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv('LOGIN_RATE_LIMIT_MAX_KEYS', '100000'))
+    
+    # Conditional GETs (ETag / If-None-Match) for task, category and dashboard reads
+    ETAGS_ENABLED = os.getenv('ETAGS_ENABLED', 'True').lower() == 'true'
+    
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
     
@@ -25,6 +59,55 @@ class Config:
     # Pagination
     DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '20'))
     MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '100'))
+    # Latest history entries embedded in GET /api/tasks/{id}; the rest via /logs
+    TASK_DETAIL_LOG_LIMIT = int(os.getenv('TASK_DETAIL_LOG_LIMIT', '10'))
+    
+    # Task history retention (maintenance.py), off unless configured: whole
+    # months kept before entries are rolled up into per-task summaries
+    # (0 = keep forever), and monthly partitions created ahead of time on
+    # PostgreSQL
+    TASK_LOG_RETENTION_MONTHS = int(os.getenv('TASK_LOG_RETENTION_MONTHS', '0'))
+    TASK_LOG_PARTITIONS_AHEAD = int(os.getenv('TASK_LOG_PARTITIONS_AHEAD', '3'))
+    
+    # Archival of completed tasks into tasks_archive, off unless configured:
+    # age since the last change (0 = never archive), tasks moved per
+    # transaction, and how often the in-process archiver runs (0 = never).
+    # Archived tasks are read-only until restored via /api/tasks/unarchive.
+    TASK_ARCHIVE_AFTER_DAYS = int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', '0'))
+    TASK_ARCHIVE_BATCH_SIZE = int(os.getenv('TASK_ARCHIVE_BATCH_SIZE', '1000'))
+    TASK_ARCHIVE_INTERVAL_SECONDS = int(os.getenv('TASK_ARCHIVE_INTERVAL_SECONDS', '0'))
+    
+    # Changes feed (/api/tasks/changes)
+    CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', '200'))
+    CHANGES_MAX_PAGE_SIZE = int(os.getenv('CHANGES_MAX_PAGE_SIZE', '1000'))
+    
+    # Export (/api/tasks/export): rows fetched per server-side cursor round trip
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+    
+    # Import (/api/tasks/import and import_tasks.py): rows validated and written per chunk
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '5000'))
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', '100'))
+    
+    # List totals: exact, cached (per user and filter set), estimated, or none
+    DEFAULT_COUNT_STRATEGY = os.getenv('DEFAULT_COUNT_STRATEGY', 'exact')
+    COUNT_CACHE_SIZE = int(os.getenv('COUNT_CACHE_SIZE', '10000'))
+    COUNT_CACHE_TTL_SECONDS = int(os.getenv('COUNT_CACHE_TTL_SECONDS', '300'))
+    COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD', '10000'))
+    
+    # Full-text search (PostgreSQL text search configuration for the task index)
+    SEARCH_LANGUAGE = os.getenv('SEARCH_LANGUAGE', 'simple')
+    # search_mode=fuzzy: minimum share of the query's trigrams a task must contain
+    SEARCH_FUZZY_THRESHOLD = float(os.getenv('SEARCH_FUZZY_THRESHOLD', '0.3'))
+    # Users whose in-process trigram index is kept when pg_trgm is unavailable
+    SEARCH_NGRAM_CACHE_SIZE = int(os.getenv('SEARCH_NGRAM_CACHE_SIZE', '256'))
+    # Most task ids an in-process index match may bind into the query: fuzzy
+    # keeps the best scoring, substring falls back to ILIKE beyond it
+    SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', '500'))
+    
+    # Title autocomplete (/api/tasks/suggest): per-user prefix indexes share this budget
+    SUGGEST_MEMORY_BUDGET_BYTES = int(os.getenv('SUGGEST_MEMORY_BUDGET_BYTES', str(32 * 1024 * 1024)))
+    SUGGEST_DEFAULT_LIMIT = int(os.getenv('SUGGEST_DEFAULT_LIMIT', '10'))
+    SUGGEST_MAX_LIMIT = int(os.getenv('SUGGEST_MAX_LIMIT', '50'))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
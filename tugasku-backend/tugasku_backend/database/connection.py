@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, func, text
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from ..config import get_config
@@ -22,6 +22,58 @@ engine_kwargs = {
 
 engine = create_engine(config.SQLALCHEMY_URL, **engine_kwargs)
 
+# Foreign keys that delete their rows along with the referenced one
+CASCADING_FOREIGN_KEYS = (
+    ('tasks', 'user_id', 'users'),
+    ('task_logs', 'task_id', 'tasks'),
+    ('task_tombstones', 'user_id', 'users'),
+)
+
+def sqlite_foreign_key_cascades(connection, table: str, column: str, referred: str) -> bool:
+    """Whether an SQLite table's foreign key has ON DELETE CASCADE (True if the table is missing)"""
+    if connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).first() is None:
+        return True
+    # Rows: id, seq, table, from, to, on_update, on_delete, match
+    return any(
+        row[2] == referred and row[3] == column and row[6] == 'CASCADE'
+        for row in connection.exec_driver_sql(f"PRAGMA foreign_key_list({table})")
+    )
+
+def _foreign_keys_on(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+def enable_sqlite_foreign_keys(bind) -> bool:
+    """Have SQLite enforce foreign keys (and so ON DELETE CASCADE) on this engine
+
+    Only once its tables carry the cascades (run_migrations rebuilds older
+    ones): enforcing the old definitions would make task deletes fail.
+    Other engines in the process are left alone. Call at startup; pooled
+    connections are closed so every connection gets the setting.
+    """
+    if bind.dialect.name != 'sqlite':
+        return False
+    with bind.connect() as connection:
+        migrated = all(sqlite_foreign_key_cascades(connection, *fk) for fk in CASCADING_FOREIGN_KEYS)
+    if not migrated:
+        logger.warning("SQLite foreign keys not enforced until migrations add ON DELETE CASCADE")
+        return False
+    if not event.contains(bind, 'connect', _foreign_keys_on):
+        event.listen(bind, 'connect', _foreign_keys_on)
+    bind.dispose()
+    return True
+
+def local_now(dialect_name: str):
+    """The database clock as the ORM's now() defaults store it: a naive timestamp
+
+    On PostgreSQL that is LOCALTIMESTAMP, since now() is a timestamptz;
+    SQLite's CURRENT_TIMESTAMP is already naive.
+    """
+    return func.localtimestamp() if dialect_name == 'postgresql' else func.now()
+
 # Create session
 DBSession = scoped_session(sessionmaker(bind=engine))
 
@@ -37,12 +89,16 @@ def init_db():
         test_connection()
         
         # Import models to register them
-        from ..models import User, Task, Category, TaskLog
+        from ..models import (User, Task, Category, TaskLog, TaskTombstone, TaskLogRollup,
+                              TaskArchive, TaskArchiveStats)
+        
+        # Registers the full-text index DDL that runs after the tasks table is created
+        from ..utils import search
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
-        
+    
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
         raise
@@ -1,15 +1,127 @@
-from sqlalchemy import text
-from .connection import engine, DBSession
+from sqlalchemy import text, inspect
+from sqlalchemy.schema import CreateTable
+from .connection import (engine, DBSession, Base, CASCADING_FOREIGN_KEYS, sqlite_foreign_key_cascades,
+                         enable_sqlite_foreign_keys)
 import logging
 
 logger = logging.getLogger(__name__)
 
+_SUPERSEDED_INDEXES = (
+    'idx_tasks_user_id', 'idx_tasks_category_id', 'idx_tasks_status',
+    'idx_tasks_priority', 'idx_tasks_due_date', 'idx_task_logs_task_id',
+)
+
+def _add_column(conn, table: str, column: str, definition: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    existing = {col['name'] for col in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        logger.info(f"Added column {table}.{column}")
+
+def _cascade_foreign_key(conn, table: str, column: str, referred: str) -> None:
+    """Recreate a foreign key with ON DELETE CASCADE unless it already has it"""
+    for fk in inspect(conn).get_foreign_keys(table):
+        if fk['constrained_columns'] != [column] or fk['referred_table'] != referred:
+            continue
+        if (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE':
+            return
+        name = fk['name']
+        conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {name}"))
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {referred} (id) ON DELETE CASCADE"
+        ))
+        logger.info(f"Foreign key {table}.{column} now cascades deletes")
+
+def _rebuild_sqlite_table(conn, name: str) -> None:
+    """Recreate an SQLite table from its model, keeping its rows
+
+    SQLite cannot alter constraints, so the table is copied into a new one
+    with the model's definition, which then takes the old one's place.
+    """
+    table = Base.metadata.tables[name]
+    rebuilt = f'{name}_rebuilt'
+    existing = {col['name'] for col in inspect(conn).get_columns(name)}
+    columns = ', '.join(column.name for column in table.c if column.name in existing)
+    
+    create = str(CreateTable(table).compile(dialect=conn.dialect)).replace(
+        f'CREATE TABLE {name} ', f'CREATE TABLE {rebuilt} ', 1
+    )
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {rebuilt}")
+    conn.exec_driver_sql(create)
+    conn.exec_driver_sql(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {name}")
+    conn.exec_driver_sql(f"DROP TABLE {name}")
+    conn.exec_driver_sql(f"ALTER TABLE {rebuilt} RENAME TO {name}")
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+    logger.info(f"Rebuilt {name} so its foreign keys cascade deletes")
+
+def _cascade_sqlite_foreign_keys(bind) -> None:
+    """Rebuild SQLite tables whose foreign keys lack ON DELETE CASCADE, then enforce them"""
+    with bind.begin() as conn:
+        # Must be off while tables are dropped and renamed
+        conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        for table, column, referred in CASCADING_FOREIGN_KEYS:
+            if not sqlite_foreign_key_cascades(conn, table, column, referred):
+                _rebuild_sqlite_table(conn, table)
+    enable_sqlite_foreign_keys(bind)
+
 def run_migrations():
     """Run database migrations"""
     try:
         # Add any migration scripts here
         logger.info("Running database migrations...")
         
+        from ..models import (Task, TaskLog, TaskTombstone, TaskLogRollup, TaskArchive, TaskArchiveStats,
+                              ChangeCounter)
+        
+        # Change sequences and tombstones for the task changes feed, and the
+        # shared versions that caches and ETags are keyed on
+        with engine.begin() as conn:
+            _add_column(conn, 'users', 'change_seq', 'BIGINT NOT NULL DEFAULT 0')
+            _add_column(conn, 'tasks', 'change_seq', 'BIGINT NOT NULL DEFAULT 0')
+            Base.metadata.create_all(conn, tables=[TaskTombstone.__table__, ChangeCounter.__table__])
+            for index in Task.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        
+        # Task history: composite index and retention summaries. Monthly
+        # partitioning on PostgreSQL is an explicit step of maintenance.py.
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn, tables=[TaskLogRollup.__table__])
+            for index in TaskLog.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        
+        # Single-column indexes from database_schema.sql, superseded by the
+        # composite indexes declared on the models
+        with engine.begin() as conn:
+            for name in _SUPERSEDED_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        
+        # Deletes cascade in the database, so the ORM never loads a task's
+        # history (or a user's tasks) just to delete them. SQLite cannot alter
+        # constraints, so its tables are rebuilt before foreign keys are enforced.
+        if engine.dialect.name == 'postgresql':
+            with engine.begin() as conn:
+                for table, column, referred in CASCADING_FOREIGN_KEYS:
+                    _cascade_foreign_key(conn, table, column, referred)
+        elif engine.dialect.name == 'sqlite':
+            _cascade_sqlite_foreign_keys(engine)
+        
+        # Archive of old completed tasks, its per-user counts, the index the
+        # archiver finds them by and the archive's indexes for every list sort
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn, tables=[TaskArchive.__table__, TaskArchiveStats.__table__])
+            for index in Task.__table__.indexes:
+                if index.name == 'ix_tasks_status_updated':
+                    index.create(conn, checkfirst=True)
+            for index in TaskArchive.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        
+        # Full-text and trigram indexes on tasks (no-op when they already exist)
+        from ..utils.search import install_search_index
+        with engine.begin() as conn:
+            install_search_index(conn)
+        
         # Example migration
         # with engine.connect() as conn:
         #     conn.execute(text("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS archived BOOLEAN DEFAULT FALSE"))
@@ -1,5 +1,6 @@
 from .auth import AuthMiddleware
 from .cors import setup_cors
 from .error_handler import setup_error_handlers
+from .etag import setup_etags
 
-__all__ = ['AuthMiddleware', 'setup_cors', 'setup_error_handlers']
+__all__ = ['AuthMiddleware', 'setup_cors', 'setup_error_handlers', 'setup_etags']
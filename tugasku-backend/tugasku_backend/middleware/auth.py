@@ -1,13 +1,82 @@
 import jwt
 import logging
-from pyramid.httpexceptions import HTTPUnauthorized
+import threading
+import time
+from pyramid.httpexceptions import HTTPUnauthorized, HTTPForbidden
+from sqlalchemy import event
 from ..database.connection import DBSession
 from ..models.user import User
+from ..utils.cache import LRUCache
 from ..config import get_config
 
 config = get_config()
 logger = logging.getLogger(__name__)
 
+# token -> (user_id, username, revocation stamp); entries expire at the token's
+# exp or after AUTH_CACHE_TTL_SECONDS, whichever comes first
+_token_cache = LRUCache(config.AUTH_CACHE_SIZE)
+_revocations = {}
+_revocations_lock = threading.Lock()
+
+class CurrentUser:
+    """Authenticated user snapshot; the ORM User is loaded only when needed"""
+    
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+        self._user = None
+    
+    @property
+    def user(self) -> User:
+        """Load the full User row on first access"""
+        if self._user is None:
+            self._user = DBSession.query(User).filter(
+                User.id == self.id,
+                User.is_active == True
+            ).first()
+            if self._user is None:
+                raise HTTPUnauthorized('User not found or inactive')
+        return self._user
+    
+    def __getattr__(self, name):
+        # Only reached for attributes not on the snapshot (email, to_dict, ...)
+        return getattr(self.user, name)
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Invalidate cached tokens of a user in this process"""
+    with _revocations_lock:
+        _revocations[user_id] = _revocations.get(user_id, 0) + 1
+
+def _on_active_changed(target, value, oldvalue, initiator):
+    if target.id is not None:
+        revoke_user_tokens(target.id)
+
+event.listen(User.is_active, 'set', _on_active_changed)
+
+def _verify_token(token: str) -> CurrentUser:
+    """Decode the token and check the user against the database"""
+    payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
+    user_id = payload.get('user_id')
+    
+    logger.debug(f"Token decoded successfully for user_id: {user_id}")
+    
+    stamp = _revocations.get(user_id, 0)
+    row = DBSession.query(User.id, User.username).filter(
+        User.id == user_id,
+        User.is_active == True
+    ).first()
+    
+    if not row:
+        logger.warning(f"User not found or inactive for user_id: {user_id}")
+        raise HTTPUnauthorized('User not found or inactive')
+    
+    expires_at = time.time() + config.AUTH_CACHE_TTL_SECONDS
+    if payload.get('exp'):
+        expires_at = min(expires_at, float(payload['exp']))
+    _token_cache.set(token, (row.id, row.username, stamp), expires_at)
+    
+    return CurrentUser(row.id, row.username)
+
 def get_current_user(request):
     """Extract user from JWT token"""
     auth_header = request.headers.get('Authorization')
@@ -17,24 +86,20 @@ def get_current_user(request):
     
     token = auth_header.split(' ')[1]
     
+    cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, username, stamp = cached
+        if _revocations.get(user_id, 0) == stamp:
+            return CurrentUser(user_id, username)
+        _token_cache.pop(token)
+    
     try:
-        payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-        user_id = payload.get('user_id')
-        
-        logger.debug(f"Token decoded successfully for user_id: {user_id}")
-        
-        user = DBSession.query(User).filter(
-            User.id == user_id, 
-            User.is_active == True
-        ).first()
-        
-        if not user:
-            logger.warning(f"User not found or inactive for user_id: {user_id}")
-            raise HTTPUnauthorized('User not found or inactive')
-        
+        user = _verify_token(token)
         logger.debug(f"User authenticated: {user.username} (ID: {user.id})")
         return user
-        
+    
+    except HTTPUnauthorized:
+        raise
     except jwt.ExpiredSignatureError:
         logger.warning("Token has expired")
         raise HTTPUnauthorized('Token has expired')
@@ -52,6 +117,17 @@ def require_auth(func):
         return func(request)
     return wrapper
 
+def require_admin(func):
+    """Decorator for endpoints restricted to administrators (ADMIN_USERNAMES)"""
+    def wrapper(request):
+        user = get_current_user(request)
+        if user.username not in config.ADMIN_USERNAMES:
+            logger.warning(f"Admin access denied for user: {user.username}")
+            raise HTTPForbidden('Administrator access required')
+        request.current_user = user
+        return func(request)
+    return wrapper
+
 class AuthMiddleware:
     """Authentication middleware"""
     
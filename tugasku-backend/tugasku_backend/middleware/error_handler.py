@@ -3,11 +3,17 @@ from pyramid.httpexceptions import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Headers from the raised exception that must survive into the JSON response
+PASSTHROUGH_HEADERS = ('Retry-After',)
+
 def http_exception_view(exc, request):
     """Handle HTTP exceptions"""
     logger.warning(f"HTTP Exception: {exc.status_code} - {exc.detail}")
     
     request.response.status_code = exc.status_code
+    for header in PASSTHROUGH_HEADERS:
+        if header in exc.headers:
+            request.response.headers[header] = exc.headers[header]
     return {
         'error': exc.detail or exc.title,
         'status_code': exc.status_code
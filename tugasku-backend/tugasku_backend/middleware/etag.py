@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import re
+from pyramid.events import NewResponse
+from pyramid.httpexceptions import HTTPNotModified, HTTPUnauthorized
+from .auth import get_current_user
+from ..utils import metrics
+from ..utils.change_tracking import get_versions
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+# GET endpoints whose responses only change with the user's tasks or the categories
+CONDITIONAL_PATHS = ('/api/tasks', '/api/categories', '/api/dashboard')
+
+# A single task carries its own strong validator, the task version that
+# If-Match on PUT expects, so it is left to the view
+_TASK_DETAIL_PATH = re.compile(r'^/api/tasks/\d+$')
+
+def compute_etag(request, user_id: int) -> str:
+    """Weak validator for a GET from a user at the current versions
+
+    The versions are read from the database on every request, so writes
+    from other processes change the tag as well.
+    """
+    user_version, category_version = get_versions(user_id)
+    query = '&'.join(f'{key}={value}' for key, value in sorted(request.GET.items()))
+    raw = f'{user_version}:{category_version}:{user_id}:{request.path}:{query}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def etag_tween_factory(handler, registry):
+    """Answer conditional GETs with 304 Not Modified before the view runs"""
+    
+    def etag_tween(request):
+        if request.method != 'GET' or not request.path.startswith(CONDITIONAL_PATHS):
+            return handler(request)
+        if _TASK_DETAIL_PATH.match(request.path):
+            return handler(request)
+        
+        try:
+            user = get_current_user(request)
+        except HTTPUnauthorized:
+            # Let the view produce the error response
+            return handler(request)
+        
+        # Taken before the view runs: a write committing meanwhile only makes
+        # this tag stale, never the cached body
+        etag = compute_etag(request, user.id)
+        
+        if etag in request.if_none_match:
+            metrics.increment('etag.not_modified')
+            response = HTTPNotModified()
+        else:
+            response = handler(request)
+            if response.status_code != 200:
+                return response
+        
+        response.headers['ETag'] = f'W/"{etag}"'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['Vary'] = 'Authorization'
+        if response.status_code == 304:
+            # Give the short-circuited response the same headers (CORS) as the rest
+            registry.notify(NewResponse(request, response))
+        return response
+    
+    return etag_tween
+
+def setup_etags(config):
+    """Register the conditional GET tween"""
+    if get_config().ETAGS_ENABLED:
+        config.add_tween('tugasku_backend.middleware.etag.etag_tween_factory')
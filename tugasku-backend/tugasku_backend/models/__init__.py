@@ -2,5 +2,11 @@ from .user import User
 from .task import Task
 from .category import Category
 from .task_log import TaskLog
+from .task_tombstone import TaskTombstone
+from .task_log_rollup import TaskLogRollup
+from .task_archive import TaskArchive
+from .task_archive_stats import TaskArchiveStats
+from .change_counter import ChangeCounter
 
-__all__ = ['User', 'Task', 'Category', 'TaskLog']
+__all__ = ['User', 'Task', 'Category', 'TaskLog', 'TaskTombstone', 'TaskLogRollup',
+           'TaskArchive', 'TaskArchiveStats', 'ChangeCounter']
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, select, func
+from sqlalchemy.orm import relationship, column_property
 from .base import BaseModel
+from .task import Task
 
 class Category(BaseModel):
     __tablename__ = 'categories'
@@ -19,5 +20,15 @@ class Category(BaseModel):
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'task_count': len(self.tasks) if self.tasks else 0
+            'task_count': self.task_count or 0
         }
+
+# Number of tasks in the category, computed by the database as a correlated
+# subquery; deferred, so queries that need it use undefer(Category.task_count)
+Category.task_count = column_property(
+    select(func.count(Task.id))
+    .where(Task.category_id == Category.id)
+    .correlate_except(Task)
+    .scalar_subquery(),
+    deferred=True
+)
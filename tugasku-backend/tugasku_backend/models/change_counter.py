@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, BigInteger
+from ..database.connection import Base
+
+class ChangeCounter(Base):
+    """Named version counter shared by every process (see utils.change_tracking)"""
+    __tablename__ = 'change_counters'
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -1,36 +1,70 @@
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, BigInteger, Index
+from sqlalchemy.orm import relationship, synonym
 from .base import BaseModel
 
 class Task(BaseModel):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_user_change_seq', 'user_id', 'change_seq', 'id'),
+        # Task lists always filter on the owner, then optionally on one of
+        # status/priority/category, and order by a column with id as the
+        # tie-breaker; these serve each of those without a sort of the table
+        Index('ix_tasks_user_id', 'user_id', 'id'),
+        Index('ix_tasks_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_tasks_user_updated', 'user_id', 'updated_at', 'id'),
+        Index('ix_tasks_user_due_date', 'user_id', 'due_date', 'id'),
+        Index('ix_tasks_user_title', 'user_id', 'title', 'id'),
+        Index('ix_tasks_user_status', 'user_id', 'status', 'id'),
+        Index('ix_tasks_user_priority', 'user_id', 'priority', 'id'),
+        Index('ix_tasks_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        Index('ix_tasks_user_priority_created', 'user_id', 'priority', 'created_at', 'id'),
+        Index('ix_tasks_user_category_created', 'user_id', 'category_id', 'created_at', 'id'),
+        # Category task counts
+        Index('ix_tasks_category_id', 'category_id'),
+        # The archiver's scan for completed tasks, oldest first
+        Index('ix_tasks_status_updated', 'status', 'updated_at', 'id'),
+        # Never reuse ids of deleted tasks, which live on as tombstones
+        {'sqlite_autoincrement': True},
+    )
 
     title = Column(String(255), nullable=False)
     description = Column(Text)
     status = Column(String(50), default='pending')  # pending, in_progress, completed
     priority = Column(String(20), default='medium')  # low, medium, high
     due_date = Column(DateTime)
+    # Owner's change sequence at the last write (see utils.change_tracking)
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default='0')
+    # Exposed as the task's version for If-Match on updates
+    version = synonym('change_seq')
     
     # Foreign Keys
-    user_id = Column(ForeignKey('users.id'), nullable=False)
+    user_id = Column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     category_id = Column(ForeignKey('categories.id'), nullable=True)
 
     # Relationships
     user = relationship('User', back_populates='tasks')
     category = relationship('Category', back_populates='tasks')
-    logs = relationship('TaskLog', back_populates='task', cascade='all, delete-orphan')
+    # History goes with the task through ON DELETE CASCADE, without loading it
+    logs = relationship('TaskLog', back_populates='task', cascade='all, delete-orphan', passive_deletes=True)
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'user': self.user.to_dict() if self.user else None,
-            'category': self.category.to_dict() if self.category else None
+    # Keys of to_dict(); user and category are the expandable relationships
+    DICT_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date',
+                   'created_at', 'updated_at', 'version', 'user', 'category')
+    RELATIONSHIPS = ('user', 'category')
+
+    def to_dict(self, fields=None) -> dict:
+        """Convert to dictionary; with fields, only those attributes are read"""
+        values = {
+            'id': lambda: self.id,
+            'title': lambda: self.title,
+            'description': lambda: self.description,
+            'status': lambda: self.status,
+            'priority': lambda: self.priority,
+            'due_date': lambda: self.due_date.isoformat() if self.due_date else None,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
+            'version': lambda: self.change_seq,
+            'user': lambda: self.user.to_dict() if self.user else None,
+            'category': lambda: self.category.to_dict() if self.category else None
         }
+        return {field: values[field]() for field in (fields or self.DICT_FIELDS)}
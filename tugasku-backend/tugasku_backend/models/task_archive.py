@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..database.connection import Base
+
+class TaskArchive(Base):
+    """Completed task moved out of tasks by the archiver (see utils.archive)
+
+    The first columns mirror tasks so the two tables can be read as one with
+    UNION ALL; the task keeps its id. Its history is folded into the counts.
+    """
+    __tablename__ = 'tasks_archive'
+    # Every sort of the task list, so the archived half of a listing is read
+    # in order like the live one
+    __table_args__ = (
+        Index('ix_tasks_archive_user_id', 'user_id', 'id'),
+        Index('ix_tasks_archive_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_tasks_archive_user_updated', 'user_id', 'updated_at', 'id'),
+        Index('ix_tasks_archive_user_due_date', 'user_id', 'due_date', 'id'),
+        Index('ix_tasks_archive_user_title', 'user_id', 'title', 'id'),
+        Index('ix_tasks_archive_user_status', 'user_id', 'status', 'id'),
+        Index('ix_tasks_archive_user_priority', 'user_id', 'priority', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text)
+    status = Column(String(50))
+    priority = Column(String(20))
+    due_date = Column(DateTime)
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default='0')
+    user_id = Column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    category_id = Column(ForeignKey('categories.id', ondelete='SET NULL'), nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=func.now())
+    log_entries = Column(Integer, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)  # entries moving to completed
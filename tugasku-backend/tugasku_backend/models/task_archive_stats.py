@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from ..database.connection import Base
+
+class TaskArchiveStats(Base):
+    """Per-user count of archived tasks, kept by the archiver for the dashboard"""
+    __tablename__ = 'task_archive_stats'
+
+    user_id = Column(ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    archived_tasks = Column(Integer, nullable=False, default=0)
+    last_archived_at = Column(DateTime)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            'archived_tasks': self.archived_tasks,
+            'last_archived_at': self.last_archived_at.isoformat() if self.last_archived_at else None
+        }
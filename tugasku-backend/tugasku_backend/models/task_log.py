@@ -1,11 +1,16 @@
-from sqlalchemy import Column, String, Text, ForeignKey
+from sqlalchemy import Column, String, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class TaskLog(BaseModel):
     __tablename__ = 'task_logs'
+    __table_args__ = (
+        # A task's history, newest first; on PostgreSQL the table can also
+        # be range-partitioned by created_at (see utils.log_partitions)
+        Index('ix_task_logs_task_created', 'task_id', 'created_at', 'id'),
+    )
 
-    task_id = Column(ForeignKey('tasks.id'), nullable=False)
+    task_id = Column(ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False)
     old_status = Column(String(50))
     new_status = Column(String(50), nullable=False)
     changed_by = Column(ForeignKey('users.id'), nullable=False)
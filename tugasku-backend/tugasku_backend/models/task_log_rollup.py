@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from ..database.connection import Base
+
+class TaskLogRollup(Base):
+    """Summary of a task's history entries removed by the retention policy"""
+    __tablename__ = 'task_log_rollups'
+
+    task_id = Column(ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    entries = Column(Integer, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)  # entries moving to completed
+    first_at = Column(DateTime)
+    last_at = Column(DateTime)
+    last_status = Column(String(50))
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            'entries': self.entries,
+            'completions': self.completions,
+            'first_at': self.first_at.isoformat() if self.first_at else None,
+            'last_at': self.last_at.isoformat() if self.last_at else None,
+            'last_status': self.last_status
+        }
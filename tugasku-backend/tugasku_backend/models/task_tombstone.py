@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..database.connection import Base
+
+class TaskTombstone(Base):
+    """Marker left behind by a deleted task, for the changes feed"""
+    __tablename__ = 'task_tombstones'
+    __table_args__ = (
+        Index('ix_task_tombstones_user_change_seq', 'user_id', 'change_seq', 'task_id'),
+    )
+
+    task_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=func.now())
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            'id': self.task_id,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
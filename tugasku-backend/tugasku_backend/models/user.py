@@ -1,10 +1,10 @@
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, BigInteger
 from sqlalchemy.orm import relationship
 from .base import BaseModel
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
 from ..config import get_config
+from ..utils.passwords import password_hasher, needs_rehash, PasswordPoolBusy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,45 +12,57 @@ config = get_config()
 
 class User(BaseModel):
     __tablename__ = 'users'
-
+    
     username = Column(String(50), unique=True, nullable=False)
     email = Column(String(120), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
-
+    # Bumped once per transaction that writes this user's tasks
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default='0')
+    
     # Relationships
-    tasks = relationship('Task', back_populates='user', cascade='all, delete-orphan')
-
+    # Tasks (and their history) go with the user through ON DELETE CASCADE
+    tasks = relationship('Task', back_populates='user', cascade='all, delete-orphan', passive_deletes=True)
+    
     def set_password(self, password: str) -> None:
         """Hash and set password"""
         try:
-            self.password_hash = bcrypt.hashpw(
-                password.encode('utf-8'), 
-                bcrypt.gensalt()
-            ).decode('utf-8')
+            self.password_hash = password_hasher.hash(password)
+        except PasswordPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Error setting password: {e}")
             raise
-
+    
     def check_password(self, password: str) -> bool:
-        """Verify password"""
+        """Verify password, rehashing it if its cost differs from the target"""
         try:
             # Log for debugging
             logger.debug(f"Checking password for user: {self.username}")
             
-            # Ensure password and hash are properly encoded
-            password_bytes = password.encode('utf-8')
-            hash_bytes = self.password_hash.encode('utf-8')
-            
-            # Check password
-            result = bcrypt.checkpw(password_bytes, hash_bytes)
+            # Check password on the bounded hashing pool
+            result = password_hasher.verify(password, self.password_hash)
             
             logger.debug(f"Password check result: {result}")
+            
+            if result and needs_rehash(self.password_hash):
+                self._rehash(password)
             return result
+        except PasswordPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Error checking password: {e}")
             return False
-
+    
+    def _rehash(self, password: str) -> None:
+        """Re-hash a verified password at the current target cost"""
+        try:
+            self.set_password(password)
+            logger.info(f"Rehashed password for user: {self.username}")
+        except PasswordPoolBusy:
+            # Not worth failing the login over; try again next time
+            logger.debug(f"Skipped rehash for user: {self.username}")
+    
     def generate_token(self) -> str:
         """Generate JWT token"""
         try:
@@ -63,7 +75,7 @@ class User(BaseModel):
         except Exception as e:
             logger.error(f"Error generating token: {e}")
             raise
-
+    
     def to_dict(self) -> dict:
         """Convert to dictionary (exclude sensitive data)"""
         return {
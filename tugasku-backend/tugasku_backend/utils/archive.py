@@ -0,0 +1,238 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import select, insert, update, delete, union_all, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+from . import metrics
+from .change_tracking import (bump_category_version, mark_tasks_changed, mark_categories_changed,
+                              next_change_seq)
+from .filters import column_filter_conditions, archive_search_condition
+from .search import search_condition, DEFAULT_SEARCH_MODE
+from ..database.connection import DBSession, local_now
+from ..models.user import User
+from ..models.task import Task
+from ..models.task_log import TaskLog
+from ..models.task_tombstone import TaskTombstone
+from ..models.task_log_rollup import TaskLogRollup
+from ..models.task_archive import TaskArchive
+from ..models.task_archive_stats import TaskArchiveStats
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+# Columns shared by tasks and tasks_archive, in the order of tasks
+_TASK_COLUMNS = [column.name for column in Task.__table__.c]
+
+def tasks_with_archive(filters: Dict[str, Any], user_id: int):
+    """Task entity over a user's live and archived tasks matching the filters
+
+    The owner and exact-match filters are applied to the UNION ALL as a
+    whole; both databases push them down into each half, and PostgreSQL
+    only merges the halves in index order when they carry no WHERE of their
+    own. A search, which is matched differently in the archive, narrows each
+    half inside it; its matches are then sorted.
+    """
+    archive = TaskArchive.__table__
+    live = select(*Task.__table__.c)
+    archived = select(*(archive.c[name] for name in _TASK_COLUMNS))
+    search = filters.get('search')
+    if search:
+        live = live.where(search_condition(search, filters.get('search_mode', DEFAULT_SEARCH_MODE), user_id))
+        archived = archived.where(archive_search_condition(search))
+    both = union_all(live, archived).subquery('tasks_both')
+    return aliased(Task, select(both).where(*column_filter_conditions(both.c, filters, user_id)).subquery('tasks_all'))
+
+def archive_batch(connection, cutoff: datetime, batch_size: int) -> List[Any]:
+    """Move up to batch_size tasks completed before cutoff into tasks_archive
+
+    The task's history is counted into the archived row and then removed
+    with the task by ON DELETE CASCADE. Each moved task leaves a tombstone
+    for the changes feed, as a delete does. Returns the (id, user_id) rows
+    moved.
+    """
+    tasks = Task.__table__
+    logs = TaskLog.__table__
+    rollups = TaskLogRollup.__table__
+    archive = TaskArchive.__table__
+    stats = TaskArchiveStats.__table__
+    pg = connection.dialect.name == 'postgresql'
+    
+    eligible = [tasks.c.status == 'completed', tasks.c.updated_at < cutoff]
+    # Oldest first, straight off ix_tasks_status_updated
+    candidates = select(tasks.c.id).where(*eligible).order_by(
+        tasks.c.updated_at, tasks.c.id
+    ).limit(batch_size)
+    if pg:
+        # Tasks being edited are left for the next run, and concurrent
+        # archivers take disjoint batches
+        candidates = candidates.with_for_update(skip_locked=True)
+    ids = connection.execute(candidates).scalars().all()
+    if not ids:
+        return []
+    # Checked again by every statement, in case a task changed since
+    eligible.append(tasks.c.id.in_(ids))
+    
+    entries = select(func.count()).where(logs.c.task_id == tasks.c.id).scalar_subquery()
+    completions = select(func.count()).where(
+        logs.c.task_id == tasks.c.id,
+        logs.c.new_status == 'completed'
+    ).scalar_subquery()
+    connection.execute(insert(archive).from_select(
+        _TASK_COLUMNS + ['archived_at', 'log_entries', 'completions'],
+        select(
+            *tasks.c,
+            func.now(),
+            entries + func.coalesce(rollups.c.entries, 0),
+            completions + func.coalesce(rollups.c.completions, 0)
+        ).select_from(
+            tasks.outerjoin(rollups, rollups.c.task_id == tasks.c.id)
+        ).where(*eligible)
+    ))
+    
+    dialect_insert = postgresql.insert if pg else sqlite.insert
+    statement = dialect_insert(stats).from_select(
+        ['user_id', 'archived_tasks', 'last_archived_at'],
+        select(tasks.c.user_id, func.count(), func.now()).where(*eligible).group_by(tasks.c.user_id)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'archived_tasks': stats.c.archived_tasks + statement.excluded.archived_tasks,
+            'last_archived_at': statement.excluded.last_archived_at
+        }
+    )
+    connection.execute(statement)
+    
+    # Lists, counts and caches of these users and of the categories go stale,
+    # and synced clients learn of the moved tasks through tombstones
+    users = User.__table__
+    tombstones = TaskTombstone.__table__
+    connection.execute(update(users).where(
+        users.c.id.in_(select(tasks.c.user_id).where(*eligible))
+    ).values(change_seq=users.c.change_seq + 1, updated_at=users.c.updated_at))
+    bump_category_version(connection)
+    connection.execute(insert(tombstones).from_select(
+        ['task_id', 'user_id', 'change_seq'],
+        select(tasks.c.id, tasks.c.user_id, users.c.change_seq).select_from(
+            tasks.join(users, users.c.id == tasks.c.user_id)
+        ).where(*eligible)
+    ))
+    
+    return connection.execute(
+        delete(tasks).where(*eligible).returning(tasks.c.id, tasks.c.user_id)
+    ).all()
+
+def archive_completed_tasks(bind=None, days: int = None, batch_size: int = None,
+                            now: datetime = None) -> int:
+    """Archive every task completed more than ``days`` ago, a batch per transaction
+
+    Returns the number of tasks archived. A threshold of 0 days archives nothing.
+    The cutoff is taken from the database clock, which stamps updated_at,
+    unless ``now`` is given.
+    """
+    days = config.TASK_ARCHIVE_AFTER_DAYS if days is None else days
+    if days <= 0:
+        return 0
+    batch_size = batch_size or config.TASK_ARCHIVE_BATCH_SIZE
+    bind = bind or DBSession.get_bind()
+    if now is None:
+        with bind.connect() as connection:
+            now = connection.execute(select(local_now(connection.dialect.name))).scalar()
+    cutoff = now - timedelta(days=days)
+    
+    archived = 0
+    while True:
+        with bind.begin() as connection:
+            moved = archive_batch(connection, cutoff, batch_size)
+        archived += len(moved)
+        if len(moved) < batch_size:
+            break
+    
+    metrics.increment('tasks.archived', archived)
+    logger.info(f"Archived {archived} tasks completed before {cutoff:%Y-%m-%d}")
+    return archived
+
+def restore_tasks(user, ids: List[int]) -> Dict[str, Any]:
+    """Move the user's archived tasks with the given ids back into tasks
+
+    Restored tasks keep their ids and get a new change sequence, so they can
+    be read, reopened and deleted again. Their folded history becomes the
+    task's retention summary. The archiver takes them again once they are
+    old enough, unless they are reopened.
+    """
+    tasks = Task.__table__
+    archive = TaskArchive.__table__
+    stats = TaskArchiveStats.__table__
+    
+    try:
+        # Locked on PostgreSQL so a concurrent restore cannot insert them twice
+        restored_ids = DBSession.execute(
+            select(archive.c.id).where(archive.c.user_id == user.id, archive.c.id.in_(ids)).with_for_update()
+        ).scalars().all()
+        if restored_ids:
+            selected = archive.c.id.in_(restored_ids)
+            seq = next_change_seq(DBSession, user.id)
+            restamped = {'change_seq': literal(seq), 'updated_at': func.now()}
+            DBSession.execute(insert(tasks).from_select(
+                _TASK_COLUMNS,
+                select(*(restamped.get(name, archive.c[name]) for name in _TASK_COLUMNS)).where(selected)
+            ))
+            DBSession.execute(insert(TaskLogRollup.__table__).from_select(
+                ['task_id', 'entries', 'completions', 'last_status'],
+                select(archive.c.id, archive.c.log_entries, archive.c.completions, archive.c.status).where(
+                    selected, archive.c.log_entries > 0
+                )
+            ))
+            DBSession.execute(update(stats).where(stats.c.user_id == user.id).values(
+                archived_tasks=stats.c.archived_tasks - len(restored_ids)
+            ))
+            DBSession.execute(delete(archive).where(selected))
+            # Their ids may be archived, and tombstoned, again
+            DBSession.execute(delete(TaskTombstone).where(TaskTombstone.task_id.in_(restored_ids)))
+            
+            mark_tasks_changed(DBSession, user.id)
+            # The tasks count towards their categories again
+            mark_categories_changed(DBSession)
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+    
+    metrics.increment('tasks.restored', len(restored_ids))
+    logger.info(f"Restored {len(restored_ids)} archived tasks for user {user.username}")
+    return {'restored': len(restored_ids), 'ids': sorted(restored_ids)}
+
+class TaskArchiver:
+    """Runs archive_completed_tasks on a daemon thread every interval"""
+    
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self) -> None:
+        """Start the thread, unless it is running or the interval is 0"""
+        if self.interval_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='task-archiver', daemon=True)
+        self._thread.start()
+        logger.info(f"Task archiver running every {self.interval_seconds}s")
+    
+    def stop(self) -> None:
+        """Ask the thread to stop after the current run"""
+        self._stop.set()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                archive_completed_tasks()
+            except Exception as e:
+                logger.error(f"Task archiving failed: {e}", exc_info=True)
+            finally:
+                DBSession.remove()
+
+task_archiver = TaskArchiver(config.TASK_ARCHIVE_INTERVAL_SECONDS)
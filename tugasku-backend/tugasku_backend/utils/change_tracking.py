@@ -0,0 +1,135 @@
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from ..database.connection import DBSession
+from ..models.user import User
+from ..models.task import Task
+from ..models.category import Category
+from ..models.task_tombstone import TaskTombstone
+from ..models.change_counter import ChangeCounter
+
+# Caches and ETags are keyed on versions kept in the database, so a write
+# from any process (another worker, import_tasks.py, maintenance.py)
+# invalidates them. A user's task version is users.change_seq, bumped by
+# every write to their tasks. Categories are shared and carry task counts,
+# so they have one global counter, bumped by category writes and by task
+# writes that change category membership.
+CATEGORY_COUNTER = 'categories'
+
+def get_user_version(user_id: int) -> int:
+    """Current task version of a user"""
+    return get_versions(user_id)[0]
+
+def get_category_version() -> int:
+    """Current version of the category list"""
+    counters = ChangeCounter.__table__
+    return DBSession.execute(
+        select(counters.c.value).where(counters.c.name == CATEGORY_COUNTER)
+    ).scalar() or 0
+
+def get_versions(user_id: int) -> tuple:
+    """User's task version and the category version, read in one query"""
+    users = User.__table__
+    counters = ChangeCounter.__table__
+    category_version = select(counters.c.value).where(
+        counters.c.name == CATEGORY_COUNTER
+    ).scalar_subquery()
+    row = DBSession.execute(
+        select(users.c.change_seq, category_version).where(users.c.id == user_id)
+    ).first()
+    if row is None:
+        return 0, 0
+    return row[0], row[1] or 0
+
+def bump_category_version(connection) -> None:
+    """Increment the category version within the connection's transaction"""
+    counters = ChangeCounter.__table__
+    dialect_insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(counters).values(name=CATEGORY_COUNTER, value=1)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'value': counters.c.value + 1}
+    ))
+
+def next_change_seq(session: Session, user_id: int) -> int:
+    """Change sequence stamped on this transaction's writes to a user's tasks
+
+    The first call in a transaction increments users.change_seq, which also
+    locks the user's row until commit, so sequences are handed out in commit
+    order and a reader never sees a lower sequence appear after a higher one.
+    """
+    seqs = session.info.setdefault('change_seqs', {})
+    if user_id not in seqs:
+        users = User.__table__
+        seqs[user_id] = session.execute(
+            update(users).where(users.c.id == user_id).values(
+                change_seq=users.c.change_seq + 1,
+                updated_at=users.c.updated_at
+            ).returning(users.c.change_seq)
+        ).scalar_one()
+    return seqs[user_id]
+
+def mark_tasks_changed(session: Session, user_id: int) -> None:
+    """Record a write to a user's tasks that bypasses the ORM unit of work
+
+    Bumps users.change_seq unless this transaction already did, so the
+    user's version moves when the write commits.
+    """
+    next_change_seq(session, user_id)
+
+def mark_categories_changed(session: Session) -> None:
+    """Record a write to categories or category membership that bypasses the ORM
+
+    The category version is bumped once, just before the session commits,
+    so the shared counter row stays locked only for the commit itself.
+    """
+    session.info['categories_changed'] = True
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_task_writes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Task) and (obj in session.new or session.is_modified(obj)):
+            user_id = obj.user_id if obj.user_id is not None else getattr(obj.user, 'id', None)
+            if user_id is not None:
+                obj.change_seq = next_change_seq(session, user_id)
+    
+    for obj in list(session.deleted):
+        if isinstance(obj, Task) and obj.id is not None:
+            session.add(TaskTombstone(
+                task_id=obj.id,
+                user_id=obj.user_id,
+                change_seq=next_change_seq(session, obj.user_id)
+            ))
+
+@event.listens_for(Session, 'after_flush')
+def _collect_category_writes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Task):
+            if obj.category_id is not None:
+                mark_categories_changed(session)
+        elif isinstance(obj, Category):
+            mark_categories_changed(session)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            if get_history(obj, 'category_id').has_changes():
+                mark_categories_changed(session)
+        elif isinstance(obj, Category):
+            mark_categories_changed(session)
+
+@event.listens_for(Session, 'before_commit')
+def _publish_category_writes(session):
+    # Flushed first, so category writes still pending are seen
+    session.flush()
+    if session.info.pop('categories_changed', False):
+        bump_category_version(session.connection())
+
+@event.listens_for(Session, 'after_commit')
+def _end_task_writes(session):
+    session.info.pop('change_seqs', None)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_task_writes(session):
+    session.info.pop('change_seqs', None)
+    session.info.pop('categories_changed', None)
@@ -0,0 +1,59 @@
+from typing import Any, Dict, Optional, Tuple
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import and_, or_
+from .pagination import encode_cursor, decode_cursor
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.task_tombstone import TaskTombstone
+
+def parse_since(token: Optional[str]) -> Tuple[int, int]:
+    """Position (change_seq, task id) encoded in a since token; (0, 0) for a full sync"""
+    if not token:
+        return 0, 0
+    data = decode_cursor(token)
+    try:
+        return int(data['s']), int(data['i'])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPBadRequest('Invalid since token')
+
+def _after(seq_column, id_column, seq: int, task_id: int):
+    return or_(seq_column > seq, and_(seq_column == seq, id_column > task_id))
+
+def task_changes(user_id: int, since: Optional[str], limit: int, options=()) -> Dict[str, Any]:
+    """Tasks written and deleted after a since token, oldest change first
+
+    Both tasks and tombstones are read by seeking on (change_seq, id) over
+    their indexes, so the cost follows the number of changes returned.
+    """
+    seq, task_id = parse_since(since)
+    
+    tasks = DBSession.query(Task).options(*options).filter(
+        Task.user_id == user_id,
+        _after(Task.change_seq, Task.id, seq, task_id)
+    ).order_by(Task.change_seq, Task.id).limit(limit + 1).all()
+    
+    tombstones = DBSession.query(TaskTombstone).filter(
+        TaskTombstone.user_id == user_id,
+        _after(TaskTombstone.change_seq, TaskTombstone.task_id, seq, task_id)
+    ).order_by(TaskTombstone.change_seq, TaskTombstone.task_id).limit(limit + 1).all()
+    
+    # Merge both streams by position and keep the first page
+    changes = sorted(
+        [((task.change_seq, task.id), task, False) for task in tasks] +
+        [((tomb.change_seq, tomb.task_id), tomb, True) for tomb in tombstones],
+        key=lambda change: change[0]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    next_since = since or None
+    if changes:
+        last_seq, last_id = changes[-1][0]
+        next_since = encode_cursor({'s': last_seq, 'i': last_id})
+    
+    return {
+        'tasks': [item for _, item, deleted in changes if not deleted],
+        'deleted': [item for _, item, deleted in changes if deleted],
+        'next_since': next_since,
+        'has_more': has_more
+    }
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import select
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.category import Category
+from ..models.task_log import TaskLog
+from ..models.user import User
+from ..config import get_config
+
+config = get_config()
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+TASK_FIELDS = ['id', 'title', 'description', 'status', 'priority', 'due_date',
+               'category_id', 'category', 'created_at', 'updated_at']
+LOG_FIELDS = ['log_id', 'old_status', 'new_status', 'changed_by', 'notes', 'changed_at']
+
+# Flush output to the client in chunks of about this many bytes
+_CHUNK_SIZE = 64 * 1024
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _task_record(row) -> Dict[str, Any]:
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'status': row.status,
+        'priority': row.priority,
+        'due_date': _iso(row.due_date),
+        'category_id': row.category_id,
+        'category': row.category_name,
+        'created_at': _iso(row.created_at),
+        'updated_at': _iso(row.updated_at)
+    }
+
+def _log_record(row) -> Dict[str, Any]:
+    return {
+        'log_id': row.id,
+        'old_status': row.old_status,
+        'new_status': row.new_status,
+        'changed_by': row.username,
+        'notes': row.notes,
+        'changed_at': _iso(row.created_at)
+    }
+
+def _stream(connection, statement):
+    """Rows from a server-side cursor, fetched EXPORT_BATCH_SIZE at a time"""
+    return connection.execute(
+        statement,
+        execution_options={'stream_results': True, 'yield_per': config.EXPORT_BATCH_SIZE}
+    )
+
+def _records(conditions: List, include_logs: bool) -> Iterator[Dict[str, Any]]:
+    """Task records in id order, each with its logs when requested
+
+    Tasks and logs are two streams sorted by task id and merged as they are
+    read, so only one task's logs are held in memory at a time.
+    """
+    connection = DBSession.connection()
+    tasks = _stream(connection, select(
+        Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+        Task.category_id, Category.name.label('category_name'), Task.created_at, Task.updated_at
+    ).outerjoin(Category, Task.category_id == Category.id).where(*conditions).order_by(Task.id))
+    
+    logs = None
+    try:
+        if include_logs:
+            logs = _stream(connection, select(
+                TaskLog.id, TaskLog.task_id, TaskLog.old_status, TaskLog.new_status,
+                TaskLog.notes, TaskLog.created_at, User.username
+            ).join(Task, TaskLog.task_id == Task.id).outerjoin(
+                User, TaskLog.changed_by == User.id
+            ).where(*conditions).order_by(TaskLog.task_id, TaskLog.created_at, TaskLog.id))
+        
+        pending_log = next(logs, None) if logs is not None else None
+        for row in tasks:
+            record = _task_record(row)
+            if logs is not None:
+                record['logs'] = []
+                while pending_log is not None and pending_log.task_id <= row.id:
+                    if pending_log.task_id == row.id:
+                        record['logs'].append(_log_record(pending_log))
+                    pending_log = next(logs, None)
+            yield record
+    finally:
+        tasks.close()
+        if logs is not None:
+            logs.close()
+
+def _chunked(lines: Iterator[str]) -> Iterator[bytes]:
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= _CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def _ndjson_lines(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+def _csv_lines(records: Iterator[Dict[str, Any]], include_logs: bool) -> Iterator[str]:
+    fields = TASK_FIELDS + (LOG_FIELDS if include_logs else [])
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction='ignore')
+    
+    def _take():
+        value = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return value
+    
+    writer.writeheader()
+    yield _take()
+    for record in records:
+        # One row per log entry, repeating the task columns
+        for log in record.get('logs') or [{}]:
+            writer.writerow(dict(record, **log))
+        yield _take()
+
+def export_tasks(conditions: List, fmt: str = 'ndjson', include_logs: bool = False) -> Iterator[bytes]:
+    """Encoded export of the tasks matching the conditions, as a WSGI app_iter"""
+    records = _records(conditions, include_logs)
+    if fmt == 'csv':
+        return _chunked(_csv_lines(records, include_logs))
+    return _chunked(_ndjson_lines(records))
@@ -0,0 +1,101 @@
+from typing import Dict, Any, List, Optional, Tuple
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import or_
+from .search import search_condition, SEARCH_MODES, DEFAULT_SEARCH_MODE
+from ..models.task import Task
+from ..models.task_archive import TaskArchive
+
+def parse_task_filters(params) -> Dict[str, Any]:
+    """Normalize the task list filter parameters (search, search_mode, category_id, status, priority)"""
+    filters: Dict[str, Any] = {}
+    
+    search = params.get('search', '').strip()
+    if search:
+        filters['search'] = search
+    
+    search_mode = params.get('search_mode')
+    if search_mode:
+        if search_mode not in SEARCH_MODES:
+            raise HTTPBadRequest(f'search_mode must be one of: {", ".join(SEARCH_MODES)}')
+        filters['search_mode'] = search_mode
+    
+    category_id = params.get('category_id')
+    if category_id:
+        try:
+            filters['category_id'] = int(category_id)
+        except (TypeError, ValueError):
+            raise HTTPBadRequest('category_id must be an integer')
+    
+    for field in ('status', 'priority'):
+        value = params.get(field)
+        if value:
+            filters[field] = value
+    
+    return filters
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+def parse_task_fields(params) -> Optional[List[str]]:
+    """Task fields requested with ?fields= and ?expand=, or None for the full task
+
+    Without fields every column is returned; relationships are only included
+    when expanded (or listed in fields). The id is always included.
+    """
+    fields_param = params.get('fields', '')
+    expand_param = params.get('expand', '')
+    if not fields_param and not expand_param:
+        return None
+    
+    expand = _split(expand_param)
+    unknown = [name for name in expand if name not in Task.RELATIONSHIPS]
+    if unknown:
+        raise HTTPBadRequest(f'expand must be among: {", ".join(Task.RELATIONSHIPS)}')
+    
+    if fields_param:
+        requested = _split(fields_param)
+        unknown = [name for name in requested if name not in Task.DICT_FIELDS]
+        if unknown:
+            raise HTTPBadRequest(f'Unknown fields: {", ".join(unknown)}')
+    else:
+        requested = [name for name in Task.DICT_FIELDS if name not in Task.RELATIONSHIPS]
+    
+    fields = ['id']
+    for name in requested + expand:
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+def filters_key(filters: Dict[str, Any]) -> Tuple:
+    """Hashable, order-independent form of a filter set"""
+    return tuple(sorted(filters.items()))
+
+def column_filter_conditions(columns, filters: Dict[str, Any], user_id: int) -> List:
+    """The owner and exact-match filters over anything with the task columns"""
+    conditions = [columns.user_id == user_id]
+    
+    if 'category_id' in filters:
+        conditions.append(columns.category_id == filters['category_id'])
+    if 'status' in filters:
+        conditions.append(columns.status == filters['status'])
+    if 'priority' in filters:
+        conditions.append(columns.priority == filters['priority'])
+    
+    return conditions
+
+def task_filter_conditions(filters: Dict[str, Any], user_id: int) -> List:
+    """SQL conditions selecting a user's tasks that match the filters"""
+    conditions = column_filter_conditions(Task, filters, user_id)
+    
+    search = filters.get('search')
+    if search:
+        conditions.append(search_condition(search, filters.get('search_mode', DEFAULT_SEARCH_MODE), user_id))
+    
+    return conditions
+
+def archive_search_condition(search: str):
+    """A search over archived tasks, which are matched by substring"""
+    return or_(
+        TaskArchive.title.ilike(f'%{search}%'),
+        TaskArchive.description.ilike(f'%{search}%')
+    )
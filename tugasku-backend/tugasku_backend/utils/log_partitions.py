@@ -0,0 +1,221 @@
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import select, delete, func, case, text, table, column
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.task_log import TaskLog
+from ..models.task_log_rollup import TaskLogRollup
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+# On PostgreSQL task_logs is range-partitioned by created_at into one table
+# per month (task_logs_y2024m01, ...) plus a default partition catching rows
+# outside every month created so far. Other databases keep a plain table,
+# as does PostgreSQL until partition_task_logs is run.
+DEFAULT_PARTITION = 'task_logs_default'
+
+_PARTITION_RE = re.compile(r'^task_logs_y(\d{4})m(\d{2})$')
+
+def month_start(value: datetime) -> datetime:
+    """First instant of the month containing value"""
+    return datetime(value.year, value.month, 1)
+
+def add_months(value: datetime, months: int) -> datetime:
+    """First instant of the month ``months`` after the one containing value"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: datetime) -> str:
+    return f'task_logs_y{month.year:04d}m{month.month:02d}'
+
+def is_partitioned(connection) -> bool:
+    """Whether task_logs is a partitioned table on this database"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('task_logs')"
+    ).first() is not None
+
+def month_partitions(connection) -> Dict[datetime, str]:
+    """Monthly partitions of task_logs: month start -> table name"""
+    rows = connection.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'task_logs'::regclass"
+    ).all()
+    partitions = {}
+    for (name,) in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+def _bounds(month: datetime) -> str:
+    return f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+
+def create_partition(connection, month: datetime) -> bool:
+    """Create the partition for a month; False if it already exists
+
+    Rows of that month sitting in the default partition are moved into the
+    new table before it is attached.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    if connection.exec_driver_sql(f"SELECT to_regclass('{name}')").scalar() is not None:
+        return False
+    
+    connection.exec_driver_sql(f"CREATE TABLE {name} (LIKE task_logs INCLUDING DEFAULTS)")
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {'start': month, 'end': add_months(month, 1)}
+    )
+    connection.exec_driver_sql(f"ALTER TABLE task_logs ATTACH PARTITION {name} FOR VALUES {_bounds(month)}")
+    logger.info(f"Created task log partition {name}")
+    return True
+
+def ensure_partitions(connection, ahead: int = None, now: datetime = None) -> List[str]:
+    """Create the partitions for this month and ``ahead`` months after it"""
+    if not is_partitioned(connection):
+        return []
+    ahead = config.TASK_LOG_PARTITIONS_AHEAD if ahead is None else ahead
+    current = month_start(now or datetime.now())
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(connection, month):
+            created.append(partition_name(month))
+    return created
+
+def partition_task_logs(connection) -> bool:
+    """Rebuild an empty plain task_logs as a table partitioned by month
+
+    An explicit, one-off step (``maintenance.py --partition-task-logs``),
+    never run at startup: the plain table is dropped, so the conversion
+    refuses to run while it holds any history. Run it in one transaction.
+    Returns False when task_logs is already partitioned.
+    """
+    if connection.dialect.name != 'postgresql':
+        raise RuntimeError('task_logs can only be partitioned on PostgreSQL')
+    if is_partitioned(connection):
+        return False
+    # Nothing can write a log row between the check and the drop
+    connection.exec_driver_sql("LOCK TABLE task_logs IN ACCESS EXCLUSIVE MODE")
+    if connection.exec_driver_sql("SELECT 1 FROM task_logs LIMIT 1").first() is not None:
+        raise RuntimeError('task_logs has rows; only an empty table is converted')
+    
+    sequence = connection.exec_driver_sql("SELECT pg_get_serial_sequence('task_logs', 'id')").scalar()
+    statements = [
+        "CREATE TABLE task_logs_partitioned (LIKE task_logs INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+        "ALTER TABLE task_logs_partitioned ALTER COLUMN created_at SET NOT NULL",
+        # Unique constraints on a partitioned table must include the partition key
+        "ALTER TABLE task_logs_partitioned ADD PRIMARY KEY (id, created_at)",
+        "ALTER TABLE task_logs_partitioned ADD FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE",
+        "ALTER TABLE task_logs_partitioned ADD FOREIGN KEY (changed_by) REFERENCES users (id)",
+        f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF task_logs_partitioned DEFAULT",
+    ]
+    if sequence:
+        # Keeps the id sequence (and its default) alive when the old table goes
+        statements.append(f"ALTER SEQUENCE {sequence} OWNED BY task_logs_partitioned.id")
+    statements += [
+        "DROP TABLE task_logs",
+        "ALTER TABLE task_logs_partitioned RENAME TO task_logs",
+    ]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    for index in TaskLog.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    ensure_partitions(connection)
+    logger.info("Converted task_logs to a partitioned table")
+    return True
+
+def _roll_up(connection, source, cutoff: datetime) -> int:
+    """Fold a source's entries older than cutoff into the per-task summaries
+
+    Returns the number of entries folded.
+    """
+    logs = source.alias('logs')
+    latest = source.alias('latest')
+    
+    entries = connection.execute(select(func.count()).select_from(logs).where(logs.c.created_at < cutoff)).scalar()
+    if not entries:
+        return 0
+    
+    last_status = select(latest.c.new_status).where(
+        latest.c.task_id == logs.c.task_id,
+        latest.c.created_at < cutoff
+    ).order_by(latest.c.created_at.desc(), latest.c.id.desc()).limit(1).scalar_subquery()
+    
+    summary = select(
+        logs.c.task_id,
+        func.count(),
+        func.sum(case((logs.c.new_status == 'completed', 1), else_=0)),
+        func.min(logs.c.created_at),
+        func.max(logs.c.created_at),
+        last_status
+    ).where(logs.c.created_at < cutoff).group_by(logs.c.task_id)
+    
+    pg = connection.dialect.name == 'postgresql'
+    dialect_insert = postgresql.insert if pg else sqlite.insert
+    least = func.least if pg else func.min
+    greatest = func.greatest if pg else func.max
+    
+    rollups = TaskLogRollup.__table__
+    statement = dialect_insert(rollups).from_select(
+        ['task_id', 'entries', 'completions', 'first_at', 'last_at', 'last_status'], summary
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['task_id'],
+        set_={
+            'entries': rollups.c.entries + statement.excluded.entries,
+            'completions': rollups.c.completions + statement.excluded.completions,
+            'first_at': least(rollups.c.first_at, statement.excluded.first_at),
+            'last_at': greatest(rollups.c.last_at, statement.excluded.last_at),
+            'last_status': case(
+                (statement.excluded.last_at >= rollups.c.last_at, statement.excluded.last_status),
+                else_=rollups.c.last_status
+            )
+        }
+    )
+    connection.execute(statement)
+    return entries
+
+def _log_table(name: str):
+    return table(name, column('id'), column('task_id'), column('new_status'), column('created_at'))
+
+def apply_retention(connection, months: int = None, now: datetime = None) -> int:
+    """Roll history older than the retention window into summaries and remove it
+
+    Whole months are kept. On PostgreSQL expired partitions are summarized
+    and dropped; elsewhere the expired rows are deleted. Returns the number
+    of entries removed. A retention of 0 months keeps everything.
+    """
+    months = config.TASK_LOG_RETENTION_MONTHS if months is None else months
+    if months <= 0:
+        return 0
+    cutoff = add_months(month_start(now or datetime.now()), -months)
+    removed = 0
+    
+    if is_partitioned(connection):
+        for month, name in sorted(month_partitions(connection).items()):
+            if add_months(month, 1) > cutoff:
+                break
+            removed += _roll_up(connection, _log_table(name), cutoff)
+            connection.exec_driver_sql(f"DROP TABLE {name}")
+            logger.info(f"Dropped task log partition {name}")
+        source = _log_table(DEFAULT_PARTITION)
+    else:
+        source = TaskLog.__table__
+    
+    expired = _roll_up(connection, source, cutoff)
+    if expired:
+        connection.execute(delete(source).where(source.c.created_at < cutoff))
+    removed += expired
+    
+    logger.info(f"Task log retention: {removed} entries older than {cutoff:%Y-%m-%d} rolled up")
+    return removed
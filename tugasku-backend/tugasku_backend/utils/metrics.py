@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Dict, Any
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_timers: Dict[str, 'Timer'] = {}
+_gauges: Dict[str, Callable[[], Any]] = {}
+
+class Timer:
+    """Latency summary with fixed millisecond buckets"""
+    
+    BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(self.BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds: float) -> None:
+        """Record one duration"""
+        ms = seconds * 1000.0
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        with self._lock:
+            labels = [f'le_{bound}ms' for bound in self.BUCKETS_MS] + ['inf']
+            return {
+                'count': self.count,
+                'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'buckets': dict(zip(labels, self.buckets))
+            }
+
+def increment(name: str, value: int = 1) -> None:
+    """Increment a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def timer(name: str) -> Timer:
+    """Get or create a named timer"""
+    with _lock:
+        if name not in _timers:
+            _timers[name] = Timer()
+        return _timers[name]
+
+def register_gauge(name: str, func: Callable[[], Any]) -> None:
+    """Register a callable sampled whenever metrics are read"""
+    with _lock:
+        _gauges[name] = func
+
+def snapshot() -> Dict[str, Any]:
+    """Get current values of all metrics"""
+    with _lock:
+        counters = dict(_counters)
+        timers = dict(_timers)
+        gauges = dict(_gauges)
+    return {
+        'counters': counters,
+        'gauges': {name: func() for name, func in gauges.items()},
+        'timers': {name: t.to_dict() for name, t in timers.items()}
+    }
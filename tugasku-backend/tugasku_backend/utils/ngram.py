@@ -0,0 +1,102 @@
+import heapq
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+N = 3
+
+_WORD_RE = re.compile(r'\w+')
+
+def ngrams(text: str) -> Set[str]:
+    """Character trigrams of lower-cased text"""
+    text = text.lower()
+    return {text[i:i + N] for i in range(len(text) - N + 1)}
+
+def word_ngrams(text: str) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm does, so word edges count"""
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        grams |= ngrams(f'  {word} ')
+    return grams
+
+class NgramIndex:
+    """In-memory trigram index over documents, for substring and fuzzy matching
+
+    Lookups only visit documents sharing a trigram with the query, so they do
+    not scan every document (queries shorter than a trigram excepted).
+    """
+    
+    def __init__(self, documents: Iterable[Tuple[int, str]] = ()):
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        # Last fuzzy lookup, since a search asks for the same scores twice
+        # (to filter and to rank)
+        self._last_fuzzy: Optional[Tuple[str, float, Optional[int], Dict[int, float]]] = None
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+    
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        return ngrams(text) | word_ngrams(text)
+    
+    def add(self, doc_id: int, text: str) -> None:
+        """Index a document, replacing any previous version of it"""
+        self.remove(doc_id)
+        text = text.lower()
+        self._texts[doc_id] = text
+        for gram in self._grams(text):
+            self._postings[gram].add(doc_id)
+    
+    def remove(self, doc_id: int) -> None:
+        """Drop a document from the index"""
+        self._last_fuzzy = None
+        text = self._texts.pop(doc_id, None)
+        if text is None:
+            return
+        for gram in self._grams(text):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def substring(self, query: str) -> List[int]:
+        """Ids of documents containing the query, case-insensitively"""
+        query = query.lower()
+        grams = ngrams(query)
+        if not grams:
+            candidates: Iterable[int] = self._texts
+        else:
+            # Intersect from the rarest trigram up
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        return [doc_id for doc_id in candidates if query in self._texts[doc_id]]
+    
+    def fuzzy(self, query: str, threshold: float, limit: int = None) -> Dict[int, float]:
+        """Documents sharing at least ``threshold`` of the query's word
+        trigrams, mapped to that fraction; only the ``limit`` best if given
+        """
+        last = self._last_fuzzy
+        if last is not None and last[:3] == (query, threshold, limit):
+            return last[3]
+        
+        grams = word_ngrams(query)
+        if not grams:
+            return {}
+        
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for doc_id in self._postings.get(gram, ()):
+                shared[doc_id] += 1
+        
+        scores = {doc_id: count / len(grams) for doc_id, count in shared.items()}
+        matches = {doc_id: score for doc_id, score in scores.items() if score >= threshold}
+        if limit is not None and len(matches) > limit:
+            # Best scores first, older documents first among equals
+            best = heapq.nsmallest(limit, matches.items(), key=lambda item: (-item[1], item[0]))
+            matches = dict(best)
+        self._last_fuzzy = (query, threshold, limit, matches)
+        return matches
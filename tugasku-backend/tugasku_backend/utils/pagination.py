@@ -1,10 +1,77 @@
-from typing import Dict, Any
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Dict, Any, Hashable, Optional, Tuple
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Query
+from .cache import LRUCache
 from ..config import get_config
 
 config = get_config()
 
-def paginate(query: Query, page: int = 1, page_size: int = None) -> Dict[str, Any]:
+COUNT_STRATEGIES = ('exact', 'cached', 'estimated', 'none')
+
+_count_cache = LRUCache(config.COUNT_CACHE_SIZE)
+
+def parse_count_strategy(value: Optional[str]) -> str:
+    """Map the ?count= parameter to a count strategy"""
+    if value is None or value == '':
+        return config.DEFAULT_COUNT_STRATEGY
+    value = value.lower()
+    if value in ('false', '0', 'no', 'none', 'skip'):
+        return 'none'
+    if value in ('true', '1', 'yes'):
+        return 'exact'
+    if value not in COUNT_STRATEGIES:
+        raise HTTPBadRequest(f'count must be one of: {", ".join(COUNT_STRATEGIES)}, false')
+    return value
+
+def estimate_count(query: Query) -> Optional[int]:
+    """Planner row estimate for a query (PostgreSQL only, None elsewhere)"""
+    bind = query.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+    compiled = query.statement.compile(
+        dialect=bind.dialect,
+        compile_kwargs={'render_postcompile': True}
+    )
+    plan = query.session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def count_query(query: Query, strategy: str = 'exact', cache_key: Hashable = None) -> Tuple[Optional[int], str]:
+    """Count query rows; return (total, strategy that produced it)
+
+    ``cached`` needs a cache_key that changes whenever the underlying rows
+    do (e.g. one that includes the owner's change version). ``estimated``
+    uses the planner estimate when it is above COUNT_ESTIMATE_THRESHOLD and
+    falls back to an exact count otherwise.
+    """
+    if strategy == 'none':
+        return None, 'none'
+    
+    if strategy == 'cached' and cache_key is not None:
+        total = _count_cache.get(cache_key)
+        if total is not None:
+            return total, 'cached'
+        total = query.order_by(None).count()
+        _count_cache.set(cache_key, total, time.time() + config.COUNT_CACHE_TTL_SECONDS)
+        return total, 'exact'
+    
+    if strategy == 'estimated':
+        estimate = estimate_count(query.order_by(None))
+        if estimate is not None and estimate >= config.COUNT_ESTIMATE_THRESHOLD:
+            return estimate, 'estimated'
+    
+    return query.order_by(None).count(), 'exact'
+
+def paginate(query: Query, page: int = 1, page_size: int = None,
+             count: str = 'exact', count_key: Hashable = None) -> Dict[str, Any]:
     """Paginate query results"""
     if page_size is None:
         page_size = config.DEFAULT_PAGE_SIZE
@@ -15,15 +82,17 @@ def paginate(query: Query, page: int = 1, page_size: int = None) -> Dict[str, An
     # Ensure page is at least 1
     page = max(page, 1)
     
+    # Get items for current page (one extra row tells whether another page exists)
+    offset = (page - 1) * page_size
+    items = query.offset(offset).limit(page_size + 1).all()
+    has_next = len(items) > page_size
+    items = items[:page_size]
+    
     # Get total count
-    total = query.count()
+    total, count_strategy = count_query(query, count, count_key)
     
     # Calculate total pages
-    pages = (total + page_size - 1) // page_size
-    
-    # Get items for current page
-    offset = (page - 1) * page_size
-    items = query.offset(offset).limit(page_size).all()
+    pages = (total + page_size - 1) // page_size if total is not None else None
     
     return {
         'items': items,
@@ -31,6 +100,115 @@ def paginate(query: Query, page: int = 1, page_size: int = None) -> Dict[str, An
         'page_size': page_size,
         'total': total,
         'pages': pages,
-        'has_next': page < pages,
+        'count_strategy': count_strategy,
+        'has_next': has_next,
         'has_prev': page > 1
     }
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Encode cursor state as an opaque URL-safe token"""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(data, dict):
+            raise ValueError('cursor is not an object')
+        return data
+    except (ValueError, TypeError):
+        raise HTTPBadRequest('Invalid cursor')
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+def _load_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+def _nulls_sort_high(query: Query) -> bool:
+    """Whether the database orders NULL after every value in ascending order"""
+    dialect = query.session.get_bind().dialect.name
+    return dialect not in ('sqlite', 'mysql', 'mariadb', 'mssql')
+
+def _seek(column, id_column, value, last_id, ascending: bool, nulls_last: bool):
+    """Rows strictly after (value, last_id) in the given iteration order"""
+    id_after = id_column > last_id if ascending else id_column < last_id
+    if value is None:
+        if nulls_last:
+            return and_(column.is_(None), id_after)
+        return or_(column.isnot(None), and_(column.is_(None), id_after))
+    
+    value_after = column > value if ascending else column < value
+    after = or_(value_after, and_(column == value, id_after))
+    if nulls_last:
+        return or_(after, column.is_(None))
+    return after
+
+def paginate_keyset(query: Query, model, sort_by: str, descending: bool = True,
+                    cursor: Optional[str] = None, page_size: int = None) -> Dict[str, Any]:
+    """Paginate by seeking on (sort column, id) instead of OFFSET
+
+    Cursors are opaque tokens; ``next_cursor`` continues forward and
+    ``prev_cursor`` walks back. A cursor is only valid for the sort it was
+    issued with.
+    """
+    if page_size is None:
+        page_size = config.DEFAULT_PAGE_SIZE
+    page_size = max(min(page_size, config.MAX_PAGE_SIZE), 1)
+    
+    column = getattr(model, sort_by)
+    id_column = model.id
+    sort_order = 'desc' if descending else 'asc'
+    nulls_high = _nulls_sort_high(query)
+    
+    data = decode_cursor(cursor) if cursor else None
+    if data is not None and (data.get('s') != sort_by or data.get('o') != sort_order or 'i' not in data):
+        raise HTTPBadRequest('Cursor does not match the requested sort')
+    
+    # Walking back means scanning in the opposite direction and reversing
+    backward = bool(data and data.get('b'))
+    ascending = descending == backward
+    
+    if data is not None:
+        query = query.filter(_seek(
+            column, id_column, _load_value(data.get('v')), data['i'],
+            ascending, nulls_last=(nulls_high == ascending)
+        ))
+    
+    if ascending:
+        query = query.order_by(column.asc(), id_column.asc())
+    else:
+        query = query.order_by(column.desc(), id_column.desc())
+    
+    items = query.limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backward:
+        items.reverse()
+    
+    has_next = True if backward else has_more
+    has_prev = has_more if backward else bool(cursor)
+    
+    def _cursor_for(item, walk_back):
+        return encode_cursor({
+            's': sort_by,
+            'o': sort_order,
+            'v': _dump_value(getattr(item, sort_by)),
+            'i': item.id,
+            'b': walk_back
+        })
+    
+    return {
+        'items': items,
+        'page_size': page_size,
+        'has_next': has_next,
+        'has_prev': has_prev,
+        'next_cursor': _cursor_for(items[-1], False) if items and has_next else None,
+        'prev_cursor': _cursor_for(items[0], True) if items and has_prev else None
+    }
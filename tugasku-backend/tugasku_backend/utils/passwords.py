@@ -0,0 +1,205 @@
+import bcrypt
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List
+from . import metrics
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+_target_cost = config.BCRYPT_ROUNDS
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password worker pool cannot accept more work"""
+
+def get_target_cost() -> int:
+    """bcrypt cost used for new hashes"""
+    return _target_cost
+
+def set_target_cost(cost: int) -> None:
+    """Change the bcrypt cost used for new hashes"""
+    global _target_cost
+    _target_cost = max(config.BCRYPT_MIN_ROUNDS, min(int(cost), config.BCRYPT_MAX_ROUNDS))
+    logger.info(f"bcrypt target cost set to {_target_cost}")
+
+def hash_cost(password_hash: str) -> int:
+    """Cost recorded in a bcrypt hash ($2b$<cost>$...), or 0 if unparseable"""
+    parts = (password_hash or '').split('$')
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return 0
+
+def needs_rehash(password_hash: str) -> bool:
+    """Whether a hash was made with a cost other than the current target"""
+    return hash_cost(password_hash) != _target_cost
+
+def measure_cost(cost: int, samples: int = 2) -> float:
+    """Best-of-n bcrypt hashing time in milliseconds at a given cost"""
+    best = None
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration-password', bcrypt.gensalt(rounds=cost))
+        elapsed = (time.perf_counter() - started) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def calibrate_cost(target_ms: float = None) -> int:
+    """Find the highest cost whose hashing time stays within target_ms
+
+    Each cost step doubles the work, so this measures upwards from
+    BCRYPT_MIN_ROUNDS and stops at the first cost over the target.
+    """
+    if target_ms is None:
+        target_ms = config.BCRYPT_TARGET_MS
+    
+    chosen = config.BCRYPT_MIN_ROUNDS
+    for cost in range(config.BCRYPT_MIN_ROUNDS, config.BCRYPT_MAX_ROUNDS + 1):
+        elapsed = measure_cost(cost)
+        logger.info(f"bcrypt cost {cost}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = cost
+    return chosen
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded worker pool
+
+    At most ``max_workers + max_queue`` operations are admitted at once, and
+    fewer than the server has request threads (see limit_admission), since
+    each admitted request thread waits for its result; anything beyond that
+    fails immediately with PasswordPoolBusy.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.admission_limit = max_workers + max_queue
+        self._slots = threading.BoundedSemaphore(self.admission_limit)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._counter_lock = threading.Lock()
+    
+    def limit_admission(self, request_threads: int) -> None:
+        """Keep at least one of the server's request threads free of password work
+
+        Call at startup, before any password operation.
+        """
+        self.admission_limit = max(1, min(self.max_workers + self.max_queue, request_threads - 1))
+        self._slots = threading.BoundedSemaphore(self.admission_limit)
+        logger.info(f"Password pool admits {self.admission_limit} operations for {request_threads} request threads")
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='bcrypt'
+                )
+            return self._executor
+    
+    @property
+    def queue_depth(self) -> int:
+        """Operations admitted but not yet running"""
+        return self._admitted - self._running
+    
+    @property
+    def in_flight(self) -> int:
+        """Operations currently hashing"""
+        return self._running
+    
+    def _run(self, name, func, *args):
+        with self._counter_lock:
+            self._running += 1
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            metrics.timer(f'password.{name}').observe(time.perf_counter() - started)
+            with self._counter_lock:
+                self._running -= 1
+                self._admitted -= 1
+            self._slots.release()
+    
+    def _start(self, name, func, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            metrics.increment('password.rejected')
+            logger.warning(f"Password pool saturated, rejecting {name}")
+            raise PasswordPoolBusy('Password worker pool is full')
+        
+        with self._counter_lock:
+            self._admitted += 1
+        try:
+            return self._get_executor().submit(self._run, name, func, *args)
+        except Exception:
+            with self._counter_lock:
+                self._admitted -= 1
+            self._slots.release()
+            raise
+    
+    def _result(self, future: Future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            metrics.increment('password.timeout')
+            raise PasswordPoolBusy('Password operation timed out')
+    
+    def _submit(self, name, func, *args):
+        return self._result(self._start(name, func, *args))
+    
+    def hash(self, password: str) -> str:
+        """Hash a password"""
+        return self._submit(
+            'hash',
+            lambda: bcrypt.hashpw(
+                password.encode('utf-8'),
+                bcrypt.gensalt(rounds=_target_cost)
+            ).decode('utf-8')
+        )
+    
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash several passwords, at most one per worker in flight at a time
+
+        Each is admitted like a single hash, so bulk work shares the pool
+        with logins rather than adding CPU-bound threads of its own.
+        """
+        cost = _target_cost
+        
+        def _hash(password):
+            return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=cost)).decode('utf-8')
+        
+        window = min(self.max_workers, self.admission_limit)
+        hashes = []
+        pending = deque()
+        for password in passwords:
+            if len(pending) >= window:
+                hashes.append(self._result(pending.popleft()))
+            pending.append(self._start('hash', _hash, password))
+        while pending:
+            hashes.append(self._result(pending.popleft()))
+        return hashes
+    
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Check a password against a bcrypt hash"""
+        return self._submit(
+            'verify',
+            lambda: bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        )
+
+password_hasher = PasswordHasher(
+    max_workers=config.PASSWORD_POOL_WORKERS,
+    max_queue=config.PASSWORD_POOL_QUEUE_SIZE,
+    timeout=config.PASSWORD_POOL_TIMEOUT_SECONDS
+)
+
+metrics.register_gauge('password.queue_depth', lambda: password_hasher.queue_depth)
+metrics.register_gauge('password.in_flight', lambda: password_hasher.in_flight)
+metrics.register_gauge('password.admission_limit', lambda: password_hasher.admission_limit)
+metrics.register_gauge('password.target_cost', get_target_cost)
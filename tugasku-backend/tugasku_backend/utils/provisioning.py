@@ -0,0 +1,138 @@
+import logging
+from typing import Any, Dict, List
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from .passwords import password_hasher
+from .validators import validate_user_data
+from ..database.connection import DBSession
+from ..models.user import User
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+def _drop_conflicts(accepted: List[tuple], results: List[Dict[str, Any]]) -> List[tuple]:
+    """Record entries whose username or email is taken; return the others"""
+    if not accepted:
+        return accepted
+    existing = DBSession.query(User.username, User.email).filter(
+        or_(
+            User.username.in_([username for _, username, _, _ in accepted]),
+            User.email.in_([email for _, _, email, _ in accepted])
+        )
+    ).all()
+    taken_usernames = {row.username for row in existing}
+    taken_emails = {row.email for row in existing}
+    
+    remaining = []
+    for index, username, email, password in accepted:
+        errors = []
+        if username in taken_usernames:
+            errors.append('Username already exists')
+        if email in taken_emails:
+            errors.append('Email already exists')
+        if errors:
+            results[index] = {'index': index, 'status': 'error', 'errors': errors}
+        else:
+            remaining.append((index, username, email, password))
+    return remaining
+
+def provision_users(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create many users at once and report the outcome of every entry
+
+    Validation and duplicate detection run before any hashing, conflicts
+    with existing accounts are found with one query, and all accepted users
+    are written with a single multi-row INSERT. Should a concurrent signup
+    win the race for a name or email, the INSERT fails; the conflicts are
+    looked up again, reported per entry, and the rest are written.
+    """
+    if len(entries) > config.BULK_REGISTER_MAX_USERS:
+        raise HTTPBadRequest(f'At most {config.BULK_REGISTER_MAX_USERS} users per request')
+    
+    results: List[Dict[str, Any]] = [None] * len(entries)
+    accepted = []
+    seen_usernames = {}
+    seen_emails = {}
+    
+    # Validate entries and catch duplicates within the batch
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            results[index] = {'index': index, 'status': 'error', 'errors': ['Entry must be an object']}
+            continue
+        try:
+            validate_user_data(entry)
+        except HTTPBadRequest as e:
+            results[index] = {'index': index, 'status': 'error', 'errors': e.json_body['errors']}
+            continue
+        except (AttributeError, TypeError):
+            results[index] = {'index': index, 'status': 'error', 'errors': ['Fields must be strings']}
+            continue
+        
+        username = entry['username'].strip()
+        email = entry['email'].strip()
+        errors = []
+        if username in seen_usernames:
+            errors.append(f'Username duplicates entry {seen_usernames[username]}')
+        if email in seen_emails:
+            errors.append(f'Email duplicates entry {seen_emails[email]}')
+        if errors:
+            results[index] = {'index': index, 'status': 'error', 'errors': errors}
+            continue
+        
+        seen_usernames[username] = index
+        seen_emails[email] = index
+        accepted.append((index, username, email, entry['password']))
+    
+    # One set-based lookup for conflicts with existing users
+    accepted = _drop_conflicts(accepted, results)
+    
+    if accepted:
+        # On the shared password pool, so provisioning cannot starve logins
+        hashes = dict(zip(
+            (index for index, _, _, _ in accepted),
+            password_hasher.hash_many([password for _, _, _, password in accepted])
+        ))
+        
+        created = []
+        while accepted:
+            rows = [
+                {'username': username, 'email': email, 'password_hash': hashes[index], 'is_active': True}
+                for index, username, email, _ in accepted
+            ]
+            try:
+                created = DBSession.execute(
+                    insert(User.__table__).values(rows).returning(
+                        User.__table__.c.id, User.__table__.c.username
+                    )
+                ).all()
+                DBSession.commit()
+                break
+            except IntegrityError:
+                # A concurrent signup took a name or email after the lookup:
+                # report those entries and write the rest
+                DBSession.rollback()
+                remaining = _drop_conflicts(accepted, results)
+                if len(remaining) == len(accepted):
+                    raise
+                accepted = remaining
+            except Exception:
+                DBSession.rollback()
+                raise
+        
+        ids = {row.username: row.id for row in created}
+        for index, username, email, _ in accepted:
+            results[index] = {
+                'index': index,
+                'status': 'created',
+                'user': {'id': ids.get(username), 'username': username, 'email': email}
+            }
+    
+    created_count = sum(1 for result in results if result['status'] == 'created')
+    logger.info(f"Bulk provisioning: {created_count} created, {len(results) - created_count} failed")
+    
+    return {
+        'created': created_count,
+        'failed': len(results) - created_count,
+        'results': results
+    }
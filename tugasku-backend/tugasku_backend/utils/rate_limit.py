@@ -0,0 +1,169 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from . import metrics
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+class RateLimitBackend:
+    """Storage for sliding-window counters
+
+    A window is approximated from the current and previous fixed windows:
+    ``prev_count * (1 - elapsed / window) + cur_count``. Backends only need
+    to make ``hit`` atomic per key.
+    """
+    
+    def hit(self, key: str, limit: int, window: int, now: float) -> Tuple[bool, int]:
+        """Record an attempt; return (allowed, retry_after_seconds)"""
+        raise NotImplementedError
+    
+    def reset(self, key: str) -> None:
+        """Forget all attempts for a key"""
+        raise NotImplementedError
+    
+    @staticmethod
+    def _advance(state, window: int, now: float):
+        """Roll (window_start, prev_count, cur_count) forward to now"""
+        current_start = int(now // window) * window
+        window_start, prev_count, cur_count = state
+        if window_start == current_start:
+            return state
+        if window_start == current_start - window:
+            return (current_start, cur_count, 0)
+        return (current_start, 0, 0)
+    
+    @staticmethod
+    def _evaluate(state, limit: int, window: int, now: float) -> Tuple[bool, int]:
+        window_start, prev_count, cur_count = state
+        elapsed = now - window_start
+        weighted = prev_count * (1 - elapsed / window) + cur_count
+        if weighted < limit:
+            return True, 0
+        if cur_count >= limit:
+            return False, max(int(math.ceil(window_start + window - now)), 1)
+        # Wait until enough of the previous window has slid out
+        needed = (weighted - limit + 1) / prev_count * window
+        return False, max(int(math.ceil(needed)), 1)
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process counters in a bounded LRU map"""
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._state: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def hit(self, key, limit, window, now):
+        with self._lock:
+            state = self._advance(self._state.get(key, (0, 0, 0)), window, now)
+            allowed, retry_after = self._evaluate(state, limit, window, now)
+            if allowed:
+                state = (state[0], state[1], state[2] + 1)
+            self._state[key] = state
+            self._state.move_to_end(key)
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+            return allowed, retry_after
+    
+    def reset(self, key):
+        with self._lock:
+            self._state.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all counters"""
+        with self._lock:
+            self._state.clear()
+
+class SQLiteBackend(RateLimitBackend):
+    """Counters in a local SQLite file shared by all worker processes on a host"""
+    
+    PRUNE_EVERY = 1000
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT PRIMARY KEY, window_start INTEGER NOT NULL, '
+            'prev_count INTEGER NOT NULL, cur_count INTEGER NOT NULL)'
+        )
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+    
+    def hit(self, key, limit, window, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_start, prev_count, cur_count FROM rate_limits WHERE key = ?',
+                (key,)
+            ).fetchone()
+            state = self._advance(tuple(row) if row else (0, 0, 0), window, now)
+            allowed, retry_after = self._evaluate(state, limit, window, now)
+            if allowed:
+                state = (state[0], state[1], state[2] + 1)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window_start, prev_count, cur_count) '
+                'VALUES (?, ?, ?, ?)',
+                (key,) + state
+            )
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                # Rows two windows old no longer influence any decision
+                conn.execute('DELETE FROM rate_limits WHERE window_start < ?', (now - 2 * window,))
+            conn.execute('COMMIT')
+            return allowed, retry_after
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def reset(self, key):
+        self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+class RateLimiter:
+    """Applies one limit per key prefix against a backend"""
+    
+    def __init__(self, backend: RateLimitBackend, window: int):
+        self.backend = backend
+        self.window = window
+    
+    def hit(self, keys: Iterable[Tuple[str, int]], now: Optional[float] = None) -> Tuple[bool, int]:
+        """Record an attempt for every (key, limit); stop at the first one over limit"""
+        now = time.time() if now is None else now
+        for key, limit in keys:
+            allowed, retry_after = self.backend.hit(key, limit, self.window, now)
+            if not allowed:
+                metrics.increment('rate_limit.rejected')
+                return False, retry_after
+        return True, 0
+    
+    def reset(self, key: str) -> None:
+        """Forget attempts for a key"""
+        self.backend.reset(key)
+
+def create_backend(name: str) -> RateLimitBackend:
+    """Build the configured rate limit backend"""
+    if name == 'sqlite':
+        return SQLiteBackend(config.LOGIN_RATE_LIMIT_SQLITE_PATH)
+    if name != 'memory':
+        logger.warning(f"Unknown rate limit backend '{name}', using memory")
+    return MemoryBackend(config.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+login_limiter = RateLimiter(
+    create_backend(config.LOGIN_RATE_LIMIT_BACKEND),
+    window=config.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+)
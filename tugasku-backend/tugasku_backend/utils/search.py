@@ -0,0 +1,309 @@
+import logging
+import re
+import threading
+import weakref
+from typing import List, Optional
+from sqlalchemy import event, func, literal, literal_column, select, table, column, text, case, or_
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.exc import DBAPIError
+from .cache import LRUCache
+from .change_tracking import get_user_version
+from .ngram import NgramIndex
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+# fulltext: word-prefix matching on the full-text index
+# substring: case-insensitive substring, as the original ILIKE search
+# fuzzy: trigram similarity, tolerant of typos
+SEARCH_MODES = ('fulltext', 'substring', 'fuzzy')
+DEFAULT_SEARCH_MODE = 'fulltext'
+
+# The text search configuration is baked into the generated column, so it
+# must be a plain identifier (changing it means rebuilding the column)
+SEARCH_LANGUAGE = config.SEARCH_LANGUAGE if re.fullmatch(r'\w+', config.SEARCH_LANGUAGE) else 'simple'
+
+# PostgreSQL: a generated, weighted tsvector (title ranks above description)
+# with a GIN index; the database keeps it current on every insert and update
+_POSTGRESQL_DDL = (
+    f"""ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{SEARCH_LANGUAGE}'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_LANGUAGE}'::regconfig, coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+)
+
+# PostgreSQL: trigram indexes serving ILIKE '%term%' and similarity operators
+_PG_TRGM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops)",
+)
+
+# SQLite: an FTS5 table over tasks kept in sync by triggers
+_SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+)
+
+_search_vector = literal_column('tasks.search_vector', type_=TSVECTOR)
+_tasks_fts = table('tasks_fts', column('rowid'))
+
+# Whether each engine's database has the search index / pg_trgm
+_available = weakref.WeakKeyDictionary()
+_trigram_available = weakref.WeakKeyDictionary()
+
+
+_TERM_RE = re.compile(r'\w+')
+
+def search_terms(search: str) -> List[str]:
+    """Words of a search string, lower-cased"""
+    return [term.lower() for term in _TERM_RE.findall(search)]
+
+def install_search_index(connection) -> bool:
+    """Create the full-text index on tasks; False if the database cannot"""
+    dialect = connection.dialect.name
+    try:
+        if dialect == 'postgresql':
+            with connection.begin_nested():
+                for statement in _POSTGRESQL_DDL:
+                    connection.exec_driver_sql(statement)
+            install_trigram_index(connection)
+        elif dialect == 'sqlite':
+            exists = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+            ).first()
+            for statement in _SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+            if not exists:
+                # Index the rows that predate the table
+                connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        else:
+            return False
+    except DBAPIError as e:
+        logger.warning(f"Full-text search index unavailable, searching with ILIKE: {e}")
+        return False
+    
+    _available.pop(connection.engine, None)
+    logger.info(f"Full-text search index ready ({dialect})")
+    return True
+
+def install_trigram_index(connection) -> bool:
+    """Enable pg_trgm and index title/description; False if not permitted"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    try:
+        with connection.begin_nested():
+            for statement in _PG_TRGM_DDL:
+                connection.exec_driver_sql(statement)
+    except DBAPIError as e:
+        logger.warning(f"pg_trgm unavailable, fuzzy search uses in-process indexes: {e}")
+        return False
+    
+    _trigram_available.pop(connection.engine, None)
+    return True
+
+@event.listens_for(Task.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+def search_available() -> bool:
+    """Whether the bound database has the full-text index"""
+    bind = DBSession.get_bind()
+    available = _available.get(bind)
+    if available is None:
+        if bind.dialect.name == 'postgresql':
+            statement = ("SELECT 1 FROM information_schema.columns "
+                         "WHERE table_name = 'tasks' AND column_name = 'search_vector'")
+        elif bind.dialect.name == 'sqlite':
+            statement = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        else:
+            statement = None
+        available = statement is not None and DBSession.execute(text(statement)).first() is not None
+        _available[bind] = available
+    return available
+
+def trigram_available() -> bool:
+    """Whether the bound database has pg_trgm"""
+    bind = DBSession.get_bind()
+    available = _trigram_available.get(bind)
+    if available is None:
+        available = bind.dialect.name == 'postgresql' and DBSession.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+        _trigram_available[bind] = available
+    return available
+
+def _document(title: str, description: Optional[str]) -> str:
+    return f"{title}\n{description or ''}"
+
+class NgramIndexes:
+    """Per-user trigram indexes for databases without pg_trgm, kept LRU
+
+    Like the suggestion indexes, an index is tagged with the user's task
+    version as read from the database and patched in place by writes through
+    the task views when it is exactly one version behind; other writes, from
+    this process or any other, make it rebuild on next use.
+    """
+    
+    def __init__(self, maxsize: int):
+        self._indexes = LRUCache(maxsize)
+        self._lock = threading.Lock()
+    
+    def get(self, user_id: int) -> NgramIndex:
+        """Index for a user, building it if missing or stale"""
+        # Read before the documents, so a write landing in between makes the
+        # index stale rather than tagging old documents with the new version
+        version = get_user_version(user_id)
+        cached = self._indexes.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        rows = DBSession.query(Task.id, Task.title, Task.description).filter(Task.user_id == user_id)
+        index = NgramIndex((row.id, _document(row.title, row.description)) for row in rows)
+        self._indexes.set(user_id, (version, index))
+        return index
+    
+    def _patch(self, user_id: int, update) -> None:
+        version = get_user_version(user_id)
+        with self._lock:
+            cached = self._indexes.get(user_id)
+            if cached is None or cached[0] == version:
+                return
+            if cached[0] != version - 1:
+                self._indexes.pop(user_id)
+                return
+            update(cached[1])
+            self._indexes.set(user_id, (version, cached[1]))
+    
+    def task_saved(self, user_id: int, task_id: int, title: str, description: Optional[str]) -> None:
+        """Record a committed create or update of one task"""
+        self._patch(user_id, lambda index: index.add(task_id, _document(title, description)))
+    
+    def task_deleted(self, user_id: int, task_id: int) -> None:
+        """Record a committed delete of one task"""
+        self._patch(user_id, lambda index: index.remove(task_id))
+    
+    def clear(self) -> None:
+        """Drop every index"""
+        self._indexes.clear()
+
+ngram_indexes = NgramIndexes(config.SEARCH_NGRAM_CACHE_SIZE)
+
+def user_ngram_index(user_id: int) -> NgramIndex:
+    """Trigram index over a user's tasks"""
+    return ngram_indexes.get(user_id)
+
+def _fuzzy_scores(search: str, user_id: int):
+    # Capped so the ids bound into the query stay well below SQLite's
+    # variable limit; filtering and ranking share one memoized lookup
+    return user_ngram_index(user_id).fuzzy(
+        search, config.SEARCH_FUZZY_THRESHOLD, limit=config.SEARCH_MAX_CANDIDATES
+    )
+
+def _tsquery(terms: List[str]):
+    # Every term must match the start of a word
+    return func.to_tsquery(
+        literal_column(f"'{SEARCH_LANGUAGE}'", type_=REGCONFIG),
+        ' & '.join(f'{term}:*' for term in terms)
+    )
+
+def _fts5_match(terms: List[str]) -> str:
+    # Quoted so words such as AND or NEAR are not read as operators
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def substring_condition(search: str):
+    """Case-insensitive substring match on title or description"""
+    return or_(
+        Task.title.ilike(f'%{search}%'),
+        Task.description.ilike(f'%{search}%')
+    )
+
+def _fulltext_condition(search: str):
+    terms = search_terms(search)
+    if not terms or not search_available():
+        return substring_condition(search)
+    
+    if DBSession.get_bind().dialect.name == 'postgresql':
+        return _search_vector.op('@@')(_tsquery(terms))
+    
+    return Task.id.in_(
+        select(_tasks_fts.c.rowid).where(
+            literal_column('tasks_fts').op('MATCH')(_fts5_match(terms))
+        )
+    )
+
+def _set_trigram_threshold() -> None:
+    # Transaction-local, so it only affects the query that follows
+    DBSession.execute(select(func.set_config(
+        'pg_trgm.word_similarity_threshold', str(config.SEARCH_FUZZY_THRESHOLD), True
+    )))
+
+def search_condition(search: str, mode: str = DEFAULT_SEARCH_MODE, user_id: int = None):
+    """Condition selecting tasks that match a search in the given mode
+
+    Without a full-text index the search is a substring scan; without
+    pg_trgm, substring and fuzzy matching use the user's in-process index
+    and bind at most SEARCH_MAX_CANDIDATES ids into the query.
+    """
+    if mode == 'fulltext':
+        return _fulltext_condition(search)
+    
+    if trigram_available():
+        if mode == 'substring':
+            return substring_condition(search)
+        _set_trigram_threshold()
+        return or_(
+            literal(search).op('<%')(Task.title),
+            literal(search).op('<%')(Task.description)
+        )
+    
+    if mode == 'substring':
+        ids = user_ngram_index(user_id).substring(search)
+        if len(ids) > config.SEARCH_MAX_CANDIDATES:
+            # Too common to list: scan the user's tasks instead
+            return substring_condition(search)
+        return Task.id.in_(ids)
+    return Task.id.in_(list(_fuzzy_scores(search, user_id)))
+
+def search_rank(search: str, mode: str = DEFAULT_SEARCH_MODE, user_id: int = None) -> Optional[object]:
+    """Relevance of a task to the search, higher is better; None if the mode cannot rank"""
+    if mode == 'substring':
+        return None
+    
+    if mode == 'fuzzy':
+        if trigram_available():
+            return func.greatest(
+                func.word_similarity(search, Task.title),
+                func.word_similarity(search, func.coalesce(Task.description, ''))
+            )
+        scores = _fuzzy_scores(search, user_id)
+        return case(scores, value=Task.id, else_=0.0) if scores else None
+    
+    terms = search_terms(search)
+    if not terms or not search_available():
+        return None
+    
+    if DBSession.get_bind().dialect.name == 'postgresql':
+        return func.ts_rank_cd(_search_vector, _tsquery(terms))
+    
+    # bm25() is lower for better matches; title weighs twice the description
+    return select(-func.bm25(literal_column('tasks_fts'), 2.0, 1.0)).where(
+        literal_column('tasks_fts').op('MATCH')(_fts5_match(terms)),
+        _tasks_fts.c.rowid == Task.id
+    ).scalar_subquery()
@@ -0,0 +1,153 @@
+import bisect
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from . import metrics
+from .change_tracking import get_user_version
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..config import get_config
+
+config = get_config()
+
+# Rough per-entry overhead of a (key, id) tuple in the sorted array
+_ENTRY_OVERHEAD = 120
+
+_WORD_START_RE = re.compile(r'\b\w')
+
+class PrefixIndex:
+    """Sorted array of (lower-cased title suffix, task id) for one user
+
+    Every word of a title starts a key, so a prefix finds titles containing a
+    word that starts with it. Lookups are a binary search plus a short scan.
+    """
+    
+    def __init__(self, tasks=()):
+        self._titles: Dict[int, str] = {}
+        entries = []
+        for task_id, title in tasks:
+            self._titles[task_id] = title
+            entries.extend(self._entries(task_id, title))
+        entries.sort()
+        self._keys: List[Tuple[str, int]] = entries
+        self.nbytes = sum(self._entry_size(entry) for entry in entries)
+    
+    @staticmethod
+    def _entries(task_id: int, title: str) -> List[Tuple[str, int]]:
+        lowered = title.lower()
+        return [(lowered[match.start():], task_id) for match in _WORD_START_RE.finditer(lowered)]
+    
+    @staticmethod
+    def _entry_size(entry: Tuple[str, int]) -> int:
+        return _ENTRY_OVERHEAD + len(entry[0])
+    
+    def add(self, task_id: int, title: str) -> None:
+        """Index a task title, replacing any previous one"""
+        self.remove(task_id)
+        self._titles[task_id] = title
+        for entry in self._entries(task_id, title):
+            bisect.insort(self._keys, entry)
+            self.nbytes += self._entry_size(entry)
+    
+    def remove(self, task_id: int) -> None:
+        """Drop a task from the index"""
+        title = self._titles.pop(task_id, None)
+        if title is None:
+            return
+        for entry in self._entries(task_id, title):
+            position = bisect.bisect_left(self._keys, entry)
+            if position < len(self._keys) and self._keys[position] == entry:
+                del self._keys[position]
+                self.nbytes -= self._entry_size(entry)
+    
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, object]]:
+        """Tasks with a title word starting with prefix, alphabetically"""
+        prefix = prefix.lower()
+        results = []
+        seen = set()
+        position = bisect.bisect_left(self._keys, (prefix, -1))
+        while position < len(self._keys) and len(results) < limit:
+            key, task_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if task_id not in seen:
+                seen.add(task_id)
+                results.append({'id': task_id, 'title': self._titles[task_id]})
+            position += 1
+        return results
+
+class SuggestIndexes:
+    """Per-user prefix indexes, built lazily and evicted LRU under a memory budget
+
+    An index is tagged with the user's task version, users.change_seq as read
+    from the database, so writes from any process are noticed. Writes made
+    through the task views patch it in place when it is exactly one version
+    behind; any other write leaves it stale and it is rebuilt on next use.
+    """
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._indexes: 'OrderedDict[int, Tuple[int, PrefixIndex]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(index.nbytes for _, index in self._indexes.values())
+    
+    def _store(self, user_id: int, version: int, index: PrefixIndex) -> None:
+        self._indexes[user_id] = (version, index)
+        self._indexes.move_to_end(user_id)
+        total = self.nbytes
+        while total > self.budget_bytes and len(self._indexes) > 1:
+            _, (_, evicted) = self._indexes.popitem(last=False)
+            total -= evicted.nbytes
+            metrics.increment('suggest.evictions')
+    
+    def get(self, user_id: int) -> PrefixIndex:
+        """Index for a user, building it if missing or stale"""
+        # Read before the titles: a write landing in between leaves the index
+        # tagged one version behind its contents, so it is rebuilt, never kept
+        version = get_user_version(user_id)
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._indexes.move_to_end(user_id)
+                return entry[1]
+        
+        rows = DBSession.query(Task.id, Task.title).filter(Task.user_id == user_id).all()
+        index = PrefixIndex((row.id, row.title) for row in rows)
+        metrics.increment('suggest.builds')
+        with self._lock:
+            self._store(user_id, version, index)
+        return index
+    
+    def _patch(self, user_id: int, update) -> None:
+        version = get_user_version(user_id)
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry is None or entry[0] == version:
+                return
+            if entry[0] != version - 1:
+                del self._indexes[user_id]
+                return
+            update(entry[1])
+            self._store(user_id, version, entry[1])
+    
+    def task_saved(self, user_id: int, task_id: int, title: str) -> None:
+        """Record a committed create or update of one task"""
+        self._patch(user_id, lambda index: index.add(task_id, title))
+    
+    def task_deleted(self, user_id: int, task_id: int) -> None:
+        """Record a committed delete of one task"""
+        self._patch(user_id, lambda index: index.remove(task_id))
+    
+    def clear(self) -> None:
+        """Drop every index"""
+        with self._lock:
+            self._indexes.clear()
+
+suggest_indexes = SuggestIndexes(config.SUGGEST_MEMORY_BUDGET_BYTES)
+
+metrics.register_gauge('suggest.index_bytes', lambda: suggest_indexes.nbytes)
+metrics.register_gauge('suggest.indexed_users', lambda: len(suggest_indexes._indexes))
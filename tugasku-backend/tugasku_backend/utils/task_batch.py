@@ -0,0 +1,236 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import insert, update, delete
+from .change_tracking import mark_tasks_changed, mark_categories_changed, next_change_seq
+from .validators import validate_task_data
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.category import Category
+from ..models.task_log import TaskLog
+from ..models.task_tombstone import TaskTombstone
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+_DONE = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+
+def _parse_due_date(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def parse_task_values(data: Dict[str, Any], create: bool) -> Dict[str, Any]:
+    """Validate task fields and convert them to column values
+
+    Raises ValueError with the messages if they are invalid. Creates get
+    every column key, so a list of them can go out as one multi-row INSERT.
+    """
+    try:
+        validate_task_data(data, is_update=not create)
+    except HTTPBadRequest as e:
+        raise ValueError(e.json_body['errors'])
+    except (AttributeError, TypeError):
+        raise ValueError(['Fields must be strings'])
+    
+    values = {}
+    for field in ('title', 'description', 'priority', 'status'):
+        if field in data:
+            value = data[field]
+            values[field] = value.strip() if isinstance(value, str) else value
+    
+    if 'due_date' in data:
+        try:
+            values['due_date'] = _parse_due_date(data['due_date'])
+        except (AttributeError, ValueError):
+            raise ValueError(['Invalid due_date format. Use ISO format.'])
+    
+    if 'category_id' in data:
+        try:
+            values['category_id'] = int(data['category_id']) if data['category_id'] else None
+        except (TypeError, ValueError):
+            raise ValueError(['category_id must be an integer'])
+    
+    if create:
+        values.setdefault('description', '')
+        values.setdefault('due_date', None)
+        values.setdefault('category_id', None)
+        values['status'] = values.get('status') or 'pending'
+        values['priority'] = values.get('priority') or 'medium'
+    
+    return values
+
+def _validate(index: int, operation: Any) -> Dict[str, Any]:
+    """Check one operation; raise ValueError with the messages if it is invalid"""
+    if not isinstance(operation, dict):
+        raise ValueError(['Operation must be an object'])
+    
+    op = operation.get('op')
+    if op not in BATCH_OPERATIONS:
+        raise ValueError([f'op must be one of: {", ".join(BATCH_OPERATIONS)}'])
+    
+    task_id = None
+    if op != 'create':
+        try:
+            task_id = int(operation.get('id'))
+        except (TypeError, ValueError):
+            raise ValueError(['id must be an integer'])
+    
+    data = operation.get('data') or {}
+    if op == 'delete':
+        return {'index': index, 'op': op, 'id': task_id, 'data': {}}
+    if not isinstance(data, dict):
+        raise ValueError(['data must be an object'])
+    
+    values = parse_task_values(data, create=(op == 'create'))
+    
+    return {
+        'index': index,
+        'op': op,
+        'id': task_id,
+        'data': values,
+        'status_notes': data.get('status_notes')
+    }
+
+def apply_task_batch(operations: List[Any], user) -> Dict[str, Any]:
+    """Apply create/update/delete operations on a user's tasks in one transaction
+
+    Operations are validated in one pass and categories and target tasks are
+    each resolved with one query. Valid operations are then written with
+    multi-row statements and committed together; invalid ones are reported
+    and skipped.
+    """
+    if len(operations) > config.TASK_BATCH_MAX_OPERATIONS:
+        raise HTTPBadRequest(f'At most {config.TASK_BATCH_MAX_OPERATIONS} operations per request')
+    
+    results: List[Dict[str, Any]] = [None] * len(operations)
+    accepted = []
+    
+    def _fail(entry_index, errors):
+        results[entry_index] = {'index': entry_index, 'status': 'error', 'errors': errors}
+    
+    # Validation pass
+    referenced = {}
+    for index, operation in enumerate(operations):
+        try:
+            entry = _validate(index, operation)
+        except ValueError as e:
+            _fail(index, e.args[0])
+            continue
+        if entry['id'] is not None:
+            if entry['id'] in referenced:
+                _fail(index, [f"Task is already used by operation {referenced[entry['id']]}"])
+                continue
+            referenced[entry['id']] = index
+        accepted.append(entry)
+    
+    # One query each for the referenced categories and target tasks
+    category_ids = {entry['data']['category_id'] for entry in accepted if entry['data'].get('category_id')}
+    known_categories = set()
+    if category_ids:
+        known_categories = {
+            row.id for row in DBSession.query(Category.id).filter(Category.id.in_(category_ids))
+        }
+    
+    task_ids = [entry['id'] for entry in accepted if entry['id'] is not None]
+    current_status = {}
+    if task_ids:
+        current_status = {
+            row.id: row.status for row in DBSession.query(Task.id, Task.status).filter(
+                Task.id.in_(task_ids),
+                Task.user_id == user.id
+            )
+        }
+    
+    creates, updates, deletes = [], [], []
+    for entry in accepted:
+        if entry['id'] is not None and entry['id'] not in current_status:
+            _fail(entry['index'], ['Task not found'])
+        elif entry['data'].get('category_id') and entry['data']['category_id'] not in known_categories:
+            _fail(entry['index'], ['Category not found'])
+        else:
+            {'create': creates, 'update': updates, 'delete': deletes}[entry['op']].append(entry)
+    
+    logs = []
+    try:
+        seq = next_change_seq(DBSession, user.id) if creates or updates or deletes else None
+        
+        if creates:
+            # SQLAlchemy only batches order-preserving RETURNING where the
+            # database can guarantee it; SQLite hands out rowids in VALUES
+            # order, so its ids are matched up by sorting instead
+            ordered = DBSession.get_bind().dialect.name != 'sqlite'
+            created = DBSession.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=ordered),
+                [dict(entry['data'], user_id=user.id, change_seq=seq) for entry in creates]
+            ).all()
+            if not ordered:
+                created.sort(key=lambda row: row.id)
+            for entry, row in zip(creates, created):
+                entry['id'] = row.id
+                logs.append({
+                    'task_id': row.id,
+                    'old_status': None,
+                    'new_status': entry['data']['status'],
+                    'changed_by': user.id,
+                    'notes': 'Task created'
+                })
+        
+        changed = [entry for entry in updates if entry['data']]
+        if changed:
+            DBSession.execute(
+                update(Task),
+                [dict(entry['data'], id=entry['id'], change_seq=seq) for entry in changed]
+            )
+            for entry in changed:
+                old_status = current_status[entry['id']]
+                new_status = entry['data'].get('status')
+                if new_status and new_status != old_status:
+                    logs.append({
+                        'task_id': entry['id'],
+                        'old_status': old_status,
+                        'new_status': new_status,
+                        'changed_by': user.id,
+                        'notes': entry['status_notes'] or f'Status changed from {old_status} to {new_status}'
+                    })
+        
+        if deletes:
+            deleted_ids = [entry['id'] for entry in deletes]
+            DBSession.execute(
+                delete(Task).where(Task.id.in_(deleted_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            DBSession.execute(
+                insert(TaskTombstone),
+                [{'task_id': task_id, 'user_id': user.id, 'change_seq': seq} for task_id in deleted_ids]
+            )
+        
+        if logs:
+            DBSession.execute(insert(TaskLog), logs)
+        
+        if creates or updates or deletes:
+            mark_tasks_changed(DBSession, user.id)
+        # Category task counts move with categorized creates, deletes and
+        # re-categorizations
+        if (deletes or any(entry['data'].get('category_id') for entry in creates)
+                or any('category_id' in entry['data'] for entry in updates)):
+            mark_categories_changed(DBSession)
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+    
+    for entry in creates + updates + deletes:
+        results[entry['index']] = {'index': entry['index'], 'status': _DONE[entry['op']], 'id': entry['id']}
+    
+    succeeded = len(creates) + len(updates) + len(deletes)
+    logger.info(f"Task batch for user {user.username}: {succeeded} applied, {len(results) - succeeded} failed")
+    
+    return {
+        'applied': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    }
@@ -0,0 +1,65 @@
+import logging
+from typing import Any, Dict, List
+from sqlalchemy import select, insert, delete, func, literal
+from .change_tracking import mark_tasks_changed, mark_categories_changed, next_change_seq
+from .filters import task_filter_conditions
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.task_tombstone import TaskTombstone
+
+logger = logging.getLogger(__name__)
+
+def delete_tasks(user, ids: List[int] = None, filters: Dict[str, Any] = None,
+                 dry_run: bool = False) -> Dict[str, Any]:
+    """Delete the user's tasks with the given ids, or every task matching the filters
+
+    Runs set-based on the database and leaves a tombstone per task for the
+    changes feed: on PostgreSQL one DELETE ... RETURNING feeding the
+    tombstone INSERT in a single statement, elsewhere an INSERT ... SELECT of
+    the tombstones followed by one DELETE. Task history is removed by the
+    ON DELETE CASCADE on task_logs.
+    """
+    conditions = task_filter_conditions(filters or {}, user.id)
+    if ids is not None:
+        conditions.append(Task.id.in_(ids))
+    
+    if dry_run:
+        matched = DBSession.execute(select(func.count(Task.id)).where(*conditions)).scalar()
+        return {'matched': matched, 'dry_run': True}
+    
+    try:
+        seq = next_change_seq(DBSession, user.id)
+        if DBSession.get_bind().dialect.name == 'postgresql':
+            deleted = delete(Task).where(*conditions).returning(Task.id).cte('deleted')
+            deleted_ids = DBSession.execute(
+                insert(TaskTombstone).from_select(
+                    ['task_id', 'user_id', 'change_seq'],
+                    select(deleted.c.id, literal(user.id), literal(seq))
+                ).returning(TaskTombstone.task_id).add_cte(deleted)
+            ).scalars().all()
+        else:
+            # Both statements run in one transaction; on SQLite the tombstone
+            # insert already holds the write lock, so the DELETE sees the same rows
+            DBSession.execute(
+                insert(TaskTombstone).from_select(
+                    ['task_id', 'user_id', 'change_seq'],
+                    select(Task.id, literal(user.id), literal(seq)).where(*conditions)
+                )
+            )
+            deleted_ids = DBSession.execute(
+                delete(Task).where(*conditions).returning(Task.id),
+                execution_options={'synchronize_session': False}
+            ).scalars().all()
+        
+        if deleted_ids:
+            mark_tasks_changed(DBSession, user.id)
+            # Category task counts drop with the deleted tasks
+            mark_categories_changed(DBSession)
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+    
+    logger.info(f"Deleted {len(deleted_ids)} tasks for user {user.username}")
+    
+    return {'deleted': len(deleted_ids), 'ids': sorted(deleted_ids), 'dry_run': False}
@@ -0,0 +1,134 @@
+import logging
+from typing import Any, Dict, Optional
+from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound, HTTPPreconditionFailed
+from sqlalchemy import select, insert, update, func, literal
+from sqlalchemy.orm import joinedload, undefer
+from .change_tracking import mark_tasks_changed, mark_categories_changed, next_change_seq
+from .task_batch import parse_task_values
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.category import Category
+from ..models.task_log import TaskLog
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+_LOG_COLUMNS = ['task_id', 'old_status', 'new_status', 'changed_by', 'notes', 'created_at', 'updated_at']
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """Task version from an If-Match header; None when absent or ``*``
+
+    If-Match uses strong comparison, so a weak tag never matches.
+    """
+    if not value or value.strip() == '*':
+        return None
+    tag = value.split(',')[0].strip()
+    if tag.startswith('W/'):
+        raise HTTPPreconditionFailed('If-Match requires a strong ETag')
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPPreconditionFailed('If-Match must be a task version')
+
+def _log_values(old_status, new_status, user_id: int, notes: Optional[str]):
+    if notes:
+        note = literal(notes)
+    else:
+        note = literal('Status changed from ') + func.coalesce(old_status, 'none') + literal(' to ') + new_status
+    return (old_status, new_status, literal(user_id), note, func.now(), func.now())
+
+def _not_updated(task_id, user, version: Optional[int]):
+    """Work out why an update matched no row (only runs on failure)"""
+    current = DBSession.query(Task.change_seq).filter(
+        Task.id == task_id,
+        Task.user_id == user.id
+    ).first()
+    if current is None:
+        return HTTPNotFound('Task not found')
+    if version is not None and current.change_seq != version:
+        return HTTPPreconditionFailed('Task was modified by another request')
+    return HTTPBadRequest('Category not found')
+
+def update_task_fields(task_id, user, data: Dict[str, Any], version: Optional[int] = None) -> Task:
+    """Apply a partial update to one of the user's tasks and log a status change
+
+    On PostgreSQL the change sequence bump, the UPDATE ... RETURNING and the
+    log insert are CTEs of a single statement. Elsewhere the log is inserted
+    with INSERT ... SELECT ahead of one UPDATE. Either way the task is then
+    reloaded with its user and category. With a version, the update only
+    applies if the task is still at it (optimistic concurrency). The caller
+    commits.
+    """
+    try:
+        values = parse_task_values(data, create=False)
+    except ValueError as e:
+        raise HTTPBadRequest(json_body={'errors': e.args[0]})
+    
+    conditions = [Task.id == task_id, Task.user_id == user.id]
+    if version is not None:
+        conditions.append(Task.change_seq == version)
+    if values.get('category_id'):
+        conditions.append(select(Category.id).where(Category.id == values['category_id']).exists())
+    
+    notes = data.get('status_notes')
+    
+    if DBSession.get_bind().dialect.name == 'postgresql':
+        users = User.__table__
+        seq = update(users).where(users.c.id == user.id).values(
+            change_seq=users.c.change_seq + 1,
+            updated_at=users.c.updated_at
+        ).returning(users.c.change_seq).cte('seq')
+        old = select(Task.id, Task.status.label('old_status')).where(
+            *conditions
+        ).with_for_update(of=Task).cte('old')
+        changed = update(Task).where(Task.id == old.c.id).values(
+            **values,
+            change_seq=select(seq.c.change_seq).scalar_subquery(),
+            updated_at=func.now()
+        ).returning(*Task.__table__.c, old.c.old_status).cte('changed')
+        
+        statement = select(changed.c.id, changed.c.change_seq)
+        if 'status' in values:
+            logged = insert(TaskLog).from_select(
+                _LOG_COLUMNS,
+                select(changed.c.id, *_log_values(changed.c.old_status, changed.c.status, user.id, notes)).where(
+                    changed.c.old_status.is_distinct_from(changed.c.status)
+                )
+            ).returning(TaskLog.id).cte('logged')
+            statement = statement.add_cte(logged)
+        
+        updated = DBSession.execute(statement).first()
+        if updated is None:
+            raise _not_updated(task_id, user, version)
+        DBSession.info.setdefault('change_seqs', {}).setdefault(user.id, updated.change_seq)
+    else:
+        seq = next_change_seq(DBSession, user.id)
+        if 'status' in values:
+            DBSession.execute(
+                insert(TaskLog).from_select(
+                    _LOG_COLUMNS,
+                    select(Task.id, *_log_values(Task.status, literal(values['status']), user.id, notes)).where(
+                        *conditions, Task.status.is_distinct_from(values['status'])
+                    )
+                )
+            )
+        updated = DBSession.execute(
+            update(Task).where(*conditions).values(**values, change_seq=seq, updated_at=func.now()).returning(Task.id),
+            execution_options={'synchronize_session': False}
+        ).first()
+        if updated is None:
+            raise _not_updated(task_id, user, version)
+    
+    # Read after the write: CTEs of the statement above all see the snapshot
+    # taken before it, so the user and category counts come from a new query
+    task = DBSession.query(Task).options(
+        joinedload(Task.user),
+        joinedload(Task.category).options(undefer(Category.task_count))
+    ).populate_existing().filter(Task.id == updated.id).one()
+    
+    mark_tasks_changed(DBSession, user.id)
+    if 'category_id' in values:
+        mark_categories_changed(DBSession)
+    
+    logger.info(f"Updated task {task.id} for user {user.username}")
+    return task
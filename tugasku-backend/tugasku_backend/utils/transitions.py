@@ -0,0 +1,74 @@
+import logging
+from typing import Any, Dict
+from sqlalchemy import select, insert, update, func, literal, or_
+from .change_tracking import mark_tasks_changed, next_change_seq
+from .filters import task_filter_conditions
+from ..database.connection import DBSession
+from ..models.task import Task
+from ..models.task_log import TaskLog
+
+logger = logging.getLogger(__name__)
+
+_LOG_COLUMNS = ['task_id', 'old_status', 'new_status', 'changed_by', 'notes', 'created_at', 'updated_at']
+
+def transition_tasks(filters: Dict[str, Any], user, status: str, notes: str = None,
+                     dry_run: bool = False) -> Dict[str, Any]:
+    """Move every task matching the filters to a status, logging each change
+
+    Runs set-based on the database: on PostgreSQL one UPDATE ... RETURNING
+    feeding an INSERT INTO task_logs SELECT in a single statement, elsewhere
+    an INSERT ... SELECT of the logs followed by one UPDATE. Tasks already in
+    the target status are left alone.
+    """
+    conditions = task_filter_conditions(filters, user.id)
+    conditions.append(or_(Task.status.is_(None), Task.status != status))
+    
+    if dry_run:
+        matched = DBSession.execute(select(func.count(Task.id)).where(*conditions)).scalar()
+        return {'status': status, 'matched': matched, 'dry_run': True}
+    
+    def _log_values(old_status):
+        if notes:
+            note = literal(notes)
+        else:
+            note = literal('Status changed from ') + func.coalesce(old_status, 'none') + literal(f' to {status}')
+        return (old_status, literal(status), literal(user.id), note, func.now(), func.now())
+    
+    try:
+        seq = next_change_seq(DBSession, user.id)
+        if DBSession.get_bind().dialect.name == 'postgresql':
+            old = select(Task.id, Task.status.label('old_status')).where(
+                *conditions
+            ).with_for_update().subquery('old')
+            changed = update(Task).where(Task.id == old.c.id).values(
+                status=status, change_seq=seq, updated_at=func.now()
+            ).returning(Task.id, old.c.old_status).cte('changed')
+            logged = DBSession.execute(
+                insert(TaskLog).from_select(
+                    _LOG_COLUMNS, select(changed.c.id, *_log_values(changed.c.old_status))
+                ).returning(TaskLog.task_id).add_cte(changed)
+            ).all()
+            updated = len(logged)
+        else:
+            # Both statements run in one transaction; on SQLite the log insert
+            # already holds the write lock, so the UPDATE sees the same rows
+            DBSession.execute(
+                insert(TaskLog).from_select(
+                    _LOG_COLUMNS, select(Task.id, *_log_values(Task.status)).where(*conditions)
+                )
+            )
+            updated = DBSession.execute(
+                update(Task).where(*conditions).values(status=status, change_seq=seq, updated_at=func.now()),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+        
+        if updated:
+            mark_tasks_changed(DBSession, user.id)
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+    
+    logger.info(f"Transitioned {updated} tasks to {status} for user {user.username}")
+    
+    return {'status': status, 'updated': updated, 'dry_run': False}
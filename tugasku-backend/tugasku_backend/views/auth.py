@@ -1,13 +1,35 @@
 import logging
 from pyramid.view import view_config
-from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnauthorized
+from pyramid.httpexceptions import (
+    HTTPBadRequest, HTTPConflict, HTTPUnauthorized, HTTPServiceUnavailable, HTTPTooManyRequests
+)
 from sqlalchemy import or_
 from ..database.connection import DBSession
 from ..models.user import User
-from ..middleware.auth import require_auth
+from ..middleware.auth import require_auth, require_admin
 from ..utils.validators import validate_user_data
+from ..utils.passwords import PasswordPoolBusy
+from ..utils.rate_limit import login_limiter
+from ..utils.provisioning import provision_users
+from ..config import get_config
 
 logger = logging.getLogger(__name__)
+config = get_config()
+
+def _password_pool_busy():
+    """503 response telling the client when to retry"""
+    return HTTPServiceUnavailable(
+        'Too many authentication requests, please retry shortly',
+        headers={'Retry-After': str(config.PASSWORD_POOL_RETRY_AFTER)}
+    )
+
+def _login_rate_keys(request, username_or_email):
+    """Rate limit keys for a login attempt: the account and the client address"""
+    client = getattr(request, 'client_addr', None) or 'unknown'
+    return [
+        (f'login:account:{username_or_email.lower()}', config.LOGIN_RATE_LIMIT_PER_ACCOUNT),
+        (f'login:ip:{client}', config.LOGIN_RATE_LIMIT_PER_IP)
+    ]
 
 @view_config(route_name='register', request_method='POST', renderer='json')
 def register(request):
@@ -50,7 +72,10 @@ def register(request):
             'user': user.to_dict(),
             'token': token
         }
-        
+    
+    except PasswordPoolBusy:
+        DBSession.rollback()
+        raise _password_pool_busy()
     except Exception as e:
         logger.error(f"Registration error: {e}", exc_info=True)
         DBSession.rollback()
@@ -67,6 +92,16 @@ def login(request):
         if not username_or_email or not password:
             raise HTTPBadRequest('Username/email and password are required')
         
+        # Throttle before any database or bcrypt work
+        rate_keys = _login_rate_keys(request, username_or_email)
+        allowed, retry_after = login_limiter.hit(rate_keys)
+        if not allowed:
+            logger.warning(f"Login throttled for: {username_or_email}")
+            raise HTTPTooManyRequests(
+                'Too many login attempts, please retry later',
+                headers={'Retry-After': str(retry_after)}
+            )
+        
         # Log the login attempt for debugging
         logger.info(f"Login attempt for: {username_or_email}")
         
@@ -84,6 +119,13 @@ def login(request):
             logger.warning(f"Invalid password for user: {username_or_email}")
             raise HTTPUnauthorized('Invalid password')
         
+        # Successful logins do not count against the account
+        login_limiter.reset(rate_keys[0][0])
+        
+        # Persist a hash upgraded to the current bcrypt cost
+        if DBSession.is_modified(user):
+            DBSession.commit()
+        
         token = user.generate_token()
         
         logger.info(f"Login successful for user: {user.username} (ID: {user.id})")
@@ -93,7 +135,9 @@ def login(request):
             'user': user.to_dict(),
             'token': token
         }
-        
+    
+    except PasswordPoolBusy:
+        raise _password_pool_busy()
     except Exception as e:
         logger.error(f"Login error: {e}", exc_info=True)
         raise
@@ -112,9 +156,37 @@ def get_profile(request):
         logger.error(f"Get profile error: {e}", exc_info=True)
         raise
 
+@view_config(route_name='bulk_register', request_method='POST', renderer='json')
+@require_admin
+def bulk_register(request):
+    """Register many users in one request (administrators only)"""
+    try:
+        data = request.json_body
+        users = data.get('users') if isinstance(data, dict) else None
+        if not isinstance(users, list) or not users:
+            raise HTTPBadRequest('users must be a non-empty list')
+        
+        result = provision_users(users)
+        
+        logger.info(
+            f"Bulk registration by {request.current_user.username}: "
+            f"{result['created']} created, {result['failed']} failed"
+        )
+        
+        return result
+    
+    except PasswordPoolBusy:
+        DBSession.rollback()
+        raise _password_pool_busy()
+    except Exception as e:
+        logger.error(f"Bulk registration error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
 def includeme(config):
     """Include auth routes"""
     config.add_route('register', '/api/auth/register')
+    config.add_route('bulk_register', '/api/auth/bulk-register')
     config.add_route('login', '/api/auth/login')
     config.add_route('profile', '/api/auth/profile')
     
@@ -1,6 +1,7 @@
 import logging
 from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest, HTTPConflict
+from sqlalchemy.orm import undefer
 from ..database.connection import DBSession
 from ..models.category import Category
 from ..models.task import Task
@@ -14,7 +15,7 @@ logger = logging.getLogger(__name__)
 def get_categories(request):
     """Get all categories"""
     try:
-        categories = DBSession.query(Category).all()
+        categories = DBSession.query(Category).options(undefer(Category.task_count)).all()
         return {
             'categories': [category.to_dict() for category in categories]
         }
@@ -44,6 +45,7 @@ def create_category(request):
         
         DBSession.add(category)
         DBSession.flush()
+        DBSession.commit()
         
         return {
             'message': 'Category created successfully',
@@ -82,6 +84,7 @@ def update_category(request):
             category.description = data['description'].strip()
         
         DBSession.flush()
+        DBSession.commit()
         
         return {
             'message': 'Category updated successfully',
@@ -114,6 +117,7 @@ def delete_category(request):
         
         DBSession.delete(category)
         DBSession.flush()
+        DBSession.commit()
         
         return {'message': 'Category deleted successfully'}
     except Exception as e:
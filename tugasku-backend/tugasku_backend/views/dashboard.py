@@ -1,12 +1,42 @@
 import logging
 from pyramid.view import view_config
+from sqlalchemy import select, union_all, func, literal, null
+from sqlalchemy.orm import undefer
 from ..database.connection import DBSession
 from ..models.task import Task
 from ..models.category import Category
+from ..models.task_archive_stats import TaskArchiveStats
 from ..middleware.auth import require_auth
+from .tasks import task_eager_options
 
 logger = logging.getLogger(__name__)
 
+def dashboard_counts(user_id: int):
+    """Task counts by (archived, status, category_id) with each category, in one query
+
+    Live tasks are grouped on the owner's index; archived tasks come from the
+    archiver's per-user count as a single row, without reading the archive.
+    """
+    live = select(
+        literal(False).label('archived'),
+        Task.status.label('status'),
+        Task.category_id.label('category_id'),
+        func.count(Task.id).label('tasks')
+    ).where(Task.user_id == user_id).group_by(Task.status, Task.category_id)
+    archived = select(
+        literal(True),
+        literal('completed'),
+        null(),
+        TaskArchiveStats.archived_tasks
+    ).where(TaskArchiveStats.user_id == user_id)
+    counts = union_all(live, archived).subquery('counts')
+    
+    return DBSession.query(counts.c.archived, counts.c.status, counts.c.tasks, Category).options(
+        undefer(Category.task_count)
+    ).outerjoin(
+        Category, Category.id == counts.c.category_id
+    ).all()
+
 @view_config(route_name='dashboard', request_method='GET', renderer='json')
 @require_auth
 def get_dashboard(request):
@@ -14,49 +44,34 @@ def get_dashboard(request):
     try:
         user = request.current_user
         
-        # Get task statistics
-        total_tasks = DBSession.query(Task).filter(Task.user_id == user.id).count()
-        pending_tasks = DBSession.query(Task).filter(
-            Task.user_id == user.id, 
-            Task.status == 'pending'
-        ).count()
-        in_progress_tasks = DBSession.query(Task).filter(
-            Task.user_id == user.id, 
-            Task.status == 'in_progress'
-        ).count()
-        completed_tasks = DBSession.query(Task).filter(
-            Task.user_id == user.id, 
-            Task.status == 'completed'
-        ).count()
+        # Status totals and the category breakdown from one grouped query
+        statistics = {
+            'total_tasks': 0,
+            'pending_tasks': 0,
+            'in_progress_tasks': 0,
+            'completed_tasks': 0,
+            'archived_tasks': 0
+        }
+        categories = {}
+        for archived, status, tasks, category in dashboard_counts(user.id):
+            statistics['total_tasks'] += tasks
+            if f'{status}_tasks' in statistics:
+                statistics[f'{status}_tasks'] += tasks
+            if archived:
+                statistics['archived_tasks'] += tasks
+            elif category is not None:
+                entry = categories.setdefault(category.id, {'category': category.to_dict(), 'task_count': 0})
+                entry['task_count'] += tasks
         
         # Get recent tasks
-        recent_tasks = DBSession.query(Task).filter(
+        recent_tasks = DBSession.query(Task).options(*task_eager_options()).filter(
             Task.user_id == user.id
         ).order_by(Task.created_at.desc()).limit(5).all()
         
-        # Get category statistics
-        categories = DBSession.query(Category).all()
-        category_stats = []
-        for category in categories:
-            task_count = DBSession.query(Task).filter(
-                Task.category_id == category.id, 
-                Task.user_id == user.id
-            ).count()
-            if task_count > 0:
-                category_stats.append({
-                    'category': category.to_dict(),
-                    'task_count': task_count
-                })
-        
         return {
-            'statistics': {
-                'total_tasks': total_tasks,
-                'pending_tasks': pending_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'completed_tasks': completed_tasks
-            },
+            'statistics': statistics,
             'recent_tasks': [task.to_dict() for task in recent_tasks],
-            'category_stats': category_stats
+            'category_stats': [categories[category_id] for category_id in sorted(categories)]
         }
     except Exception as e:
         logger.error(f"Dashboard error: {e}", exc_info=True)
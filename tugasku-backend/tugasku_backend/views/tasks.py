@@ -1,17 +1,74 @@
+import io
 import logging
 from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
-from sqlalchemy import or_
+from pyramid.response import Response
+from sqlalchemy.orm import joinedload, undefer, load_only, contains_eager
 from datetime import datetime
 from ..database.connection import DBSession
 from ..models.task import Task
 from ..models.category import Category
 from ..models.task_log import TaskLog
+from ..models.task_log_rollup import TaskLogRollup
+from ..models.user import User
 from ..middleware.auth import require_auth
 from ..utils.validators import validate_task_data
-from ..utils.pagination import paginate
+from ..utils.pagination import paginate, paginate_keyset, parse_count_strategy, count_query
+from ..utils.filters import parse_task_filters, parse_task_fields, task_filter_conditions, filters_key
+from ..utils.change_tracking import get_user_version
+from ..utils.search import search_rank, ngram_indexes, DEFAULT_SEARCH_MODE
+from ..utils.suggest import suggest_indexes
+from ..utils.task_batch import apply_task_batch
+from ..utils.transitions import transition_tasks
+from ..utils.changes_feed import task_changes
+from ..utils.export import export_tasks, EXPORT_FORMATS
+from ..utils.task_import import import_tasks, read_rows, IMPORT_FORMATS
+from ..utils.task_update import update_task_fields, parse_if_match
+from ..utils.task_delete import delete_tasks
+from ..utils.archive import tasks_with_archive, restore_tasks
+from ..config import get_config
 
 logger = logging.getLogger(__name__)
+config = get_config()
+
+# Columns clients may sort by; each is paired with id so ordering is total
+TASK_SORT_FIELDS = ('created_at', 'updated_at', 'due_date', 'title', 'status', 'priority', 'id')
+
+def task_eager_options(entity=Task):
+    """Load a task's user and category (with its task count) in the same query"""
+    return (
+        joinedload(entity.user),
+        joinedload(entity.category).options(undefer(Category.task_count))
+    )
+
+def task_load_options(fields=None, *columns, entity=Task):
+    """Load only what the requested fields need, plus any extra columns
+
+    fields comes from parse_task_fields; None loads the full task. entity is
+    Task or an alias of it, such as the union with the archive.
+    """
+    if fields is None:
+        return task_eager_options(entity)
+    
+    loaded = [getattr(entity, field) for field in fields if field not in Task.RELATIONSHIPS]
+    options = [load_only(*loaded, *columns)]
+    if 'user' in fields:
+        options.append(joinedload(entity.user))
+    if 'category' in fields:
+        options.append(joinedload(entity.category).options(undefer(Category.task_count)))
+    return options
+
+def task_logs_page(task, cursor=None, page_size=None):
+    """One page of a task's history, newest first, with authors joined in"""
+    query = DBSession.query(TaskLog).join(TaskLog.user).options(
+        contains_eager(TaskLog.user).load_only(User.id, User.username)
+    ).filter(TaskLog.task_id == task.id)
+    if DBSession.get_bind().dialect.name == 'postgresql':
+        # Entries never predate their task, so monthly partitions older than
+        # the task are pruned from the plan
+        query = query.filter(TaskLog.created_at >= task.created_at)
+    return paginate_keyset(query, TaskLog, 'created_at', descending=True,
+                           cursor=cursor, page_size=page_size)
 
 @view_config(route_name='tasks', request_method='GET', renderer='json')
 @require_auth
@@ -19,59 +76,99 @@ def get_tasks(request):
     """Get user tasks with filtering and pagination"""
     try:
         user = request.current_user
-        query = DBSession.query(Task).filter(Task.user_id == user.id)
-        
-        # Search functionality
-        search = request.params.get('search', '').strip()
-        if search:
-            query = query.filter(
-                or_(
-                    Task.title.ilike(f'%{search}%'),
-                    Task.description.ilike(f'%{search}%')
-                )
-            )
-        
-        # Filters
-        category_id = request.params.get('category_id')
-        if category_id:
-            query = query.filter(Task.category_id == int(category_id))
-        
-        status = request.params.get('status')
-        if status:
-            query = query.filter(Task.status == status)
         
-        priority = request.params.get('priority')
-        if priority:
-            query = query.filter(Task.priority == priority)
+        # Search and filters
+        filters = parse_task_filters(request.params)
+        fields = parse_task_fields(request.params)
+        include_archived = request.params.get('include_archived') in ('1', 'true')
         
         # Sorting
         sort_by = request.params.get('sort_by', 'created_at')
-        sort_order = request.params.get('sort_order', 'desc')
+        # Relevance ordering needs a search and is only offered for offset
+        # pages of live tasks
+        relevance = (sort_by == 'relevance' and 'search' in filters and 'cursor' not in request.params
+                     and not include_archived)
+        if sort_by not in TASK_SORT_FIELDS:
+            sort_by = 'created_at'
+        descending = request.params.get('sort_order', 'desc') != 'asc'
+        
+        # Only the requested columns and relationships are loaded; the sort
+        # column is always loaded since cursors are built from it. Archived
+        # tasks come in through a UNION ALL read as tasks.
+        if include_archived:
+            entity = tasks_with_archive(filters, user.id)
+            query = DBSession.query(entity).options(
+                *task_load_options(fields, getattr(entity, sort_by), entity=entity)
+            )
+        else:
+            entity = Task
+            query = DBSession.query(Task).options(*task_load_options(fields, getattr(Task, sort_by))).filter(
+                *task_filter_conditions(filters, user.id)
+            )
+        
+        page_size = int(request.params.get('page_size', 20))
+        
+        # Totals are cached per user and filter set until the user's tasks
+        # change; the version is a database read, so only taken when needed
+        count = parse_count_strategy(request.params.get('count'))
+        count_key = None
+        if count == 'cached':
+            count_key = ('tasks', user.id, get_user_version(user.id), filters_key(filters), include_archived)
+        
+        # Cursor pagination: seek on (sort column, id) instead of OFFSET
+        if 'cursor' in request.params:
+            result = paginate_keyset(
+                query, entity, sort_by, descending,
+                cursor=request.params.get('cursor') or None,
+                page_size=page_size
+            )
+            
+            pagination = {
+                'page_size': result['page_size'],
+                'has_next': result['has_next'],
+                'has_prev': result['has_prev'],
+                'next_cursor': result['next_cursor'],
+                'prev_cursor': result['prev_cursor']
+            }
+            # Totals are opt-in for cursor pages
+            if request.params.get('count'):
+                pagination['total'], pagination['count_strategy'] = count_query(query, count, count_key)
+            
+            logger.info(f"Retrieved {len(result['items'])} tasks for user {user.username}")
+            
+            return {
+                'tasks': [task.to_dict(fields) for task in result['items']],
+                'pagination': pagination
+            }
         
-        if hasattr(Task, sort_by):
-            if sort_order == 'asc':
-                query = query.order_by(getattr(Task, sort_by).asc())
-            else:
-                query = query.order_by(getattr(Task, sort_by).desc())
+        sort_column = getattr(entity, sort_by)
+        rank = search_rank(filters['search'], filters.get('search_mode', DEFAULT_SEARCH_MODE), user.id) if relevance else None
+        if rank is not None:
+            query = query.order_by(rank.desc(), Task.id.desc())
+        elif descending:
+            query = query.order_by(sort_column.desc(), entity.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), entity.id.asc())
         
         # Pagination
         page = int(request.params.get('page', 1))
-        page_size = int(request.params.get('page_size', 20))
         
-        result = paginate(query, page, page_size)
+        result = paginate(query, page, page_size, count=count, count_key=count_key)
         
         logger.info(f"Retrieved {len(result['items'])} tasks for user {user.username}")
         
         return {
-            'tasks': [task.to_dict() for task in result['items']],
+            'tasks': [task.to_dict(fields) for task in result['items']],
             'pagination': {
                 'page': result['page'],
                 'page_size': result['page_size'],
                 'total': result['total'],
-                'pages': result['pages']
+                'pages': result['pages'],
+                'has_next': result['has_next'],
+                'count_strategy': result['count_strategy']
             }
         }
-        
+    
     except Exception as e:
         logger.error(f"Get tasks error: {e}", exc_info=True)
         raise
@@ -127,6 +224,8 @@ def create_task(request):
         
         # Commit the transaction
         DBSession.commit()
+        suggest_indexes.task_saved(user.id, task.id, task.title)
+        ngram_indexes.task_saved(user.id, task.id, task.title, task.description)
         
         logger.info(f"Task created successfully: ID {task.id}, Title: {task.title}")
         
@@ -134,21 +233,245 @@ def create_task(request):
             'message': 'Task created successfully',
             'task': task.to_dict()
         }
-        
+    
     except Exception as e:
         logger.error(f"Create task error: {e}", exc_info=True)
         DBSession.rollback()
         raise
 
+@view_config(route_name='task_batch', request_method='POST', renderer='json')
+@require_auth
+def batch_tasks(request):
+    """Create, update and delete many tasks in one transaction"""
+    try:
+        data = request.json_body
+        operations = data.get('operations') if isinstance(data, dict) else data
+        if not isinstance(operations, list) or not operations:
+            raise HTTPBadRequest('operations must be a non-empty list')
+        
+        user = request.current_user
+        result = apply_task_batch(operations, user)
+        
+        # Serialize every written task with one query
+        written_ids = [
+            entry['id'] for entry in result['results']
+            if entry['status'] in ('created', 'updated')
+        ]
+        if written_ids:
+            tasks = {
+                task.id: task for task in DBSession.query(Task).options(*task_eager_options()).filter(
+                    Task.id.in_(written_ids)
+                )
+            }
+            for entry in result['results']:
+                if entry['status'] in ('created', 'updated'):
+                    entry['task'] = tasks[entry['id']].to_dict()
+        
+        return result
+    
+    except Exception as e:
+        logger.error(f"Batch tasks error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
+@view_config(route_name='task_transition', request_method='POST', renderer='json')
+@require_auth
+def transition_filtered_tasks(request):
+    """Set the status of every task matching the list filters"""
+    try:
+        data = request.json_body
+        if not isinstance(data, dict) or not data.get('status'):
+            raise HTTPBadRequest('status is required')
+        validate_task_data({'status': data['status']}, is_update=True)
+        
+        user = request.current_user
+        filters = parse_task_filters(request.params)
+        
+        return transition_tasks(
+            filters, user, data['status'],
+            notes=data.get('notes'),
+            dry_run=bool(data.get('dry_run')) or request.params.get('dry_run') in ('1', 'true')
+        )
+    
+    except Exception as e:
+        logger.error(f"Transition tasks error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
+@view_config(route_name='task_delete', request_method='POST', renderer='json')
+@require_auth
+def delete_many_tasks(request):
+    """Delete tasks by id, or every task matching the list filters"""
+    try:
+        data = request.json_body if request.body else {}
+        if not isinstance(data, dict):
+            raise HTTPBadRequest('Request body must be an object')
+        
+        ids = data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+                raise HTTPBadRequest('ids must be a non-empty list of integers')
+            if len(ids) > config.TASK_BATCH_MAX_OPERATIONS:
+                raise HTTPBadRequest(f'At most {config.TASK_BATCH_MAX_OPERATIONS} ids per request')
+        
+        filters = parse_task_filters(request.params)
+        # Deleting every task has to be asked for explicitly
+        if ids is None and not filters and data.get('all') is not True:
+            raise HTTPBadRequest('ids or a filter is required (or "all": true)')
+        
+        user = request.current_user
+        return delete_tasks(
+            user, ids=ids, filters=filters,
+            dry_run=bool(data.get('dry_run')) or request.params.get('dry_run') in ('1', 'true')
+        )
+    
+    except Exception as e:
+        logger.error(f"Delete tasks error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
+@view_config(route_name='task_unarchive', request_method='POST', renderer='json')
+@require_auth
+def unarchive_tasks(request):
+    """Move archived tasks back into the task list by id"""
+    try:
+        data = request.json_body if request.body else {}
+        if not isinstance(data, dict):
+            raise HTTPBadRequest('Request body must be an object')
+        
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            raise HTTPBadRequest('ids must be a non-empty list of integers')
+        if len(ids) > config.TASK_BATCH_MAX_OPERATIONS:
+            raise HTTPBadRequest(f'At most {config.TASK_BATCH_MAX_OPERATIONS} ids per request')
+        
+        return restore_tasks(request.current_user, ids)
+    
+    except Exception as e:
+        logger.error(f"Unarchive tasks error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
+@view_config(route_name='task_changes', request_method='GET', renderer='json')
+@require_auth
+def get_task_changes(request):
+    """Tasks created, updated or deleted since a sync token"""
+    try:
+        user = request.current_user
+        
+        try:
+            page_size = int(request.params.get('page_size', config.CHANGES_PAGE_SIZE))
+        except ValueError:
+            raise HTTPBadRequest('page_size must be an integer')
+        page_size = max(min(page_size, config.CHANGES_MAX_PAGE_SIZE), 1)
+        
+        fields = parse_task_fields(request.params)
+        result = task_changes(
+            user.id, request.params.get('since'), page_size,
+            options=task_load_options(fields, Task.change_seq)
+        )
+        
+        logger.info(
+            f"Changes feed for user {user.username}: {len(result['tasks'])} updated, "
+            f"{len(result['deleted'])} deleted"
+        )
+        
+        return {
+            'tasks': [task.to_dict(fields) for task in result['tasks']],
+            'deleted': [tombstone.to_dict() for tombstone in result['deleted']],
+            'next_since': result['next_since'],
+            'has_more': result['has_more']
+        }
+    
+    except Exception as e:
+        logger.error(f"Task changes error: {e}", exc_info=True)
+        raise
+
+@view_config(route_name='task_export', request_method='GET')
+@require_auth
+def export_user_tasks(request):
+    """Stream the user's tasks, optionally with their logs, as NDJSON or CSV"""
+    try:
+        user = request.current_user
+        
+        fmt = request.params.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPBadRequest(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+        include_logs = request.params.get('include_logs', 'false').lower() in ('1', 'true', 'yes')
+        
+        conditions = task_filter_conditions(parse_task_filters(request.params), user.id)
+        
+        logger.info(f"Exporting tasks as {fmt} for user {user.username}")
+        
+        response = Response(
+            app_iter=export_tasks(conditions, fmt, include_logs),
+            content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+            charset='utf-8'
+        )
+        response.content_disposition = f'attachment; filename="tasks.{fmt}"'
+        return response
+    
+    except Exception as e:
+        logger.error(f"Export tasks error: {e}", exc_info=True)
+        raise
+
+@view_config(route_name='task_import', request_method='POST', renderer='json')
+@require_auth
+def import_user_tasks(request):
+    """Create tasks from a CSV or NDJSON request body"""
+    try:
+        user = request.current_user
+        
+        fmt = request.params.get('format', 'ndjson')
+        if fmt not in IMPORT_FORMATS:
+            raise HTTPBadRequest(f'format must be one of: {", ".join(IMPORT_FORMATS)}')
+        
+        stream = io.TextIOWrapper(request.body_file, encoding='utf-8', newline='')
+        return import_tasks(read_rows(stream, fmt), user)
+    
+    except Exception as e:
+        logger.error(f"Import tasks error: {e}", exc_info=True)
+        DBSession.rollback()
+        raise
+
+@view_config(route_name='task_suggest', request_method='GET', renderer='json')
+@require_auth
+def suggest_tasks(request):
+    """Suggest task titles for as-you-type search"""
+    try:
+        user = request.current_user
+        prefix = request.params.get('prefix', '').strip()
+        
+        try:
+            limit = int(request.params.get('limit', config.SUGGEST_DEFAULT_LIMIT))
+        except ValueError:
+            raise HTTPBadRequest('limit must be an integer')
+        limit = max(min(limit, config.SUGGEST_MAX_LIMIT), 1)
+        
+        if not prefix:
+            return {'suggestions': []}
+        
+        return {
+            'suggestions': suggest_indexes.get(user.id).suggest(prefix, limit)
+        }
+    
+    except Exception as e:
+        logger.error(f"Suggest tasks error: {e}", exc_info=True)
+        raise
+
 @view_config(route_name='task_by_id', request_method='GET', renderer='json')
 @require_auth
 def get_task(request):
-    """Get single task with logs"""
+    """Get single task with logs
+
+    The ETag is the task's version, the value If-Match takes on update.
+    """
     try:
         task_id = request.matchdict.get('id')
         user = request.current_user
+        fields = parse_task_fields(request.params)
         
-        task = DBSession.query(Task).filter(
+        task = DBSession.query(Task).options(*task_load_options(fields, Task.created_at, Task.change_seq)).filter(
             Task.id == task_id,
             Task.user_id == user.id
         ).first()
@@ -156,34 +479,31 @@ def get_task(request):
         if not task:
             raise HTTPNotFound('Task not found')
         
-        # Get task logs
-        logs = DBSession.query(TaskLog).filter(
-            TaskLog.task_id == task.id
-        ).order_by(TaskLog.created_at.desc()).all()
+        # Latest history entries; older ones are paged through /logs
+        logs = task_logs_page(task, page_size=config.TASK_DETAIL_LOG_LIMIT)
         
-        task_dict = task.to_dict()
-        task_dict['logs'] = [log.to_dict() for log in logs]
+        task_dict = task.to_dict(fields)
+        task_dict['logs'] = [log.to_dict() for log in logs['items']]
+        task_dict['logs_next_cursor'] = logs['next_cursor']
+        request.response.headers['ETag'] = f'"{task.change_seq}"'
         
         return {
             'task': task_dict
         }
-        
+    
     except Exception as e:
         logger.error(f"Get task error: {e}", exc_info=True)
         raise
 
-@view_config(route_name='task_by_id', request_method='PUT', renderer='json')
+@view_config(route_name='task_logs', request_method='GET', renderer='json')
 @require_auth
-def update_task(request):
-    """Update task"""
+def get_task_logs(request):
+    """Get a task's history, newest first, by cursor"""
     try:
         task_id = request.matchdict.get('id')
-        data = request.json_body
-        validate_task_data(data, is_update=True)
-        
         user = request.current_user
         
-        task = DBSession.query(Task).filter(
+        task = DBSession.query(Task.id, Task.created_at).filter(
             Task.id == task_id,
             Task.user_id == user.id
         ).first()
@@ -191,56 +511,58 @@ def update_task(request):
         if not task:
             raise HTTPNotFound('Task not found')
         
-        old_status = task.status
-        logger.info(f"Updating task {task_id} for user {user.username}")
+        page_size = int(request.params.get('page_size', config.DEFAULT_PAGE_SIZE))
+        result = task_logs_page(task, request.params.get('cursor') or None, page_size)
         
-        # Update fields
-        for field in ['title', 'description', 'priority']:
-            if field in data:
-                setattr(task, field, data[field].strip() if isinstance(data[field], str) else data[field])
-        
-        if 'due_date' in data:
-            if data['due_date']:
-                try:
-                    task.due_date = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-                except ValueError:
-                    raise HTTPBadRequest('Invalid due_date format')
-            else:
-                task.due_date = None
-        
-        if 'category_id' in data:
-            if data['category_id']:
-                category = DBSession.query(Category).get(data['category_id'])
-                if not category:
-                    raise HTTPBadRequest('Category not found')
-                task.category_id = data['category_id']
-            else:
-                task.category_id = None
-        
-        # Handle status change
-        if 'status' in data and data['status'] != old_status:
-            task.status = data['status']
-            
-            # Create log entry for status change
-            log_entry = TaskLog(
-                task_id=task.id,
-                old_status=old_status,
-                new_status=task.status,
-                changed_by=user.id,
-                notes=data.get('status_notes', f'Status changed from {old_status} to {task.status}')
-            )
-            DBSession.add(log_entry)
+        # Entries past the retention window survive only as a summary
+        rollup = DBSession.query(TaskLogRollup).get(task.id)
+        
+        return {
+            'logs': [log.to_dict() for log in result['items']],
+            'rolled_up': rollup.to_dict() if rollup else None,
+            'pagination': {
+                'page_size': result['page_size'],
+                'has_next': result['has_next'],
+                'has_prev': result['has_prev'],
+                'next_cursor': result['next_cursor'],
+                'prev_cursor': result['prev_cursor']
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Get task logs error: {e}", exc_info=True)
+        raise
+
+@view_config(route_name='task_by_id', request_method='PUT', renderer='json')
+@require_auth
+def update_task(request):
+    """Update task
+
+    An If-Match header carrying the task's version (from a previous read)
+    makes the update conditional: 412 if the task changed since.
+    """
+    try:
+        task_id = request.matchdict.get('id')
+        data = request.json_body
+        user = request.current_user
+        version = parse_if_match(request.headers.get('If-Match'))
+        
+        logger.info(f"Updating task {task_id} for user {user.username}")
+        task = update_task_fields(task_id, user, data, version=version)
+        result = task.to_dict()
         
-        DBSession.flush()
         DBSession.commit()
+        suggest_indexes.task_saved(user.id, result['id'], result['title'])
+        ngram_indexes.task_saved(user.id, result['id'], result['title'], result['description'])
+        request.response.headers['ETag'] = f'"{result["version"]}"'
         
         logger.info(f"Task {task_id} updated successfully")
         
         return {
             'message': 'Task updated successfully',
-            'task': task.to_dict()
+            'task': result
         }
-        
+    
     except Exception as e:
         logger.error(f"Update task error: {e}", exc_info=True)
         DBSession.rollback()
@@ -267,11 +589,13 @@ def delete_task(request):
         DBSession.delete(task)
         DBSession.flush()
         DBSession.commit()
+        suggest_indexes.task_deleted(user.id, task.id)
+        ngram_indexes.task_deleted(user.id, task.id)
         
         logger.info(f"Task {task_id} deleted successfully")
         
         return {'message': 'Task deleted successfully'}
-        
+    
     except Exception as e:
         logger.error(f"Delete task error: {e}", exc_info=True)
         DBSession.rollback()
@@ -280,7 +604,16 @@ def delete_task(request):
 def includeme(config):
     """Include task routes"""
     config.add_route('tasks', '/api/tasks')
-    config.add_route('task_by_id', '/api/tasks/{id}')
+    config.add_route('task_batch', '/api/tasks/batch')
+    config.add_route('task_transition', '/api/tasks/transition')
+    config.add_route('task_delete', '/api/tasks/delete')
+    config.add_route('task_unarchive', '/api/tasks/unarchive')
+    config.add_route('task_changes', '/api/tasks/changes')
+    config.add_route('task_export', '/api/tasks/export')
+    config.add_route('task_import', '/api/tasks/import')
+    config.add_route('task_suggest', '/api/tasks/suggest')
+    config.add_route('task_by_id', r'/api/tasks/{id:\d+}')
+    config.add_route('task_logs', r'/api/tasks/{id:\d+}/logs')
     
     # Scan this module to register views
     config.scan(__name__)